@@ -3,7 +3,7 @@ Exposes TEStribute main function rank_services()
 """
 import logging
 import os
-from typing import (Iterable, Mapping, Optional, Union)
+from typing import (Iterable, List, Mapping, Optional, Union)
 
 
 from TEStribute import models
@@ -11,6 +11,12 @@ import TEStribute.models.request as rq
 import TEStribute.models.response as rs
 from TEStribute.config import config_parser
 from TEStribute.log import (log_yaml, setup_logger)
+from TEStribute.metrics import (COMBINATIONS_PER_REQUEST, observe_stage)
+from TEStribute.utils.cassettes import (Cassette, use_cassette)
+from TEStribute.utils.pricing import (get_price_sheets, PriceSheets)
+from TEStribute.utils.profiling import add_info
+from TEStribute.utils.service_cache import (get_service_caches, ServiceCaches)
+from TEStribute.utils.singleflight import SingleFlight
 
 # Set up logging
 log_file = os.path.abspath(
@@ -23,6 +29,9 @@ log_file = os.path.abspath(
 logger = setup_logger("TEStribute", logging.DEBUG)
 logging.captureWarnings(capture=True)
 
+# Rankings in flight, shared by identical concurrent requests
+_rankings_in_flight = SingleFlight()
+
 
 def rank_services(
     jwt: Optional[str] = None,
@@ -84,6 +93,9 @@ def rank_services(
         config=config,
     )
 
+    # Record or replay outbound requests, if configured
+    cassette = _cassette(config)
+
     # Create Request object
     log_yaml(
         header="=== USER INPUT ===",
@@ -95,19 +107,20 @@ def rank_services(
         resource_requirements=resource_requirements,
         tes_uris=tes_uris,
     )
-    request = rq.Request(
-        object_ids=object_ids,
-        drs_uris=drs_uris,
-        mode=mode,
-        resource_requirements=models.ResourceRequirements(
-            **resource_requirements
-        ),
-        tes_uris=tes_uris,
-        authorization_required=config["security"]
-        ["authorization_required"],
-        jwt=jwt,
-        jwt_config=config["security"]["jwt"],
-    )
+    with observe_stage("request"):
+        request = rq.Request(
+            object_ids=object_ids,
+            drs_uris=drs_uris,
+            mode=mode,
+            resource_requirements=models.ResourceRequirements(
+                **resource_requirements
+            ),
+            tes_uris=tes_uris,
+            authorization_required=config["security"]
+            ["authorization_required"],
+            jwt=jwt,
+            jwt_config=config["security"]["jwt"],
+        )
     logger.debug("=== VALIDATION ===")
     log_yaml(
         level=logging.DEBUG,
@@ -115,81 +128,223 @@ def rank_services(
         **request.to_dict(),
     )
 
+    # Rank services; identical requests in flight share a single computation,
+    # whose stages and outbound calls are only recorded in the profile of the
+    # request that computed it
+    if config.get("coalesce_requests", False):
+        computed: List[bool] = []
+
+        def _compute() -> rs.Response:
+            computed.append(True)
+            return _rank_services(request=request, config=config)
+
+        response, shared = _rankings_in_flight.do(
+            request.fingerprint(),
+            _compute,
+        )
+        if shared:
+            logger.info("Response shared with identical concurrent request.")
+            if not computed:
+                add_info(coalesced=True)
+
+            # Keep rankings independent for mode 'random'
+            if request.mode_float < 0:
+                response = response.rerank()
+    else:
+        response = _rank_services(request=request, config=config)
+
+    # Write recorded responses to cassette
+    if cassette is not None and cassette.mode == "record":
+        cassette.flush()
+
+    # Return response object; the complete response is only converted for
+    # logging at level DEBUG, as that is costly for large responses
+    logger.info(
+        f"Ranked {len(response.service_combinations_sorted)} service "
+        f"combinations with {len(response.warnings)} warning(s)."
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        log_yaml(
+            header="=== OUTPUT ===",
+            level=logging.DEBUG,
+            logger=logger,
+            **response.to_dict()
+        )
+    return response
+
+
+def _rank_services(
+    request: rq.Request,
+    config: Mapping,
+) -> rs.Response:
+    """
+    Fetches service information for a validated request and returns a
+    `Response` object with rank-ordered service combinations.
+
+    :param request: Validated `Request` object.
+    :param config: App config.
+
+    :return: `Response` object.
+    """
     # Create Response object
     logger.debug("=== INITIALIZE RESPONSE ===")
-    response = rs.Response(
-        request=request,
-        timeout=config["timeout"],
-        target_currency=models.Currency[config["target_currency"]],
-    )
-    log_yaml(
-        level=logging.DEBUG,
-        logger=logger,
-        **response.to_dict()
-    )
-    log_yaml(
-        header="=== CURRENCY EXCHANGE RATES ===",
-        level=logging.DEBUG,
-        logger=logger,
-        target_currency=response.target_currency.value,
-        object_info=response.exchange_rates,
-    )
-    log_yaml(
-        header="=== TES TASK INFO ===",
-        level=logging.DEBUG,
-        logger=logger,
-        object_info={k: v.to_dict() for k, v in response.task_info.items()},
-    )
-    log_yaml(
-        header="=== DRS OBJECT INFO ===",
-        level=logging.DEBUG,
-        logger=logger,
-        object_info={
-            object_id: {
-                key: metadata.to_dict() for key, metadata in service.items()
-            } for object_id, service in response.object_info.items()
-        },
-    )
-    log_yaml(
-        header="=== OBJECT SIZES ===",
-        level=logging.DEBUG,
-        logger=logger,
-        object_info=response.object_sizes,
-    )
+    with observe_stage("fetch"):
+        response = rs.Response(
+            request=request,
+            timeout=config["timeout"],
+            target_currency=models.Currency[config["target_currency"]],
+            price_sheets=_price_sheets(config),
+            max_combinations=(config.get("combinations") or {}).get("max"),
+            on_exceed=(config.get("combinations") or {}).get(
+                "on_exceed", "reject"
+            ),
+            caches=_service_caches(config),
+        )
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        log_yaml(
+            level=logging.DEBUG,
+            logger=logger,
+            **response.to_dict()
+        )
+        log_yaml(
+            header="=== CURRENCY EXCHANGE RATES ===",
+            level=logging.DEBUG,
+            logger=logger,
+            target_currency=response.target_currency.value,
+            object_info=response.exchange_rates,
+        )
+        log_yaml(
+            header="=== TES TASK INFO ===",
+            level=logging.DEBUG,
+            logger=logger,
+            object_info={
+                k: v.to_dict() for k, v in response.task_info.items()
+            },
+        )
+        log_yaml(
+            header="=== DRS OBJECT INFO ===",
+            level=logging.DEBUG,
+            logger=logger,
+            object_info={
+                object_id: {
+                    key: metadata.to_dict()
+                    for key, metadata in service.items()
+                } for object_id, service in response.object_info.items()
+            },
+        )
+        log_yaml(
+            header="=== OBJECT SIZES ===",
+            level=logging.DEBUG,
+            logger=logger,
+            object_info=response.object_sizes,
+        )
 
     # Compute distances
-    response.get_distances()
-    log_yaml(
-        header="=== DISTANCES ===",
-        level=logging.DEBUG,
-        logger=logger,
-        distances_detailed=response.distances_full,
-        distances=response.distances,
-    )
+    with observe_stage("distances"):
+        response.get_distances()
+    if debug:
+        log_yaml(
+            header="=== DISTANCES ===",
+            level=logging.DEBUG,
+            logger=logger,
+            distances_detailed=response.distances_full,
+            distances=response.distances,
+        )
 
     # Filter service combinations
-    response.filter_service_combinations()
+    with observe_stage("filter"):
+        response.filter_service_combinations()
+    COMBINATIONS_PER_REQUEST.observe(len(response.service_combinations))
 
     # Estimate costs
-    response.estimate_costs()
+    with observe_stage("costs"):
+        response.estimate_costs()
 
     # Estimate total task time
-    response.estimate_times()
+    with observe_stage("times"):
+        response.estimate_times()
 
     # Rank service combinations
-    response.rank_combinations()
-    log_yaml(
-        header="=== SCORES ===",
-        level=logging.DEBUG,
-        logger=logger,
-        scores=[str(i) for i in response.scores],
+    with observe_stage("rank"):
+        response.rank_combinations()
+    if debug:
+        log_yaml(
+            header="=== SCORES ===",
+            level=logging.DEBUG,
+            logger=logger,
+            scores=[str(i) for i in response.scores],
+        )
+    return response
+
+
+def _price_sheets(
+    config: Mapping,
+) -> Optional[PriceSheets]:
+    """
+    Returns shared price sheets if costs are to be estimated locally from unit
+    prices (pricing mode `model`), otherwise `None`.
+
+    :param config: App config.
+    """
+    pricing = config.get("pricing") or {}
+    if pricing.get("mode", "quote") != "model":
+        return None
+    if not pricing.get("price_sheets"):
+        logger.warning(
+            "Pricing mode 'model' requires 'pricing.price_sheets' to be set; "
+            "requesting quotes from all TES instances."
+        )
+        return None
+    return get_price_sheets(
+        source=pricing["price_sheets"],
+        refresh_interval=pricing.get("refresh_interval", 3600),
     )
 
-    # Return response object
-    log_yaml(
-        header="=== OUTPUT ===",
-        level=logging.INFO,
-        logger=logger,
-        **response.to_dict()
+
+def _service_caches(
+    config: Mapping,
+) -> Optional[ServiceCaches]:
+    """
+    Returns shared caches of responses of external services with the backend
+    configured in section `service_cache`, or `None` if caching is disabled.
+
+    :param config: App config.
+    """
+    settings = dict(config.get("service_cache") or {})
+    if not settings.get("backend"):
+        return None
+    settings["ttl"] = tuple(sorted((settings.get("ttl") or {}).items()))
+    try:
+        return get_service_caches(**settings)
+    except (ImportError, TypeError, ValueError) as e:
+        logger.warning(
+            "Invalid settings in section 'service_cache'; responses of "
+            f"external services are not cached. Original error message: {e}"
+        )
+        return None
+
+
+def _cassette(
+    config: Mapping,
+) -> Optional[Cassette]:
+    """
+    Returns the cassette that outbound requests are recorded to or replayed
+    from, if configured in section `cassette`, otherwise `None`.
+
+    :param config: App config.
+    """
+    settings = config.get("cassette") or {}
+    if not settings.get("mode"):
+        return None
+    if not settings.get("path"):
+        logger.warning(
+            "Cassette mode requires 'cassette.path' to be set; outbound "
+            "requests are neither recorded nor replayed."
+        )
+        return None
+    return use_cassette(
+        path=settings["path"],
+        mode=settings["mode"],
+        latency=settings.get("latency", "original"),
     )
-    return response
@@ -2,12 +2,9 @@
 CLI entry point for TEStribute.
 """
 import argparse
-import json
 import logging
 import sys
 
-from TEStribute import rank_services
-
 logger = logging.getLogger("TEStribute")
 logger.setLevel(logging.INFO)
 
@@ -132,7 +129,10 @@ def main():
     except ValueError:
         pass
 
-    # Call app's main function with arguments
+    # Call app's main function with arguments; imported only after arguments
+    # were parsed so that `--help` and `--version` return immediately
+    from TEStribute import rank_services
+    from TEStribute.models.encoder import encode_response
     try:
         response = rank_services(
             mode=args.mode,
@@ -151,7 +151,7 @@ def main():
         sys.exit(1)
 
     # Print output
-    sys.stdout.write(json.dumps(response.to_dict()))
+    sys.stdout.write(encode_response(response).decode("ascii"))
 
 
 if __name__ == "__main__":
@@ -3,40 +3,67 @@ YAML config parser
 """
 import os
 import logging
-from typing import Dict
+from typing import (Dict, Mapping)
 import yaml
 
 logger = logging.getLogger("TEStribute")
 
+# Environment variable pointing to a config file whose settings override those
+# of the default config file, e.g., 'config/production.yaml'
+ENV_CONFIG = "TESTRIBUTE_CONFIG"
 
-def config_parser(
-    default_path: str = os.path.abspath(
-        os.path.join(
-            os.path.dirname(os.path.realpath(__file__)),
-            "config.yaml"
-        )
-    )
+
+def _merge(
+    config: Dict,
+    overrides: Mapping,
 ) -> Dict:
-    """
-    :param default_path: path to config file
-    :return: dict from yaml config
-    """
+    """Recursively merges `overrides` into `config`."""
+    for key, value in overrides.items():
+        if isinstance(value, Mapping) and isinstance(config.get(key), dict):
+            _merge(config[key], value)
+        else:
+            config[key] = value
+    return config
+
+
+def _load(path: str) -> Dict:
+    """Loads config file; see `config_parser()`."""
     try:
-        with open(default_path) as f:
+        with open(path) as f:
             config = yaml.safe_load(f)
             if not isinstance(config, dict):
                 logger.error(
-                    f"Config file '{default_path}' not of key -> value type."
+                    f"Config file '{path}' not of key -> value type."
                     "Execution aborted. "
                 )
                 raise TypeError
-            logger.debug("Config loaded from" + default_path)
+            logger.debug("Config loaded from" + path)
     except (FileNotFoundError, PermissionError) as e:
         logger.error(
-            "Config file not found. Ensure that default config file is "
-            f"available and accessible at '{default_path}'."
+            "Config file not found. Ensure that config file is "
+            f"available and accessible at '{path}'."
             "Execution aborted. "
             f"Original error message: {type(e).__name__}: {e}"
         )
         raise
     return config
+
+
+def config_parser(
+    default_path: str = os.path.abspath(
+        os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            "config.yaml"
+        )
+    )
+) -> Dict:
+    """
+    :param default_path: path to config file
+    :return: dict from yaml config, with the settings of the config file set
+        in environment variable `TESTRIBUTE_CONFIG`, if any, taking precedence
+    """
+    config = _load(default_path)
+    path = os.environ.get(ENV_CONFIG)
+    if path:
+        config = _merge(config, _load(path))
+    return config
@@ -1,12 +1,32 @@
 """
 Controller for `POST /rank-services` endpoint.
 """
-from flask import Response
+from hashlib import sha256
+import json
+import logging
+from typing import (Iterator, Mapping, Optional, Tuple)
+
+from flask import (current_app, request, Response, stream_with_context)
+from jsonschema.exceptions import ValidationError as SchemaValidationError
 from werkzeug.exceptions import (BadRequest, InternalServerError, Unauthorized)
 
 from TEStribute import rank_services as rank
 from TEStribute.decorators import auth_token_optional
 from TEStribute.errors import (ResourceUnavailableError, ValidationError)
+from TEStribute.models import ResourceRequirements
+from TEStribute.models.encoder import (
+    encode_response,
+    encode_strings,
+    iter_encode_service_combinations,
+)
+from TEStribute.models.request import Request
+import TEStribute.models.response as rs
+from TEStribute.utils.schemas import (get_validator, should_validate)
+
+logger = logging.getLogger("TEStribute")
+
+MIMETYPE_JSON = "application/json"
+MIMETYPE_NDJSON = "application/x-ndjson"
 
 
 @auth_token_optional
@@ -30,16 +50,108 @@ def rank_services(
         jwt = kwargs["jwt"]
     else:
         jwt = None
+
+    # Stream service combinations as newline-delimited JSON, if requested;
+    # passed through directly so that the body is not buffered
+    if request.accept_mimetypes.best_match(
+        [MIMETYPE_JSON, MIMETYPE_NDJSON],
+        default=MIMETYPE_JSON,
+    ) == MIMETYPE_NDJSON:
+        openapi_conf = current_app.config["openapi"]
+        return Response(
+            stream_with_context(_generate_records(
+                response=_rank(body=body, jwt=jwt),
+                validate=should_validate(
+                    mode=openapi_conf.get("validate_responses", "full"),
+                    sample_rate=openapi_conf.get(
+                        "validate_responses_sample_rate", 1.0
+                    ),
+                ),
+            )),
+            status=200,
+            mimetype=MIMETYPE_NDJSON,
+            headers={"Cache-Control": "no-store"},
+            direct_passthrough=True,
+        )
+
+    # Look up cached response; rankings in mode 'random' and invalid requests
+    # are never cached
+    key = _fingerprint(body=body, jwt=jwt)
+    cacheable = key is not None
+    cache = current_app.config.get("RESPONSE_CACHE") if cacheable else None
+    cached: Optional[Tuple[bytes, str]] = None
+    if cache is not None:
+        cached = cache.get(key)
+
     # Rank services
+    if cached is None:
+        data = encode_response(_rank(body=body, jwt=jwt))
+        cached = (data, sha256(data).hexdigest())
+        if cache is not None:
+            cache.set(key, cached)
+
+    # Return response; answer conditional requests with 304 if unchanged
+    return _make_response(
+        data=cached[0],
+        etag=cached[1] if cacheable else None,
+        config=current_app.config.get("response_cache", {}),
+    )
+
+
+def _fingerprint(
+    body,
+    jwt: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Returns fingerprint of the canonicalized request and the caller's
+    identity, such that requests that are ranked identically share cache
+    entries and entity tags.
+
+    :param body: Content of POST body.
+    :param jwt: JSON Web Token of the caller, if any.
+
+    :return: Fingerprint, or `None` if the request is invalid or in mode
+            'random'.
+    """
+    try:
+        req = Request(
+            resource_requirements=ResourceRequirements(
+                **(body.get("resource_requirements") or {})
+            ),
+            tes_uris=body.get("tes_uris"),
+            object_ids=body.get("object_ids"),
+            drs_uris=body.get("drs_uris"),
+            mode=body.get("mode", 0.5),
+            jwt=jwt,
+        )
+    except (TypeError, ValidationError):
+        return None
+    if req.mode_float < 0:
+        return None
+    return req.fingerprint()
+
+
+def _rank(
+    body,
+    jwt: Optional[str] = None,
+) -> rs.Response:
+    """
+    Ranks services and translates errors into HTTP exceptions.
+
+    :param body: Content of POST body.
+    :param jwt: JSON Web Token of the caller, if any.
+
+    :return: `Response` object.
+    """
     try:
-        return Response(rank(
+        return rank(
             object_ids=body.get("object_ids"),
             drs_uris=body.get("drs_uris"),
             mode=body.get("mode"),
             resource_requirements=body.get("resource_requirements"),
             tes_uris=body.get("tes_uris"),
             jwt=jwt,
-        ).to_dict())
+        )
     except ValidationError as e:
         raise BadRequest(str(e.args)) from e
     except ResourceUnavailableError as e:
@@ -48,3 +160,80 @@ def rank_services(
         raise Unauthorized(str(e.args)) from e
     except Exception as e:
         raise InternalServerError(str(e.args)) from e
+
+
+def _generate_records(
+    response: rs.Response,
+    validate: bool = True,
+) -> Iterator[bytes]:
+    """
+    Yields service combinations in rank order as newline-delimited JSON
+    records, followed by a final record holding any warnings. If requested,
+    each service combination is validated against the `ServiceCombination`
+    schema before it is sent; if validation fails, the stream is terminated
+    with a final record holding an `Error` instead of the warnings, such
+    that clients can tell it from a complete result.
+
+    Note that the ranking is complete when the first record is sent, as
+    combinations can only be ranked once all of them are known; only
+    encoding and validation are streamed. Records are encoded directly from
+    the models; dictionaries are only built for records that are validated.
+
+    :param response: `Response` object with ranked service combinations.
+    :param validate: Whether records are to be validated.
+    """
+    validator = get_validator("ServiceCombination") if validate else None
+    combinations = response.service_combinations_sorted
+    for combination, record in zip(
+        combinations,
+        iter_encode_service_combinations(combinations),
+    ):
+        if validator is not None:
+            try:
+                validator.validate(combination.to_dict())
+            except SchemaValidationError as e:
+                logger.error(
+                    "Streamed response does not conform to schema; stream "
+                    f"terminated. Original error message: {e.message}"
+                )
+                yield json.dumps({"error": {
+                    "message": "Streamed response does not conform to "
+                    "schema; stream terminated.",
+                    "reason": "ResponseValidationError",
+                }}).encode() + b"\n"
+                return
+        yield record.encode("ascii") + b"\n"
+    yield (
+        '{"warnings":' + encode_strings(response.warnings) + "}\n"
+    ).encode("ascii")
+
+
+def _make_response(
+    data: bytes,
+    etag: Optional[str],
+    config: Mapping,
+) -> Response:
+    """
+    Builds JSON response with caching headers.
+
+    :param data: JSON response body.
+    :param etag: Entity tag of the response body; if `None`, clients are
+            instructed not to store the response.
+    :param config: Response cache config.
+    """
+    # Send response body unless client has it already
+    not_modified = etag is not None and request.if_none_match.contains(etag)
+    response = Response(
+        response=b"" if not_modified else data,
+        status=304 if not_modified else 200,
+        mimetype="application/json",
+    )
+
+    # Set caching headers
+    if etag is None:
+        response.cache_control.no_store = True
+    else:
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = int(config.get("ttl", 0))
+    return response
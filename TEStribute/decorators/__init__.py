@@ -1,14 +1,13 @@
 """Custom decorators."""
 
-from connexion import request
-from flask import current_app
+from flask import (current_app, request)
 from functools import wraps
 import logging
 from typing import Callable
 
 from werkzeug.exceptions import Unauthorized
 
-from TEStribute.security.process_jwt import JWT
+from TEStribute.security.process_jwt import get_jwt_validator
 
 logger = logging.getLogger("TEStribute")
 
@@ -16,7 +15,8 @@ logger = logging.getLogger("TEStribute")
 def auth_token_optional(fn: Callable) -> Callable:
     """
     The decorator protects an endpoint from being called without a valid
-    authorization token.
+    authorization token. Tokens are validated by the app's shared JWT
+    validator.
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
@@ -24,8 +24,11 @@ def auth_token_optional(fn: Callable) -> Callable:
         # Check if authentication is enabled
         security_conf = current_app.config["security"]  # type: ignore
         if security_conf["authorization_required"]:
+            validator = current_app.config.get("JWT_VALIDATOR")
+            if validator is None:
+                validator = get_jwt_validator(security_conf["jwt"])
             try:
-                jwt = JWT(request=request)
+                jwt = validator.validate(request=request)
             except Exception as e:
                 raise Unauthorized(e.args) from e
 
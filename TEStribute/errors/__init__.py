@@ -3,20 +3,24 @@ Custom errors, error handler functions and function to register error handlers
 with a Connexion app instance.
 """
 import logging
+from json import dumps
+from typing import TYPE_CHECKING
 
-from connexion import App
-from connexion.exceptions import ExtraParameterProblem
 from flask import Response
-from json import dumps
 from werkzeug.exceptions import (BadRequest, InternalServerError, Unauthorized)
 
 from TEStribute.decorators import log_exception
 
+if TYPE_CHECKING:
+    from connexion import App
+
 logger = logging.getLogger("TEStribute")
 
 
-def register_error_handlers(app: App) -> App:
+def register_error_handlers(app: "App") -> "App":
     """Adds custom handlers for exceptions to Connexion app instance."""
+    from connexion.exceptions import ExtraParameterProblem
+
     # Add error handlers
     app.add_error_handler(  # type: ignore
         BadRequest,
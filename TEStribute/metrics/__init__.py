@@ -0,0 +1,148 @@
+"""
+Prometheus metrics for the ranking pipeline and for calls to external
+services.
+"""
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import (Dict, Iterator, Set)
+from urllib.parse import urlparse
+
+from prometheus_client import (Counter, Histogram)
+
+from TEStribute.utils.profiling import annotate
+
+# Histogram buckets (in seconds) for in-process stages and outbound calls
+BUCKETS_SEC = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0,
+)
+
+# Maximum number of distinct hosts per service type used as metric labels;
+# calls to further hosts are labelled 'other', such that the number of series
+# stays bounded for requests listing many services
+MAX_HOSTS_PER_SERVICE = 50
+
+# Histogram buckets for numbers of service combinations
+BUCKETS_COMBINATIONS = (
+    1, 10, 100, 1000, 10000, 100000, 1000000,
+)
+
+HTTP_REQUESTS = Counter(
+    "testribute_http_requests_total",
+    "HTTP requests handled by the API service.",
+    ["method", "endpoint", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "testribute_http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ["method", "endpoint"],
+    buckets=BUCKETS_SEC,
+)
+STAGE_DURATION = Histogram(
+    "testribute_stage_duration_seconds",
+    "Time spent in the individual stages of the ranking pipeline.",
+    ["stage"],
+    buckets=BUCKETS_SEC,
+)
+OUTBOUND_REQUESTS = Counter(
+    "testribute_outbound_requests_total",
+    "Calls to external services, by outcome.",
+    ["service", "host", "operation", "outcome"],
+)
+OUTBOUND_DURATION = Histogram(
+    "testribute_outbound_request_duration_seconds",
+    "Time spent waiting for external services.",
+    ["service", "host", "operation"],
+    buckets=BUCKETS_SEC,
+)
+COMBINATIONS = Counter(
+    "testribute_service_combinations_total",
+    "Service combinations generated and removed while ranking.",
+    ["event"],
+)
+COMBINATIONS_PER_REQUEST = Histogram(
+    "testribute_service_combinations_per_request",
+    "Number of service combinations ranked per request.",
+    buckets=BUCKETS_COMBINATIONS,
+)
+CACHE_REQUESTS = Counter(
+    "testribute_cache_requests_total",
+    "Cache lookups, by cache and result ('hit', 'miss' or 'error').",
+    ["cache", "result"],
+)
+
+# Hosts used as metric labels, by service type
+_hosts: Dict[str, Set[str]] = {}
+_hosts_lock = Lock()
+
+
+def host_label(
+    service: str,
+    uri: str,
+) -> str:
+    """
+    Returns the host of a URI (or host name) as metric label, or 'other' if
+    `MAX_HOSTS_PER_SERVICE` other hosts are already in use for the service
+    type.
+    """
+    host = (urlparse(uri).netloc if "://" in uri else uri).lower()
+    with _hosts_lock:
+        hosts = _hosts.setdefault(service, set())
+        if host not in hosts:
+            if len(hosts) >= MAX_HOSTS_PER_SERVICE:
+                return "other"
+            hosts.add(host)
+    return host
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """
+    Records the time spent in a stage of the ranking pipeline.
+
+    :param stage: Name of the pipeline stage.
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        duration = perf_counter() - start
+        STAGE_DURATION.labels(stage).observe(duration)
+        annotate("stages", start, duration, stage=stage)
+
+
+@contextmanager
+def observe_outbound(
+    service: str,
+    uri: str,
+    operation: str,
+) -> Iterator[None]:
+    """
+    Records latency and outcome of a call to an external service. The outcome
+    is recorded as 'error' if an exception propagates out of the block.
+
+    :param service: Type of service, e.g., 'tes' or 'drs'.
+    :param uri: URI or host name of the service; metrics are labelled by
+            host, see `host_label()`.
+    :param operation: Name of the operation called.
+    """
+    outcome = "error"
+    start = perf_counter()
+    try:
+        yield
+        outcome = "success"
+    finally:
+        duration = perf_counter() - start
+        host = host_label(service, uri)
+        OUTBOUND_DURATION.labels(service, host, operation).observe(duration)
+        OUTBOUND_REQUESTS.labels(service, host, operation, outcome).inc()
+        annotate(
+            "outbound",
+            start,
+            duration,
+            service=service,
+            uri=uri,
+            operation=operation,
+            outcome=outcome,
+        )
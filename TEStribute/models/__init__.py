@@ -2,7 +2,7 @@
 Basic models for representing nested, dependent data structures.
 """
 import enum
-from typing import (Dict, Iterable)
+from typing import (Dict, Iterable, Iterator, Mapping, Tuple)
 
 
 class AccessMethodType(enum.Enum):
@@ -78,14 +78,21 @@ class AccessUris:
         for k, v in kwargs.items():
             setattr(self, k, v)
 
-    def to_dict(self) -> Dict:
-        """Return instance attributes as dictionary."""
-        _excluded_keys = set(AccessUris.__dict__.keys())
-        return dict(
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over pairs of keys and access URIs."""
+        return (
             (key, value) for (key, value) in self.__dict__.items()
-            if key not in _excluded_keys
+            if key not in _ACCESS_URIS_EXCLUDED_KEYS
         )
 
+    def to_dict(self) -> Dict:
+        """Return instance attributes as dictionary."""
+        return dict(self.items())
+
+
+# Names of class attributes, which are not access URIs
+_ACCESS_URIS_EXCLUDED_KEYS = frozenset(AccessUris.__dict__.keys())
+
 
 class AccessUrl:
     """
@@ -106,6 +113,14 @@ class AccessUrl:
             "headers": self.headers,
         }
 
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "AccessUrl":
+        """Create instance from dictionary as returned by `to_dict()`."""
+        return cls(
+            url=data["url"],
+            headers=data["headers"],
+        )
+
 
 class AccessMethod:
     """
@@ -132,6 +147,16 @@ class AccessMethod:
             "region": self.region,
         }
 
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "AccessMethod":
+        """Create instance from dictionary as returned by `to_dict()`."""
+        return cls(
+            type=AccessMethodType(data["type"]),
+            access_url=AccessUrl.from_dict(data["access_url"]),
+            access_id=data["access_id"],
+            region=data["region"],
+        )
+
 
 class Checksum:
     def __init__(
@@ -149,6 +174,14 @@ class Checksum:
             "type": self.type.value,
         }
 
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Checksum":
+        """Create instance from dictionary as returned by `to_dict()`."""
+        return cls(
+            checksum=data["checksum"],
+            type=ChecksumType(data["type"]),
+        )
+
 
 class Costs:
     """
@@ -169,6 +202,14 @@ class Costs:
             "currency": self.currency.value,
         }
 
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Costs":
+        """Create instance from dictionary as returned by `to_dict()`."""
+        return cls(
+            amount=data["amount"],
+            currency=Currency(data["currency"]),
+        )
+
 
 class DrsObject:
     """
@@ -216,6 +257,17 @@ class DrsObject:
             "aliases": self.aliases,
         }
 
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "DrsObject":
+        """Create instance from dictionary as returned by `to_dict()`."""
+        return cls(**dict(
+            data,
+            checksums=[Checksum.from_dict(c) for c in data["checksums"]],
+            access_methods=[
+                AccessMethod.from_dict(m) for m in data["access_methods"]
+            ],
+        ))
+
 
 class ResourceRequirements:
     """
@@ -303,6 +355,22 @@ class TaskInfo:
             "estimated_queue_time_sec": self.estimated_queue_time_sec,
         }
 
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "TaskInfo":
+        """Create instance from dictionary as returned by `to_dict()`."""
+        return cls(
+            estimated_compute_costs=Costs.from_dict(
+                data["estimated_compute_costs"]
+            ),
+            estimated_storage_costs=Costs.from_dict(
+                data["estimated_storage_costs"]
+            ),
+            unit_costs_data_transfer=Costs.from_dict(
+                data["unit_costs_data_transfer"]
+            ),
+            estimated_queue_time_sec=data["estimated_queue_time_sec"],
+        )
+
 
 class Error:
     """
@@ -0,0 +1,124 @@
+"""
+Fast JSON serialization of response models. Models are written to JSON
+directly, without building intermediate dictionaries.
+"""
+from json.encoder import encode_basestring_ascii
+from typing import (Any, Dict, Iterable, Iterator, List)
+
+from TEStribute.models import (
+    _ACCESS_URIS_EXCLUDED_KEYS,
+    ServiceCombination,
+)
+import TEStribute.models.response as rs
+
+_float_repr = float.__repr__
+_int_repr = int.__repr__
+_INFINITY = float("inf")
+
+
+def _encode_number(value: Any) -> str:
+    """Encodes an integer or float like `json.dumps()`."""
+    if type(value) is float and value - value == 0:
+        return _float_repr(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _int_repr(value)
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value == _INFINITY:
+        return "Infinity"
+    if value == -_INFINITY:
+        return "-Infinity"
+    return _float_repr(value)
+
+
+def _encode_value(value: Any) -> str:
+    """Encodes a string, number, boolean or `None` like `json.dumps()`."""
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return _encode_number(value)
+
+
+def encode_strings(strings: Iterable[str]) -> str:
+    """Returns JSON representation of an iterable of strings."""
+    return "[" + ",".join([
+        encode_basestring_ascii(string) for string in strings
+    ]) + "]"
+
+
+def iter_encode_service_combinations(
+    combinations: Iterable[ServiceCombination],
+) -> Iterator[str]:
+    """
+    Yields the JSON representation of each of a number of
+    `ServiceCombination` instances. Encoded access URIs, which are typically
+    shared by many combinations, are memoized.
+
+    :param combinations: Iterable of `ServiceCombination` instances.
+    """
+    memo: Dict[Any, str] = {}
+    for combination in combinations:
+        access_uris: List[str] = []
+        for item in combination.access_uris.__dict__.items():
+            try:
+                access_uris.append(memo[item])
+            except KeyError:
+                if item[0] in _ACCESS_URIS_EXCLUDED_KEYS:
+                    continue
+                memo[item] = encode_basestring_ascii(item[0]) + ":" + \
+                    _encode_value(item[1])
+                access_uris.append(memo[item])
+        costs = combination.cost_estimate
+        yield "".join([
+            '{"access_uris":{',
+            ",".join(access_uris),
+            '},"cost_estimate":{"amount":',
+            _encode_number(costs.amount),
+            ',"currency":',
+            encode_basestring_ascii(costs.currency.value),
+            '},"rank":',
+            _encode_number(combination.rank),
+            ',"time_estimate":',
+            _encode_number(combination.time_estimate),
+            "}",
+        ])
+
+
+def encode_service_combination(combination: ServiceCombination) -> bytes:
+    """
+    Returns the JSON representation of a `ServiceCombination` instance.
+
+    :param combination: `ServiceCombination` instance.
+
+    :return: UTF-8 encoded (pure ASCII) JSON.
+    """
+    return next(iter_encode_service_combinations([combination])).encode(
+        "ascii"
+    )
+
+
+def encode_response(response: rs.Response) -> bytes:
+    """
+    Returns the JSON representation of a `Response` instance, equivalent to
+    `json.dumps(response.to_dict())` but without whitespace and without
+    building intermediate dictionaries.
+
+    :param response: `Response` instance.
+
+    :return: UTF-8 encoded (pure ASCII) JSON.
+    """
+    return "".join([
+        '{"service_combinations":[',
+        ",".join(iter_encode_service_combinations(
+            response.service_combinations_sorted
+        )),
+        '],"warnings":',
+        encode_strings(response.warnings),
+        "}",
+    ]).encode("ascii")
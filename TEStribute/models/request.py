@@ -2,6 +2,8 @@
 """
 Object models for representing nested, dependent data structures.
 """
+from hashlib import sha256
+import json
 import logging
 from typing import (Dict, Iterable, Mapping, Optional, Union)
 
@@ -9,11 +11,36 @@ from werkzeug.exceptions import Unauthorized
 
 from TEStribute.errors import ValidationError
 from TEStribute.models import (Mode, ResourceRequirements)
-from TEStribute.security.process_jwt import JWT
+from TEStribute.security.process_jwt import get_jwt_validator
 
 logger = logging.getLogger("TEStribute")
 
 
+def fingerprint(
+    request: Mapping,
+    jwt: Optional[str] = None,
+) -> str:
+    """
+    Returns a hash of a canonicalized request and the caller's identity.
+
+    :param request: Request in dictionary form.
+    :param jwt: JSON Web Token identifying the caller, if any.
+
+    :return: Hexadecimal SHA-256 digest.
+    """
+    return sha256(
+        json.dumps(
+            {
+                "request": request,
+                "identity": jwt,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
 class Request:
     """
     Request schema describing the endpoint's input.
@@ -55,11 +82,10 @@ class Request:
         :raises: TEStribute.errors.ValidationError
         :raises: werkzeug.exceptions.Unauthorized
         """
-        # Validate JWT
+        # Process JWT
         if authorization_required:
             try:
-                JWT.config(**jwt_config)
-                jwt = JWT(jwt=jwt).jwt
+                jwt = get_jwt_validator(jwt_config).get_jwt(jwt=jwt).jwt
             except Exception as e:
                 raise Unauthorized(str(e.args)) from e
 
@@ -83,6 +109,20 @@ class Request:
             "mode_float": self.mode_float,
         }
 
+    def fingerprint(self) -> str:
+        """
+        Returns a hash of the canonicalized request and the caller's identity
+        (i.e., the JWT, if any). Identical requests by the same caller yield
+        identical fingerprints, including requests that differ only in how
+        the mode is specified (e.g., 'cost' or 0) or in omitted optional
+        properties.
+        """
+        canonical = self.to_dict()
+        del canonical["mode"]
+        for key in ("tes_uris", "object_ids", "drs_uris"):
+            canonical[key] = list(canonical[key] or [])
+        return fingerprint(request=canonical, jwt=self.jwt)
+
     def validate(self) -> None:
         """
         Validates and sanitizes instance attributes.
@@ -1,16 +1,16 @@
 """
 Object models for representing nested, dependent data structures.
 """
-from copy import deepcopy
+from copy import (copy, deepcopy)
 from itertools import product
 import logging
-import numpy as np
 from random import shuffle
 from socket import (gaierror, gethostbyname)
-from typing import (Dict, Iterable, List, Mapping, Set, Tuple)
+from typing import (Dict, Iterable, List, Mapping, Optional, Set, Tuple)
 from urllib.parse import urlparse
 
-from TEStribute.errors import ResourceUnavailableError
+from TEStribute.errors import (ResourceUnavailableError, ValidationError)
+from TEStribute.metrics import (COMBINATIONS, observe_outbound)
 from TEStribute.models import (
     AccessUris,
     Costs,
@@ -20,6 +20,8 @@ from TEStribute.models import (
     TaskInfo,
 )
 import TEStribute.models.request as rq
+from TEStribute.utils.pricing import PriceSheets
+from TEStribute.utils.service_cache import ServiceCaches
 from TEStribute.utils.service_calls import (
     fetch_exchange_rates,
     fetch_drs_objects_metadata,
@@ -39,12 +41,30 @@ class Response:
         request=rq.Request,
         timeout: float = 3,
         target_currency: Currency = Currency.BTC,
+        price_sheets: Optional[PriceSheets] = None,
+        max_combinations: Optional[int] = None,
+        on_exceed: str = "reject",
+        caches: Optional[ServiceCaches] = None,
     ) -> None:
+        """
+        :param max_combinations: Maximum number of service combinations; no
+                limit if `None`.
+        :param on_exceed: If the maximum number of service combinations is
+                exceeded, either 'reject' the request or consider, for each
+                TES instance, only the nearest access URIs of each object
+                ('bounded').
+        :param caches: Caches of responses of external services; not cached
+                if `None`.
+
+        :raises TEStribute.errors.ValidationError: Request yields more service
+                combinations than allowed and cannot be bounded.
+        """
         # Add attributes
         self.warnings: List[str] = []
         self.request = request
         self.timeout = timeout
         self.target_currency = target_currency
+        self.caches = caches
 
         # Get TES task info for resource requirements
         try:
@@ -53,6 +73,8 @@ class Response:
                 resource_requirements=request.resource_requirements,
                 jwt=request.jwt,
                 timeout=self.timeout,
+                price_sheets=price_sheets,
+                caches=caches,
             )
         except ResourceUnavailableError:
             raise
@@ -63,6 +85,7 @@ class Response:
                 target_currency=target_currency.value,
                 currencies=[c.value for c in Currency],
                 amount=1.0,
+                caches=caches,
             )
         except ResourceUnavailableError:
             raise
@@ -112,6 +135,7 @@ class Response:
                 object_ids=request.object_ids,
                 jwt=request.jwt,
                 timeout=self.timeout,
+                caches=caches,
             )
         except ResourceUnavailableError:
             raise
@@ -128,13 +152,63 @@ class Response:
             for object_id, sizes in object_sizes.items()
         }
 
-        # Get combinations of access URIs for TES instances and objects
-        self.access_uri_combinations = self.get_access_uri_combinations(
+        # Check number of service combinations before generating them; if
+        # bounded, combinations are generated when distances are known
+        self.uris_per_object: Optional[int] = None
+        count = self.count_combinations(
             task_info=self.task_info,
             object_info=self.object_info,
         )
+        if max_combinations is not None and count > max_combinations:
+            self.uris_per_object = self.bound_combinations(
+                count=count,
+                max_combinations=max_combinations,
+                on_exceed=on_exceed,
+            )
+
+        # Get combinations of access URIs for TES instances and objects
+        self.access_uri_combinations: List[AccessUris] = []
+        if self.uris_per_object is None:
+            self.access_uri_combinations = self.get_access_uri_combinations(
+                task_info=self.task_info,
+                object_info=self.object_info,
+            )
+            COMBINATIONS.labels("generated").inc(
+                len(self.access_uri_combinations)
+            )
 
         # Add service combinations
+        self.add_service_combinations()
+
+    def to_dict(self) -> Dict:
+        """Return instance attributes as dictionary."""
+        return {
+            "service_combinations": [
+                c.to_dict() for c in self.service_combinations_sorted
+            ],
+            "warnings": self.warnings,
+        }
+
+    def rerank(self) -> "Response":
+        """
+        Returns a shallow copy of the instance in which service combinations
+        are ranked anew. Used to obtain independent rankings for mode 'random'
+        from a shared response.
+        """
+        response = copy(self)
+        response.service_combinations = [
+            copy(combination) for combination in self.service_combinations
+        ]
+        response.rank_combinations()
+        return response
+
+    def add_service_combinations(
+        self,
+    ) -> None:
+        """
+        Sets attribute `service_combinations` to a service combination
+        without estimates for each element of `access_uri_combinations`.
+        """
         self.service_combinations: List[ServiceCombination] = []
         for access_uris in self.access_uri_combinations:
             self.service_combinations.append(
@@ -150,14 +224,95 @@ class Response:
             )
         self.service_combinations_sorted = self.service_combinations
 
-    def to_dict(self) -> Dict:
-        """Return instance attributes as dictionary."""
-        return {
-            "service_combinations": [
-                c.to_dict() for c in self.service_combinations_sorted
-            ],
-            "warnings": self.warnings,
-        }
+    @staticmethod
+    def get_access_uris(
+        object_info: Mapping[str, Mapping[str, DrsObject]],
+    ) -> Dict[str, Set[str]]:
+        """
+        Returns all unique access URIs for each object.
+
+        :param object_info: DRS DrsObject objects for a set of DRS URIs (inner
+                keys) and DRS IDs (outer keys).
+        """
+        access_uris: Dict[str, Set[str]] = {}
+        for object_id, drs_info in object_info.items():
+            object_uris: List[str] = []
+            for object_metadata in drs_info.values():
+                for access_method in object_metadata.access_methods:
+                    object_uris.append(access_method.access_url.url)
+            access_uris[object_id] = set(object_uris)
+        return access_uris
+
+    @classmethod
+    def count_combinations(
+        cls,
+        task_info: Mapping[str, TaskInfo],
+        object_info: Mapping[str, Mapping[str, DrsObject]],
+    ) -> int:
+        """
+        Returns the number of service combinations, i.e., the number of TES
+        instances times the number of unique access URIs of each object,
+        without generating them.
+        """
+        count = len(task_info)
+        for uris in cls.get_access_uris(object_info).values():
+            count *= len(uris)
+        return count
+
+    def bound_combinations(
+        self,
+        count: int,
+        max_combinations: int,
+        on_exceed: str = "reject",
+    ) -> int:
+        """
+        Returns the number of access URIs per object and TES instance that
+        keeps the number of service combinations within `max_combinations`.
+
+        For a given TES instance, estimated times do not depend on access URIs
+        and transfer costs are the sum of the costs for each object, which
+        increase with the distance between TES instance and access URI.
+        Considering only the nearest access URIs of each object for each TES
+        instance therefore retains the best service combination of every TES
+        instance.
+
+        :param count: Number of service combinations.
+        :param max_combinations: Maximum number of service combinations.
+        :param on_exceed: 'reject' or 'bounded'; see `__init__()`.
+
+        :raises TEStribute.errors.ValidationError: Request is rejected or
+                yields too many service combinations even with a single access
+                URI per object.
+        """
+        message = (
+            f"Services cannot be ranked. The request yields {count} service "
+            "combinations, more than the configured maximum of "
+            f"{max_combinations}. Specify fewer TES instances, DRS instances "
+            "or objects."
+        )
+        if on_exceed != "bounded" or len(self.task_info) > max_combinations:
+            raise ValidationError(message)
+        counts = [len(uris) for uris in self.get_access_uris(
+            self.object_info
+        ).values()]
+        uris_per_object = 1
+        while True:
+            bounded = len(self.task_info)
+            for n in counts:
+                bounded *= min(n, uris_per_object + 1)
+            if bounded > max_combinations or \
+                    uris_per_object >= max(counts, default=1):
+                break
+            uris_per_object += 1
+        warning = (
+            f"The request yields {count} service combinations, more than the "
+            f"configured maximum of {max_combinations}. For each TES "
+            f"instance, only the {uris_per_object} nearest access URI(s) of "
+            "each object were considered."
+        )
+        self.warnings.append(warning)
+        logger.warning(warning)
+        return uris_per_object
 
     @staticmethod
     def get_access_uri_combinations(
@@ -175,13 +330,9 @@ class Response:
         :return: List of AccessUri objects.
         """
         # Get all unique access URIs for each object
-        access_uris: Dict[str, Iterable[str]] = {}
-        for object_id, drs_info in object_info.items():
-            object_uris: List[str] = []
-            for object_metadata in drs_info.values():
-                for access_method in object_metadata.access_methods:
-                    object_uris.append(access_method.access_url.url)
-            access_uris[object_id] = set(object_uris)
+        access_uris: Dict[str, Iterable[str]] = dict(
+            Response.get_access_uris(object_info)
+        )
 
         # Add TES URIs
         access_uris["tes_uri"] = set(task_info.keys())
@@ -196,6 +347,23 @@ class Response:
         # Return list of combinations
         return uri_combinations
 
+    def resolve(
+        self,
+        domain: str,
+    ) -> str:
+        """
+        Returns IP address of a host, from cache `dns`, if available.
+
+        :raises socket.gaierror: Host cannot be resolved.
+        """
+        def lookup() -> str:
+            with observe_outbound("dns", domain, "gethostbyname"):
+                return gethostbyname(domain)
+
+        if self.caches is None:
+            return lookup()
+        return self.caches.dns.fetch(lookup, domain)
+
     def get_distances(
         self,
     ) -> None:
@@ -229,14 +397,19 @@ class Response:
         if not self.object_info:
             return None
 
+        # Generate nearest combinations only, if bounded
+        if self.uris_per_object is not None:
+            return self._get_distances_bounded()
+
         # Create pair of TES IP and object IP for each object and each access
         # URI combination
         combinations = [c.to_dict() for c in self.access_uri_combinations]
         ips = {}
         for index in range(len(combinations)):
             try:
-                tes_domain = urlparse(combinations[index]["tes_uri"]).netloc
-                tes_ip = gethostbyname(tes_domain)
+                tes_ip = self.resolve(
+                    urlparse(combinations[index]["tes_uri"]).netloc
+                )
             except KeyError:
                 continue
             except gaierror:
@@ -244,7 +417,7 @@ class Response:
             for key, uri in combinations[index].items():
                 if key != "tes_uri":
                     try:
-                        obj_ip = gethostbyname(urlparse(uri).netloc)
+                        obj_ip = self.resolve(urlparse(uri).netloc)
                     except gaierror:
                         break
                     ips[(index, key)] = (tes_ip, obj_ip)
@@ -260,7 +433,7 @@ class Response:
         distances_unique: Dict[Set[str], float] = {}
         ips_all = frozenset().union(*list(ips_unique.keys()))  # type: ignore
         try:
-            self.distances_full = ip_distance(*ips_all)
+            self.distances_full = ip_distance(*ips_all, caches=self.caches)
         except ValueError:
             pass
         for ip_tuple in ips_unique.keys():
@@ -304,6 +477,7 @@ class Response:
                 )
                 self.warnings.append(warning)
                 logger.warn(warning)
+                COMBINATIONS.labels("removed_no_distance").inc()
                 del self.access_uri_combinations[index]
                 del self.distances[index]
                 del self.service_combinations[index]
@@ -312,6 +486,98 @@ class Response:
         for combination in self.distances:
             combination['total'] = sum(combination.values())
 
+    def _get_distances_bounded(
+        self,
+    ) -> None:
+        """
+        Like `get_distances()`, but first generates the service combinations
+        from the `uris_per_object` access URIs of each object nearest to each
+        TES instance. Hosts are resolved once, rather than once per service
+        combination.
+        """
+        # Resolve hosts of TES instances and access URIs
+        ips: Dict[str, Optional[str]] = {}
+
+        def resolve(uri: str) -> Optional[str]:
+            domain = urlparse(uri).netloc
+            if domain not in ips:
+                try:
+                    ips[domain] = self.resolve(domain)
+                except gaierror:
+                    ips[domain] = None
+            return ips[domain]
+
+        access_uris = {
+            object_id: sorted(uris) for object_id, uris in
+            self.get_access_uris(self.object_info).items()
+        }
+        tes_ips = {tes_uri: resolve(tes_uri) for tes_uri in self.task_info}
+        uri_ips = {
+            uri: resolve(uri)
+            for uris in access_uris.values() for uri in uris
+        }
+
+        # Calculate distances between all IPs
+        try:
+            self.distances_full = ip_distance(
+                *sorted({ip for ip in ips.values() if ip is not None}),
+                caches=self.caches,
+            )
+        except ValueError:
+            pass
+        distances_ips = self.distances_full.get("distances", {})
+
+        def distance(ip_1: Optional[str], ip_2: Optional[str]):
+            if ip_1 is None or ip_2 is None:
+                return None
+            if ip_1 == ip_2:
+                return 0
+            return distances_ips.get((ip_1, ip_2))
+
+        # Combine nearest access URIs of each object for each TES instance
+        self.access_uri_combinations = []
+        self.distances = []
+        for tes_uri, tes_ip in tes_ips.items():
+            nearest: List[List[Tuple[str, str, float]]] = []
+            for object_id, uris in access_uris.items():
+                candidates = []
+                for uri in uris:
+                    value = distance(tes_ip, uri_ips[uri])
+                    if value is not None:
+                        candidates.append((value, uri))
+                candidates.sort()
+                nearest.append([
+                    (object_id, uri, value) for value, uri in
+                    candidates[:self.uris_per_object]
+                ])
+            if not all(nearest):
+                warning = (
+                    f"TES instance '{tes_uri}' was not considered because no "
+                    "or not all distances to input objects could be computed."
+                )
+                self.warnings.append(warning)
+                logger.warning(warning)
+                continue
+            for choice in product(*nearest):
+                self.access_uri_combinations.append(AccessUris(
+                    tes_uri=tes_uri,
+                    **{object_id: uri for object_id, uri, _ in choice},
+                ))
+                distances = {
+                    object_id: value for object_id, _, value in choice
+                }
+                distances["total"] = sum(distances.values())
+                self.distances.append(distances)
+        COMBINATIONS.labels("generated").inc(
+            len(self.access_uri_combinations)
+        )
+        self.add_service_combinations()
+
+        # Reshape distances keys for logging
+        self.distances_full["distances"] = {
+            "|".join(key): value for key, value in distances_ips.items()
+        }
+
     def filter_service_combinations(
         self,
     ) -> None:
@@ -386,6 +652,7 @@ class Response:
 
         # Calculate scores and ranks
         if mode >= 0:
+            import numpy as np
 
             # Get all time estimates
             times = np.array([
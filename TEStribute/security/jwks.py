@@ -0,0 +1,207 @@
+"""
+Process-wide cache of OpenID Connect identity provider (IdP) configurations
+and of the public keys in their JSON Web Key (JWK) sets.
+"""
+from functools import partial
+import json
+import logging
+from threading import Lock
+from time import monotonic
+from typing import (Any, Dict, Optional)
+
+from jwt import algorithms
+import requests
+from simplejson.errors import JSONDecodeError
+
+from TEStribute.metrics import observe_outbound
+from TEStribute.utils.cache import TTLCache
+from TEStribute.utils.singleflight import SingleFlight
+
+logger = logging.getLogger("TEStribute")
+
+
+class KeyCache:
+    """
+    Fetches and caches IdP configurations and parsed public keys, such that
+    JWT signatures can be verified without contacting the IdP for every
+    request. Concurrent lookups of the same URL are coalesced into a single
+    call.
+    """
+    def __init__(
+        self,
+        maxsize: int = 64,
+    ) -> None:
+        """
+        :param maxsize: Maximum number of IdP configurations and JWK sets
+                each.
+        """
+        self._configs = TTLCache(name="idp_config", maxsize=maxsize)
+        self._keys = TTLCache(name="jwks", maxsize=maxsize)
+        self._in_flight = SingleFlight()
+        self._lock = Lock()
+        self._last_refresh: Dict[str, float] = {}
+
+    def get_idp_config(
+        self,
+        url: str,
+        ttl: float = 3600,
+        timeout: float = 3,
+    ) -> Dict:
+        """
+        Returns IdP configuration.
+
+        :param url: URL of IdP configuration endpoint.
+        :param ttl: Time (in seconds) for which the configuration is cached.
+        :param timeout: Time (in seconds) after which requests are aborted.
+
+        :return: IdP configuration.
+
+        :raises requests.exceptions.RequestException: IdP configuration
+                could not be fetched.
+        :raises TypeError: Response is not valid JSON.
+        """
+        config = self._configs.get(url)
+        if config is None:
+            config, _ = self._in_flight.do(
+                ("config", url),
+                partial(
+                    _get_json,
+                    url=url,
+                    timeout=timeout,
+                    operation="config",
+                ),
+            )
+            self._configs.set(url, config, ttl=ttl)
+        return config
+
+    def lookup_idp_config(
+        self,
+        url: str,
+    ) -> Optional[Dict]:
+        """Returns cached IdP configuration, if available."""
+        return self._configs.get(url)
+
+    def lookup_public_keys(
+        self,
+        url: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Returns cached public keys of a JWK set, if available."""
+        return self._keys.get(url)
+
+    def get_public_keys(
+        self,
+        url: str,
+        claim_key_id: str = "kid",
+        refresh: bool = False,
+        ttl: float = 3600,
+        refresh_interval: float = 60,
+        timeout: float = 3,
+    ) -> Dict[str, Any]:
+        """
+        Returns public keys of a JWK set.
+
+        :param url: URL of JWK set.
+        :param claim_key_id: Name of key ID field.
+        :param refresh: Fetch JWK set even if it is cached, e.g., because a
+                key ID was not found in the cached keys. To protect the IdP,
+                JWK sets are refreshed no more than once per
+                `refresh_interval`.
+        :param ttl: Time (in seconds) for which the keys are cached.
+        :param refresh_interval: Minimum time (in seconds) between refreshes
+                of the JWK set.
+        :param timeout: Time (in seconds) after which requests are aborted.
+
+        :return: Dictionary of key IDs and public keys.
+
+        :raises requests.exceptions.RequestException: JWK set could not be
+                fetched.
+        :raises TypeError: Response is not valid JSON.
+        :raises KeyError: JWK set could not be processed.
+        """
+        keys = self._keys.get(url)
+        if keys is not None and refresh:
+            with self._lock:
+                last_refresh = self._last_refresh.get(url, -refresh_interval)
+                if monotonic() - last_refresh < refresh_interval:
+                    refresh = False
+                else:
+                    self._last_refresh[url] = monotonic()
+            if refresh:
+                logger.info(f"Refreshing JWK set '{url}'.")
+        if keys is None or refresh:
+            keys, _ = self._in_flight.do(
+                ("keys", url),
+                partial(
+                    _get_public_keys,
+                    url=url,
+                    claim_key_id=claim_key_id,
+                    timeout=timeout,
+                ),
+            )
+            with self._lock:
+                self._last_refresh[url] = monotonic()
+            self._keys.set(url, keys, ttl=ttl)
+        return keys
+
+    def clear(self) -> None:
+        """Removes all cached IdP configurations and keys."""
+        self._configs.clear()
+        self._keys.clear()
+        with self._lock:
+            self._last_refresh.clear()
+
+
+def _get_json(
+    url: str,
+    timeout: float = 3,
+    operation: str = "get",
+) -> Dict:
+    """
+    Sends GET request to IdP and returns JSON response; the call is recorded
+    as `operation`, see `TEStribute.metrics.observe_outbound()`.
+
+    :raises requests.exceptions.RequestException: Request failed.
+    :raises TypeError: Response is not valid JSON.
+    """
+    try:
+        with observe_outbound("idp", url, operation):
+            response = requests.get(url, timeout=timeout)
+            response.raise_for_status()
+    except requests.exceptions.MissingSchema as e:  # type: ignore
+        raise requests.exceptions.MissingSchema(  # type: ignore
+            f"Value '{url} could not be interpreted as URL."
+        ) from e
+    try:
+        return response.json()
+    except (JSONDecodeError, ValueError) as e:
+        raise TypeError(
+            "The response does not look like valid JSON."
+        ) from e
+
+
+def _get_public_keys(
+    url: str,
+    claim_key_id: str = "kid",
+    timeout: float = 3,
+) -> Dict[str, Any]:
+    """
+    Fetches JWK set and parses its public keys.
+
+    :raises KeyError: JWK set could not be processed.
+    """
+    keys = {}
+    try:
+        for jwk in _get_json(
+            url=url,
+            timeout=timeout,
+            operation="jwks",
+        )["keys"]:
+            keys[jwk[claim_key_id]] = algorithms.RSAAlgorithm.from_jwk(
+                json.dumps(jwk)
+            )
+    except KeyError as e:
+        raise KeyError(
+            f"Public keys could not be processed. Original error "
+            f"message: {type(e).__name__}: {e}"
+        ) from e
+    return keys
@@ -1,44 +1,241 @@
 """Classes and functions for dealing with the processing of JSON Web Tokens
 (JWTs).
 """
+from concurrent.futures import (FIRST_COMPLETED, ThreadPoolExecutor, wait)
+from contextvars import (ContextVar, copy_context)
 from enum import Enum
-from functools import partial
+from functools import (lru_cache, partial)
+from hashlib import sha256
 import json
 import requests
-from simplejson.errors import JSONDecodeError
-from typing import (Dict, List, Union)
+from time import (monotonic, time)
+from typing import (Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union)
 
-from jwt import (decode, get_unverified_header, algorithms)
+from jwt import (decode, get_unverified_header)
 from werkzeug.exceptions import Unauthorized
 
+from TEStribute.metrics import observe_outbound
+from TEStribute.security.jwks import KeyCache
+from TEStribute.security.trust_store import TrustStore
+from TEStribute.utils.cache import TTLCache
+
+# Policies for combining the outcomes of multiple validation methods
+VALIDATION_POLICIES = ("all", "any", "first_success")
+
+# Deadline (in terms of `time.monotonic()`) of the ongoing validation, if any;
+# inherited by the validation methods run concurrently in the executor
+_deadline: ContextVar[Optional[float]] = ContextVar(
+    "validation_deadline",
+    default=None,
+)
+
+
+class JwtValidator:
+    """
+    Immutable set of JWT processing and validation settings, together with
+    the caches shared by all validations performed with these settings, i.e.,
+    the claims of validated JWTs as well as the identity providers'
+    configurations and public keys. Instances are thread-safe; create them
+    once, e.g., via `get_jwt_validator()`, and share them.
+    """
+    auth_header_key: str
+    claim_identity: str
+    claim_issuer: str
+    claim_key_id: str
+    decode_algorithms: Tuple[str, ...]
+    idp_cache_ttl: float
+    idp_config_jwks: str
+    idp_config_url_suffix: str
+    idp_config_userinfo: str
+    idp_timeout: float
+    jwks_refresh_interval: float
+    jwt_prefix: str
+    validated_cache_size: int
+    validated_max_age: float
+    validation_methods: Tuple[str, ...]
+    validation_policy: str
+    validation_timeout: float
+    trust_store: Optional[TrustStore]
+    trust_store_only: bool
+    executor: ThreadPoolExecutor
+    key_cache: KeyCache
+    validated_tokens: TTLCache
+
+    def __init__(
+        self,
+        auth_header_key: str = "Authorization",
+        claim_identity: str = "sub",
+        claim_issuer: str = "iss",
+        claim_key_id: str = "kid",
+        decode_algorithms: Iterable[str] = ("RS256",),
+        idp_cache_ttl: float = 3600,
+        idp_config_jwks: str = "jwks_uri",
+        idp_config_url_suffix: str = "/.well-known/openid-configuration",
+        idp_config_userinfo: str = "userinfo_endpoint",
+        idp_timeout: float = 3,
+        jwks_refresh_interval: float = 60,
+        jwt_prefix: str = "Bearer",
+        validated_cache_size: int = 1024,
+        validated_max_age: float = 300,
+        validation_methods: Iterable[str] = ("userinfo", "public_key"),
+        validation_policy: str = "all",
+        validation_timeout: float = 5,
+        trust_store: Optional[str] = None,
+        trust_store_only: bool = False,
+    ) -> None:
+        """
+        :param auth_header_key: Name of HTTP header holding the JWT.
+        :param claim_identity: Name of claim identifying the user.
+        :param claim_issuer: Name of claim identifying the issuer.
+        :param claim_key_id: Name of header claim identifying the public key.
+        :param decode_algorithms: Algorithms accepted for signing JWTs.
+        :param idp_cache_ttl: Time (in seconds) for which identity provider
+                configurations and public keys are cached.
+        :param idp_config_jwks: Field of identity provider configuration
+                holding the URL of the JWK set.
+        :param idp_config_url_suffix: Path of identity provider configuration
+                endpoint, relative to issuer.
+        :param idp_config_userinfo: Field of identity provider configuration
+                holding the URL of the userinfo endpoint.
+        :param idp_timeout: Time (in seconds) after which requests to
+                identity providers are aborted.
+        :param jwks_refresh_interval: Minimum time (in seconds) between
+                refreshes of a JWK set.
+        :param jwt_prefix: Prefix of JWT in authorization header.
+        :param validated_cache_size: Maximum number of validated JWTs cached.
+        :param validated_max_age: Maximum time (in seconds) for which
+                validated JWTs are cached.
+        :param validation_methods: Names of `ValidationMethods` members to
+                validate JWTs with.
+        :param validation_policy: One of 'all' (all validation methods must
+                succeed), 'any' (at least one method must succeed) or
+                'first_success' (like 'any', but the first method to succeed
+                ends validation without waiting for any others); see
+                `JWT.validate()`.
+        :param validation_timeout: Time (in seconds) after which pending
+                validation methods are considered to have failed.
+        :param trust_store: Path to a file or directory listing trusted
+                issuers and their JWK sets; see `TrustStore`. Public keys of
+                these issuers are never fetched from the identity provider.
+        :param trust_store_only: Reject JWTs from issuers not in the trust
+                store, such that no public keys are fetched from identity
+                providers.
+
+        :raises ValueError: Unknown validation method or policy, or trust
+                store required but not specified.
+        """
+        for method in validation_methods:
+            if method not in ValidationMethods.__members__:
+                raise ValueError(f"Unknown JWT validation method '{method}'.")
+        if trust_store_only and trust_store is None:
+            raise ValueError(
+                "JWT trust store required, but no trust store specified."
+            )
+        if validation_policy not in VALIDATION_POLICIES:
+            raise ValueError(
+                f"Unknown JWT validation policy '{validation_policy}'; "
+                f"expected one of: {', '.join(VALIDATION_POLICIES)}."
+            )
+        settings: Dict[str, Any] = {
+            "auth_header_key": auth_header_key,
+            "claim_identity": claim_identity,
+            "claim_issuer": claim_issuer,
+            "claim_key_id": claim_key_id,
+            "decode_algorithms": tuple(decode_algorithms),
+            "idp_cache_ttl": idp_cache_ttl,
+            "idp_config_jwks": idp_config_jwks,
+            "idp_config_url_suffix": idp_config_url_suffix,
+            "idp_config_userinfo": idp_config_userinfo,
+            "idp_timeout": idp_timeout,
+            "jwks_refresh_interval": jwks_refresh_interval,
+            "jwt_prefix": jwt_prefix,
+            "validated_cache_size": validated_cache_size,
+            "validated_max_age": validated_max_age,
+            "validation_methods": tuple(validation_methods),
+            "validation_policy": validation_policy,
+            "validation_timeout": validation_timeout,
+            "trust_store": None if trust_store is None else TrustStore(
+                path=trust_store,
+                claim_key_id=claim_key_id,
+            ),
+            "trust_store_only": trust_store_only,
+            "executor": ThreadPoolExecutor(
+                max_workers=8,
+                thread_name_prefix="jwt-validation",
+            ),
+            "key_cache": KeyCache(),
+            "validated_tokens": TTLCache(
+                name="jwt",
+                maxsize=validated_cache_size,
+            ),
+        }
+        for name, value in settings.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(
+            f"Cannot set '{name}': 'JwtValidator' instances are immutable."
+        )
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(
+            f"Cannot delete '{name}': 'JwtValidator' instances are immutable."
+        )
+
+    def get_jwt(
+        self,
+        jwt: Optional[str] = None,
+        request: Any = None,
+    ) -> "JWT":
+        """
+        Returns `JWT` instance using these settings; see `JWT.__init__()`.
+        """
+        return JWT(jwt=jwt, request=request, validator=self)
+
+    def validate(
+        self,
+        jwt: Optional[str] = None,
+        request: Any = None,
+        force: bool = False,
+    ) -> "JWT":
+        """
+        Extracts and validates JWT; see `JWT.__init__()` and `JWT.validate()`.
+
+        :return: Validated `JWT` instance.
+        """
+        token = self.get_jwt(jwt=jwt, request=request)
+        token.validate(force=force)
+        return token
+
+
+def get_jwt_validator(
+    config: Optional[Mapping] = None,
+) -> JwtValidator:
+    """
+    Returns shared `JwtValidator` instance for the specified settings.
+
+    :param config: Keyword arguments to `JwtValidator`, typically the
+            `security.jwt` section of the config file. Default settings are
+            used if not specified.
+    """
+    return _get_jwt_validator(json.dumps(config or {}, sort_keys=True))
+
+
+@lru_cache(maxsize=None)
+def _get_jwt_validator(config: str) -> JwtValidator:
+    return JwtValidator(**json.loads(config))
+
 
 class JWT:
     """Class that extracts JSON Web Tokens (JWT) and related information from
     a HTTP request and validates the JWT via one or more methods.
     """
-    # Class attributes (can be updated through JWT.config(**kwargs))
-    auth_header_key: str = "Authorization"
-    claim_identity: str = "sub"
-    claim_issuer: str = "iss"
-    claim_key_id: str = "kid"
-    decode_algorithms: List[str] = ["RS256"]
-    idp_config_jwks: str = "jwks_uri"
-    idp_config_url_suffix: str = "/.well-known/openid-configuration"
-    idp_config_userinfo: str = "userinfo_endpoint"
-    jwt_prefix: str = "Bearer"
-    validation_methods: List[str] = ["userinfo", "public_key"]
-
-    # Class methods
-    @classmethod
-    def config(cls, **kwargs) -> None:
-        for k, v in kwargs.items():
-            setattr(cls, k, v)
-
     # Constructors
     def __init__(
         self,
         jwt: Union[None, str] = None,
         request: Union[None, requests.models.Request] = None,  # type: ignore
+        validator: Optional[JwtValidator] = None,
         user: str = "",
         claims: Dict = {},
         header_claims: Dict = {},
@@ -71,13 +268,17 @@ class JWT:
                 "JWT needs to be passed to the constructor."
             )
 
+        # Get settings
+        self.validator = validator if validator is not None else \
+            get_jwt_validator()
+
         # Extract JWT from header
         if jwt is None:
 
             # Get authorization header
             try:
                 auth_header = request.headers.get(  # type: ignore
-                    self.auth_header_key,
+                    self.validator.auth_header_key,
                     None
                 )
             except AttributeError:
@@ -88,7 +289,8 @@ class JWT:
 
             if auth_header is None:
                 raise KeyError(
-                    f"No HTTP header with name '{self.auth_header_key}' found."
+                    "No HTTP header with name "
+                    f"'{self.validator.auth_header_key}' found."
                 )
 
             # Ensure that authorization header contains prefix
@@ -101,9 +303,9 @@ class JWT:
                 )
 
             # Ensure that prefix is correct
-            if found_prefix != self.jwt_prefix:
+            if found_prefix != self.validator.jwt_prefix:
                 raise ValueError(
-                    f"Expected JWT prefix '{self.jwt_prefix}' in "
+                    f"Expected JWT prefix '{self.validator.jwt_prefix}' in "
                     f"authentication header, but found '{found_prefix}' "
                     "instead."
                 )
@@ -117,6 +319,18 @@ class JWT:
         self.public_keys = public_keys
         self.current_key = current_key
 
+    def get_idp_timeout(self) -> float:
+        """
+        Returns timeout for calls to the identity provider: the configured
+        timeout, but no longer than the time left until the deadline of the
+        ongoing validation, if any.
+        """
+        timeout = self.validator.idp_timeout
+        deadline = _deadline.get()
+        if deadline is not None:
+            timeout = min(timeout, max(0.001, deadline - monotonic()))
+        return timeout
+
     def get_claims(
         self,
         force: bool = False,
@@ -128,8 +342,8 @@ class JWT:
             try:
                 self.claims = decode(
                     jwt=self.jwt,
-                    verify=False,
-                    algorithms=self.decode_algorithms,
+                    options={"verify_signature": False},
+                    algorithms=list(self.validator.decode_algorithms),
                 )
             except Exception as e:
                 raise Unauthorized(
@@ -183,48 +397,98 @@ class JWT:
             except Exception:
                 raise
 
-            # Build endpoint URL
-            try:
-                root = self.claims[self.claim_issuer].rstrip('/')
-            except KeyError as e:
-                raise KeyError(
-                    f"Issuer '{self.claim_issuer}' is not available. "
-                    f"Original error message: {type(e).__name__}: {e}"
-                ) from e
-            url = f"{root}/{self.idp_config_url_suffix}"
+            # Get OIDC service info/config from process-wide cache
+            self.idp_config = self.validator.key_cache.get_idp_config(
+                url=self.get_idp_config_url(),
+                ttl=self.validator.idp_cache_ttl,
+                timeout=self.get_idp_timeout(),
+            )
 
-            # Send GET request to OIDC service info/config endpoint
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-            except requests.exceptions.MissingSchema as e:  # type: ignore
-                raise requests.exceptions.MissingSchema(  # type: ignore
-                    f"Value '{url} could not be interpreted as URL."
-                ) from e
-            except requests.exceptions.ConnectionError:  # type: ignore
-                raise
-            except requests.exceptions.HTTPError:  # type: ignore
-                raise
+    def get_idp_config_url(self) -> str:
+        """
+        Returns URL of the identity provider's OIDC service info/config
+        endpoint, based on the JWT's issuer claim.
 
-            # Convert JSON response to dictionary
-            try:
-                response = response.json()
-            except JSONDecodeError as e:
-                raise TypeError(
-                    "The response does not look like valid JSON."
-                ) from e
+        :raises KeyError: JWT has no issuer claim.
+        """
+        self.get_claims()
+        try:
+            root = self.claims[self.validator.claim_issuer].rstrip('/')
+        except KeyError as e:
+            raise KeyError(
+                f"Issuer '{self.validator.claim_issuer}' is not "
+                "available. Original error message: "
+                f"{type(e).__name__}: {e}"
+            ) from e
+        return f"{root}/{self.validator.idp_config_url_suffix}"
+
+    def has_cached_public_key(self) -> bool:
+        """
+        Returns whether the public key for validating the JWT's signature is
+        cached, i.e., whether the signature can be validated without
+        contacting the identity provider.
+        """
+        try:
+            self.get_header_claims()
+            keys = self.get_trusted_public_keys()
+            if keys is None:
+                idp_config = self.validator.key_cache.lookup_idp_config(
+                    url=self.get_idp_config_url(),
+                )
+                if idp_config is None:
+                    return False
+                keys = self.validator.key_cache.lookup_public_keys(
+                    url=idp_config[self.validator.idp_config_jwks],
+                )
+        except Exception:
+            return False
+        return (
+            keys is not None and
+            self.header_claims.get(self.validator.claim_key_id) in keys
+        )
 
-            # Set IdP config
-            self.idp_config = response  # type: ignore
+    def get_trusted_public_keys(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the public keys of the JWT's issuer from the local trust
+        store, or `None` if no trust store is configured or the issuer is not
+        in the trust store.
+        """
+        if self.validator.trust_store is None:
+            return None
+        self.get_claims()
+        issuer = self.claims.get(self.validator.claim_issuer)
+        if not isinstance(issuer, str):
+            return None
+        return self.validator.trust_store.get_public_keys(issuer)
 
     def get_public_keys(
         self,
         force: bool = False,
+        refresh: bool = False,
     ) -> None:
         """
-        Obtain the identity provider's list of public keys.
+        Obtain the identity provider's list of public keys. Keys of issuers
+        in the local trust store are taken from there; otherwise, they are
+        fetched from the identity provider and cached process-wide.
+
+        :param refresh: Fetch keys from the identity provider even if they
+                are cached; see `KeyCache.get_public_keys()`.
+
+        :raises KeyError: Issuer not in trust store, but only issuers in the
+                trust store are accepted.
         """
-        if not self.public_keys or force:
+        if not self.public_keys or force or refresh:
+
+            # Get keys from local trust store
+            trusted_keys = self.get_trusted_public_keys()
+            if trusted_keys is not None:
+                self.public_keys = trusted_keys
+                return
+            if self.validator.trust_store_only:
+                raise KeyError(
+                    "Issuer of JWT is not in the trust store "
+                    f"'{self.validator.trust_store.path}'."  # type: ignore
+                )
 
             # Get IdP config
             try:
@@ -234,37 +498,32 @@ class JWT:
 
             # Get JWK set URL
             try:
-                url = self.idp_config[self.idp_config_jwks]
+                url = self.idp_config[self.validator.idp_config_jwks]
             except KeyError as e:
                 raise KeyError(
-                    f"Field '{self.idp_config_jwks}' not available in "
-                    f"identity provider's config. Original error message: "
+                    f"Field '{self.validator.idp_config_jwks}' not available "
+                    "in identity provider's config. Original error message: "
                     f"{type(e).__name__}: {e}"
                 ) from e
 
-            # Get JWK sets from identity provider
+            # Get public keys from process-wide cache
             try:
-                response = requests.get(url)
-                response.raise_for_status()
+                self.public_keys = self.validator.key_cache.get_public_keys(
+                    url=url,
+                    claim_key_id=self.validator.claim_key_id,
+                    refresh=refresh,
+                    ttl=self.validator.idp_cache_ttl,
+                    refresh_interval=self.validator.jwks_refresh_interval,
+                    timeout=self.get_idp_timeout(),
+                )
+            except KeyError:
+                raise
             except Exception as e:
                 raise Exception(
                     f"Could not connect to endpoint '{url}'. Original error "
                     f"message: {type(e).__name__}: {e}"
                 ) from e
 
-            # Iterate over all JWK sets and store public keys
-            keys = {}
-            try:
-                for jwk in response.json()['keys']:
-                    keys[jwk[self.claim_key_id]] = algorithms.RSAAlgorithm.\
-                        from_jwk(json.dumps(jwk))
-            except KeyError as e:
-                raise KeyError(
-                    f"Public keys could not be processed. Original error "
-                    f"message: {type(e).__name__}: {e}"
-                ) from e
-            self.public_keys = keys
-
     def get_current_key(
         self,
         force: bool = False,
@@ -288,13 +547,22 @@ class JWT:
 
             # Get JWT key ID
             try:
-                key_id_used = self.header_claims[self.claim_key_id]
+                key_id_used = self.header_claims[self.validator.claim_key_id]
             except KeyError as e:
                 raise KeyError(
-                    f"Key ID claim '{self.claim_key_id}' is not available in "
-                    f"JWT. Original error message: {type(e).__name__}: {e}"
+                    f"Key ID claim '{self.validator.claim_key_id}' is not "
+                    "available in JWT. Original error message: "
+                    f"{type(e).__name__}: {e}"
                 )
 
+            # Refresh public keys once if key is unknown, e.g., after the
+            # identity provider rotated its keys
+            if key_id_used not in self.public_keys:
+                try:
+                    self.get_public_keys(refresh=True)
+                except Exception:
+                    raise
+
             # Set JWT public key
             try:
                 self.current_key = self.public_keys[key_id_used]
@@ -309,16 +577,188 @@ class JWT:
         force: bool = False,
     ) -> None:
         """
+        Validates JWT via the configured validation methods, according to the
+        configured validation policy:
+
+        - 'all': All methods must succeed.
+        - 'any': At least one method must succeed.
+        - 'first_success': At least one method must succeed; validation ends
+          as soon as one method succeeds.
+
+        If the signature can be validated offline (i.e., the public key is
+        cached), method 'public_key' is run first. Unless policy 'all' is
+        used, successful validation of the signature then ends validation,
+        avoiding network calls. All other methods are run concurrently and
+        fail if they do not finish within the configured timeout.
+
+        JWTs that were validated successfully before, and that have not
+        expired since, are not validated again; instead, their claims are
+        restored from a cache. Validated JWTs are kept for no longer than
+        `validated_max_age` seconds. JWTs without an expiration claim are not
+        cached.
+
+        :param force: Validate JWT even if it was validated before.
+
+        :raises ValueError: Validation failed.
+        """
+        key = sha256(self.jwt.encode()).hexdigest()  # type: ignore
+        if not force:
+            claims = self.validator.validated_tokens.get(key)
+            if claims is not None:
+                self.claims = claims
+                return
+
+        self._run_validation_methods(force=force)
+
+        # Cache validated JWT until it expires
+        self.get_claims()
+        try:
+            ttl = float(self.claims["exp"]) - time()
+        except (KeyError, TypeError, ValueError):
+            return
+        self.validator.validated_tokens.set(
+            key,
+            self.claims,
+            ttl=min(ttl, self.validator.validated_max_age),
+        )
+
+    def _run_validation_methods(
+        self,
+        force: bool = False,
+    ) -> None:
+        """
+        Runs validation methods according to the configured validation
+        policy; see `validate()`. Calls to the identity provider are bound by
+        the validation timeout.
+
+        :raises ValueError: Validation failed.
+        """
+        deadline = monotonic() + self.validator.validation_timeout
+        token = _deadline.set(deadline)
+        try:
+            self._apply_validation_policy(deadline=deadline, force=force)
+        finally:
+            _deadline.reset(token)
+
+    def _apply_validation_policy(
+        self,
+        deadline: float,
+        force: bool = False,
+    ) -> None:
+        """
+        Runs validation methods according to the configured validation policy
+        until `deadline` (in terms of `time.monotonic()`). Methods that have
+        not finished by then fail and are cancelled if not yet started.
 
+        :raises ValueError: Validation failed.
         """
-        for method in self.validation_methods:
+        policy = self.validator.validation_policy
+        methods = list(self.validator.validation_methods)
+        errors: List[ValueError] = []
+
+        # Validate signature first if possible without network calls
+        if (
+            "public_key" in methods and
+            len(methods) > 1 and
+            self.has_cached_public_key()
+        ):
+            methods.remove("public_key")
             try:
-                ValidationMethods[method].value(self, force=force)
-            except Exception as e:
-                raise ValueError(
-                    f"Validation of JWT by method '{method}' failed. "
-                    f"Original error message: {type(e).__name__}: {e}"
-                ) from e
+                self._run_validation_method(method="public_key", force=force)
+            except ValueError as e:
+                if policy == "all":
+                    raise
+                errors.append(e)
+            else:
+                if policy != "all":
+                    return
+
+        # Run single method directly
+        if len(methods) == 1:
+            try:
+                self._run_validation_method(method=methods[0], force=force)
+            except ValueError as e:
+                if policy == "all":
+                    raise
+                errors.append(e)
+            else:
+                return
+
+        # Run remaining methods concurrently; in copies of the current
+        # context, such that calls to IdPs are added to the request's profile
+        elif methods:
+            self.get_claims(force=force)
+            futures = {
+                self.validator.executor.submit(
+                    copy_context().run,
+                    self._run_validation_method,
+                    method=method,
+                    force=force,
+                ): method for method in methods
+            }
+            pending = set(futures)
+            succeeded = False
+            try:
+                while pending:
+                    done, pending = wait(
+                        pending,
+                        timeout=max(0, deadline - monotonic()),
+                        return_when=FIRST_COMPLETED,
+                    )
+                    if not done:
+                        break
+                    for future in done:
+                        error = future.exception()
+                        if error is None:
+                            succeeded = True
+                            if policy == "first_success":
+                                return
+                        elif policy == "all":
+                            raise error
+                        else:
+                            errors.append(error)  # type: ignore
+            finally:
+                # Do not occupy the shared executor with methods whose
+                # results are no longer needed
+                for future in pending:
+                    future.cancel()
+            for future in pending:
+                errors.append(ValueError(
+                    f"Validation of JWT by method '{futures[future]}' timed "
+                    "out."
+                ))
+            if (policy == "all" and not errors) or (
+                policy != "all" and succeeded
+            ):
+                return
+
+        # Report failures
+        if not errors:
+            return
+        if len(errors) == 1:
+            raise errors[0]
+        raise ValueError(
+            "Validation of JWT failed for all methods: "
+            f"{' '.join(str(e) for e in errors)}"
+        )
+
+    def _run_validation_method(
+        self,
+        method: str,
+        force: bool = False,
+    ) -> None:
+        """
+        Runs a single validation method.
+
+        :raises ValueError: Validation failed.
+        """
+        try:
+            ValidationMethods[method].value(self, force=force)
+        except Exception as e:
+            raise ValueError(
+                f"Validation of JWT by method '{method}' failed. "
+                f"Original error message: {type(e).__name__}: {e}"
+            ) from e
 
     def get_user_info(
         self,
@@ -335,26 +775,29 @@ class JWT:
 
         # Get userinfo URL
         try:
-            url = self.idp_config[self.idp_config_userinfo]
+            url = self.idp_config[self.validator.idp_config_userinfo]
         except KeyError as e:
             raise KeyError(
-                f"Field '{self.idp_config_userinfo}' not available in "
-                "identity provider's config. Original error message: "
+                f"Field '{self.validator.idp_config_userinfo}' not available "
+                "in identity provider's config. Original error message: "
                 f"{type(e).__name__}: {e}"
             ) from e
 
         # Build headers
         headers = {
-            f"{self.auth_header_key}": f"{self.jwt_prefix} {self.jwt}"
+            self.validator.auth_header_key:
+                f"{self.validator.jwt_prefix} {self.jwt}"
         }
 
         # Get user info
         try:
-            response = requests.get(
-                url,
-                headers=headers,
-            )
-            response.raise_for_status()
+            with observe_outbound("idp", url, "userinfo"):
+                response = requests.get(
+                    url,
+                    headers=headers,
+                    timeout=self.get_idp_timeout(),
+                )
+                response.raise_for_status()
         except Exception:
             raise
         self.user_info = response
@@ -374,7 +817,7 @@ class JWT:
                 jwt=self.jwt,
                 verify=True,
                 key=self.current_key,
-                algorithms=self.decode_algorithms,
+                algorithms=list(self.validator.decode_algorithms),
             )
         except Exception as e:
             raise Exception(
@@ -402,11 +845,12 @@ class JWT:
 
             # Get user ID
             try:
-                self.user = self.claims[self.claim_identity]
+                self.user = self.claims[self.validator.claim_identity]
             except KeyError as e:
                 raise Exception(
-                    f"Key ID claim '{self.claim_identity}' is not available "
-                    f"in JWT. Original error message: {type(e).__name__}: {e}"
+                    f"Key ID claim '{self.validator.claim_identity}' is not "
+                    "available in JWT. Original error message: "
+                    f"{type(e).__name__}: {e}"
                 )
 
 
@@ -417,8 +861,19 @@ class ValidationMethods(Enum):
 
 
 def connexion_bearer_info(token: str) -> Dict:
-    jwt = JWT(jwt=token)
+    jwt = JWT(jwt=token, validator=_current_jwt_validator())
     jwt.get_claims()
     ret_dict = jwt.claims
     ret_dict['scope'] = ''
     return ret_dict
+
+
+def _current_jwt_validator() -> JwtValidator:
+    """
+    Returns the JWT validator of the current app, if available, or the default
+    JWT validator.
+    """
+    from flask import (current_app, has_app_context)
+    if has_app_context() and "JWT_VALIDATOR" in current_app.config:
+        return current_app.config["JWT_VALIDATOR"]
+    return get_jwt_validator()
@@ -0,0 +1,149 @@
+"""
+Local store of trusted JSON Web Token (JWT) issuers and their public keys,
+for validating JWT signatures without contacting identity providers.
+"""
+import json
+import logging
+import os
+from threading import Lock
+from time import monotonic
+from typing import (Any, Dict, List, Optional, Tuple)
+
+from jwt import algorithms
+import yaml
+
+logger = logging.getLogger("TEStribute")
+
+# File extensions of trust store files
+EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+class TrustStore:
+    """
+    Trusted issuers and their JSON Web Key (JWK) sets, loaded from a file or
+    from all JSON/YAML files in a directory. Each file maps issuers to JWK
+    sets, e.g.:
+
+        https://login.elixir-czech.org/oidc/:
+          keys:
+            - kty: RSA
+              kid: rsa1
+              n: ...
+              e: AQAB
+
+    Files are reloaded when they change. If a file cannot be loaded, the
+    previously loaded keys are kept.
+    """
+    def __init__(
+        self,
+        path: str,
+        claim_key_id: str = "kid",
+        check_interval: float = 1,
+    ) -> None:
+        """
+        :param path: Path to trust store file or directory.
+        :param claim_key_id: Name of key ID field.
+        :param check_interval: Minimum time (in seconds) between checks for
+                changed files.
+        """
+        self.path = path
+        self.claim_key_id = claim_key_id
+        self.check_interval = check_interval
+        self._lock = Lock()
+        self._checked: Optional[float] = None
+        self._signature: Optional[Tuple] = None
+        self._keys: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def issuers(self) -> List[str]:
+        """Trusted issuers."""
+        self._reload_if_changed()
+        return list(self._keys)
+
+    def get_public_keys(
+        self,
+        issuer: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns public keys of a trusted issuer.
+
+        :param issuer: Issuer, as in the JWT's issuer claim.
+
+        :return: Dictionary of key IDs and public keys, or `None` if the
+                issuer is not trusted.
+        """
+        self._reload_if_changed()
+        return self._keys.get(issuer.rstrip("/"))
+
+    def _files(self) -> List[str]:
+        """Returns paths of trust store files."""
+        if not os.path.isdir(self.path):
+            return [self.path]
+        return sorted(
+            os.path.join(self.path, name)
+            for name in os.listdir(self.path)
+            if name.endswith(EXTENSIONS)
+        )
+
+    def _reload_if_changed(self) -> None:
+        """Reloads trust store if any file was added, removed or changed."""
+        with self._lock:
+            now = monotonic()
+            if (
+                self._checked is not None and
+                now - self._checked < self.check_interval
+            ):
+                return
+            self._checked = now
+            try:
+                files = self._files()
+                signature = tuple(
+                    (path, stat.st_mtime_ns, stat.st_size)
+                    for path, stat in ((path, os.stat(path)) for path in files)
+                )
+            except OSError as e:
+                logger.error(
+                    f"Could not access JWT trust store '{self.path}'; "
+                    f"keeping previous keys. Original error message: "
+                    f"{type(e).__name__}: {e}"
+                )
+                return
+            if signature == self._signature:
+                return
+            try:
+                keys: Dict[str, Dict[str, Any]] = {}
+                for path in files:
+                    keys.update(self._load(path))
+            except Exception as e:
+                logger.error(
+                    f"Could not load JWT trust store '{self.path}'; keeping "
+                    f"previous keys. Original error message: "
+                    f"{type(e).__name__}: {e}"
+                )
+                return
+            self._keys = keys
+            self._signature = signature
+            logger.info(
+                f"Loaded JWT trust store '{self.path}' with "
+                f"{len(keys)} issuer(s)."
+            )
+
+    def _load(
+        self,
+        path: str,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Loads issuers and parses their public keys from a file.
+
+        :raises KeyError: JWK set could not be processed.
+        """
+        with open(path) as f:
+            issuers = yaml.safe_load(f) or {}
+        keys: Dict[str, Dict[str, Any]] = {}
+        for issuer, jwks in issuers.items():
+            keys[issuer.rstrip("/")] = {
+                jwk[self.claim_key_id]: algorithms.RSAAlgorithm.from_jwk(
+                    json.dumps(jwk)
+                ) for jwk in jwks["keys"]
+            }
+        return keys
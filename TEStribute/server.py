@@ -1,14 +1,34 @@
 """
 Service for the TEStribute.
 """
+from copy import deepcopy
+import logging
 import os
-from shutil import copyfile
+from time import perf_counter
+from typing import Dict
 
 from connexion import App
+from flask import (g, request, Response)
+from prometheus_client import (
+    CollectorRegistry,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
 
 from TEStribute.config import config_parser
 from TEStribute.errors import register_error_handlers
-from TEStribute.security.process_jwt import JWT
+from TEStribute.metrics import (HTTP_REQUESTS, HTTP_REQUEST_DURATION)
+from TEStribute.security.process_jwt import get_jwt_validator
+from TEStribute.utils.cache import TTLCache
+from TEStribute.utils.profiling import Profiler
+from TEStribute.utils.schemas import (
+    CACHE_DIR,
+    get_validator,
+    load_spec,
+    response_validator,
+)
 
 # Instantiate app
 app = App(__name__)
@@ -27,8 +47,11 @@ config = config_parser(
 def configure_app(app: App) -> App:
     """Configure app"""
     app = add_settings(app)
+    app = add_response_cache(app)
     app = register_error_handlers(app)
     app = add_openapi(app)
+    app = add_metrics(app)
+    app = add_profiling(app)
     return app
 
 
@@ -38,6 +61,21 @@ def add_settings(app: App) -> App:
     app.port = config["server"]["port"]  # type: ignore
     app.debug = config["server"]["debug"]  # type: ignore
     app.app.config.update(config)  # type: ignore
+    logging.getLogger("TEStribute").setLevel(
+        config["server"].get("log_level", "INFO")
+    )
+    return app
+
+
+def add_response_cache(app: App) -> App:
+    """Add cache for complete responses to app instance"""
+    conf = config.get("response_cache", {})
+    if conf.get("enabled", False):
+        app.app.config["RESPONSE_CACHE"] = TTLCache(  # type: ignore
+            name="response",
+            maxsize=conf["maxsize"],
+            ttl=conf["ttl"],
+        )
     return app
 
 
@@ -51,46 +89,131 @@ def add_openapi(app: App) -> App:
         ),
         config["openapi"]["TEStribute"]
     )
+    spec = load_spec(
+        path=path,
+        cache_dir=config["openapi"].get("cache_dir", CACHE_DIR),
+    )
     if config["security"]["authorization_required"]:
-        path = add_security_definitions(in_file=path)
-        JWT.config(**config["security"]["jwt"])
+        spec = add_security_definitions(spec=spec)
+        app.app.config["JWT_VALIDATOR"] = get_jwt_validator(  # type: ignore
+            config["security"]["jwt"]
+        )
+
+    # Compile validators for request and response models once
+    for schema in ["Request", "Response", "ServiceCombination"]:
+        get_validator(schema)
+    validation_mode = config["openapi"].get("validate_responses", "full")
     app.add_api(  # type: ignore
-        path,
-        validate_responses=True,
-        strict_validation=True
+        spec,
+        validate_responses=validation_mode != "off",
+        strict_validation=True,
+        validator_map={
+            "response": response_validator(
+                mode=validation_mode,
+                sample_rate=config["openapi"].get(
+                    "validate_responses_sample_rate", 1.0
+                ),
+            ),
+        },
+    )
+    return app
+
+
+def add_metrics(app: App) -> App:
+    """Add request instrumentation and `/metrics` endpoint to app instance"""
+    @app.app.before_request  # type: ignore
+    def _start_timer() -> None:
+        g.request_start = perf_counter()
+
+    @app.app.after_request  # type: ignore
+    def _record_request(response: Response) -> Response:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        if endpoint != "/metrics" and "request_start" in g:
+            HTTP_REQUEST_DURATION.labels(request.method, endpoint).observe(
+                perf_counter() - g.request_start
+            )
+            HTTP_REQUESTS.labels(
+                request.method, endpoint, response.status_code
+            ).inc()
+        return response
+
+    # Aggregate metrics across worker processes, if enabled
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    def metrics() -> Response:
+        return Response(
+            response=generate_latest(registry),
+            status=200,
+            content_type=CONTENT_TYPE_LATEST,
+        )
+
+    app.app.add_url_rule(  # type: ignore
+        "/metrics",
+        "metrics",
+        metrics,
+        methods=["GET"],
     )
     return app
 
 
-def add_security_definitions(
-    in_file: str,
-    ext: str = 'security_definitions_added.yaml'
-) -> str:
-    """Adds 'securityDefinitions' section to OpenAPI YAML specs."""
-    # Set security definitions
-    amend = '''
+def add_profiling(app: App) -> App:
+    """Add opt-in profiling of sampled or explicitly requested requests"""
+    profiler = Profiler.from_config(config)
+    if profiler is None:
+        return app
 
-# Amended by WES-ELIXIR
-  securitySchemes:
-    jwt:
-      type: http
-      scheme: bearer
-      bearerFormat: JWT
-      x-bearerInfoFunc: security.process_jwt.connexion_bearer_info
+    @app.app.before_request  # type: ignore
+    def _start_profile() -> None:
+        if request.path != "/metrics":
+            g.profile = profiler.start(
+                token=request.headers.get(profiler.header),
+            )
 
-security:
-- jwt: []
-'''
+    @app.app.after_request  # type: ignore
+    def _write_profile(response: Response) -> Response:
+        profile = g.pop("profile", None)
+        if profile is not None:
+            name = profiler.finish(
+                profile,
+                info={
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                },
+            )
+            if profile.forced and name is not None:
+                response.headers[profiler.header] = name
+        return response
 
-    # Create copy for modification
-    out_file: str = '.'.join([os.path.splitext(in_file)[0], ext])
-    copyfile(in_file, out_file)
+    @app.app.teardown_request  # type: ignore
+    def _stop_profile(exc) -> None:
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.disable()
+
+    return app
 
-    # Append security definitions
-    with open(out_file, 'a') as mod:
-        mod.write(amend)
 
-    return out_file
+def add_security_definitions(spec: Dict) -> Dict:
+    """
+    Returns copy of OpenAPI specification with security scheme for JSON Web
+    Tokens added and applied to all operations.
+    """
+    spec = deepcopy(spec)
+    spec.setdefault("components", {}).setdefault("securitySchemes", {})[
+        "jwt"
+    ] = {
+        "type": "http",
+        "scheme": "bearer",
+        "bearerFormat": "JWT",
+        "x-bearerInfoFunc":
+            "TEStribute.security.process_jwt.connexion_bearer_info",
+    }
+    spec["security"] = [{"jwt": []}]
+    return spec
 
 
 def main(app: App) -> None:
@@ -0,0 +1,99 @@
+"""
+Thread-safe in-memory cache with least-recently-used eviction and expiring
+entries.
+"""
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import (Any, Hashable, Optional, Tuple)
+
+from TEStribute.metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire after a time-to-live (TTL). When the
+    cache is full, the least recently used entry is evicted.
+    """
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = 1024,
+        ttl: float = 60,
+        record_metrics: bool = True,
+    ) -> None:
+        """
+        :param name: Name of the cache; used as a label for metrics.
+        :param maxsize: Maximum number of entries.
+        :param ttl: Default time-to-live of entries, in seconds.
+        :param record_metrics: Count hits and misses in metric
+                `testribute_cache_requests_total`.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.record_metrics = record_metrics
+        self._lock = Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = \
+            OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        key: Hashable,
+        default: Any = None,
+    ) -> Any:
+        """
+        Returns the value stored for `key` or `default` if there is no such
+        entry or if it has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > monotonic():
+                    self._entries.move_to_end(key)
+                    if self.record_metrics:
+                        CACHE_REQUESTS.labels(self.name, "hit").inc()
+                    return entry[1]
+                del self._entries[key]
+        if self.record_metrics:
+            CACHE_REQUESTS.labels(self.name, "miss").inc()
+        return default
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """
+        Stores `value` for `key`.
+
+        :param ttl: Time-to-live of the entry, in seconds; the default TTL of
+                the cache is used if not specified. Entries with a TTL of zero
+                or less are not stored.
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(
+        self,
+        key: Hashable,
+    ) -> None:
+        """Removes the entry for `key`, if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
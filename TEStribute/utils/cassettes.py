@@ -0,0 +1,325 @@
+"""
+Recording and replaying of outbound HTTP traffic, i.e., of calls to TES and
+DRS instances, currency exchange rate and IP geolocation services and
+identity providers.
+"""
+import atexit
+import base64
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+import gzip
+from hashlib import sha256
+import json
+import logging
+import os
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None  # type: ignore
+from threading import Lock
+from time import (perf_counter, sleep)
+from typing import (Any, Dict, List, Optional, Tuple)
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger("TEStribute")
+
+# Version of the cassette format
+CASSETTE_VERSION = 1
+
+# Response headers kept in cassettes; bodies are stored decoded
+_HEADERS = frozenset(("content-type", "etag", "cache-control"))
+
+# Exceptions that can be recorded and replayed
+_ERRORS = frozenset((
+    "ConnectionError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "SSLError",
+    "Timeout",
+))
+
+# Cassette that outbound requests are currently routed through, if any
+_active: Optional["Cassette"] = None
+_send = HTTPAdapter.send
+
+
+def _key(request: requests.PreparedRequest) -> Tuple[str, str, str]:
+    """Returns key matching a request to recorded responses."""
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    if isinstance(body, bytes):
+        digest = sha256(body).hexdigest()[:16] if body else ""
+    else:
+        digest = "stream"
+    return (str(request.method), str(request.url), digest)
+
+
+class Cassette:
+    """
+    Outbound HTTP responses, recorded to or replayed from a file.
+
+    Cassettes are gzip-compressed files of JSON lines: a header with the
+    format version, followed by one line per request with the request method,
+    URL and body digest, the response status, selected headers, body and
+    latency, or the name of the exception raised.
+    """
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        latency: str = "original",
+    ) -> None:
+        """
+        :param path: Path of cassette file.
+        :param mode: 'record' to append responses to the cassette, 'replay'
+                to serve responses from the cassette.
+        :param latency: 'original' to replay responses after their recorded
+                latencies, 'zero' to replay them immediately.
+
+        :raises ValueError: Invalid mode or latency, or unsupported cassette
+                version.
+        :raises FileNotFoundError: Cassette to replay does not exist.
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Invalid cassette mode: '{mode}'.")
+        if latency not in ("original", "zero"):
+            raise ValueError(f"Invalid cassette latency: '{latency}'.")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = Lock()
+        self._pending: List[Dict] = []
+        self._interactions: Dict[Tuple[str, str, str], List[Dict]] = \
+            defaultdict(list)
+        self._played: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        if mode == "replay":
+            for interaction in self._read():
+                self._interactions[tuple(  # type: ignore
+                    interaction["request"]
+                )].append(interaction)
+            logger.info(
+                f"Replaying {sum(map(len, self._interactions.values()))} "
+                f"recorded responses from cassette '{path}'."
+            )
+
+    def _read(self) -> List[Dict]:
+        """Returns interactions recorded in the cassette file."""
+        interactions = []
+        with gzip.open(self.path, "rt") as f:
+            for line in f:
+                data = json.loads(line)
+                if "version" in data:
+                    if data["version"] != CASSETTE_VERSION:
+                        raise ValueError(
+                            f"Unsupported cassette version: {data['version']}"
+                        )
+                    continue
+                interactions.append(data)
+        return interactions
+
+    def send(
+        self,
+        adapter: HTTPAdapter,
+        request: requests.PreparedRequest,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Sends or replays `request`; replaces `HTTPAdapter.send()`."""
+        if self.mode == "replay":
+            return self.play(request)
+        start = perf_counter()
+        try:
+            response = _send(adapter, request, **kwargs)
+            content = response.content
+        except requests.RequestException as e:
+            self.record(request, perf_counter() - start, error=e)
+            raise
+        self.record(request, perf_counter() - start, response, content)
+        return response
+
+    def record(
+        self,
+        request: requests.PreparedRequest,
+        latency: float,
+        response: Optional[requests.Response] = None,
+        content: bytes = b"",
+        error: Optional[Exception] = None,
+    ) -> None:
+        """
+        Adds a response, or the exception raised instead, to the cassette;
+        written to the file on `flush()`.
+        """
+        interaction: Dict[str, Any] = {
+            "request": _key(request),
+            "latency": round(latency, 6),
+        }
+        if response is None:
+            name = type(error).__name__
+            interaction["error"] = name if name in _ERRORS \
+                else "ConnectionError"
+            interaction["message"] = str(error)
+        else:
+            interaction["status"] = response.status_code
+            interaction["reason"] = response.reason
+            interaction["headers"] = {
+                key: value for key, value in response.headers.items()
+                if key.lower() in _HEADERS
+            }
+            try:
+                interaction["text"] = content.decode()
+            except UnicodeDecodeError:
+                interaction["base64"] = base64.b64encode(content).decode()
+        with self._lock:
+            self._pending.append(interaction)
+
+    def play(
+        self,
+        request: requests.PreparedRequest,
+    ) -> requests.Response:
+        """
+        Returns the next response recorded for `request`; responses recorded
+        for identical requests are returned in turn.
+
+        :raises requests.exceptions.ConnectionError: No response recorded for
+                `request`.
+        :raises requests.exceptions.RequestException: Exception recorded for
+                `request`.
+        """
+        key = _key(request)
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if interactions:
+                interaction = interactions[
+                    self._played[key] % len(interactions)
+                ]
+                self._played[key] += 1
+        if not interactions:
+            logger.warning(
+                f"No response recorded for {key[0]} request to '{key[1]}'."
+            )
+            raise requests.exceptions.ConnectionError(
+                f"No response recorded in cassette '{self.path}'.",
+                request=request,
+            )
+        if self.latency == "original":
+            sleep(interaction["latency"])
+        if "error" in interaction:
+            raise getattr(requests.exceptions, interaction["error"])(
+                interaction["message"],
+                request=request,
+            )
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.reason = interaction["reason"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = (
+            interaction["text"].encode() if "text" in interaction
+            else base64.b64decode(interaction["base64"])
+        )
+        response.url = str(request.url)
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction["latency"])
+        return response
+
+    def flush(self) -> None:
+        """
+        Appends responses recorded since the last call to the file, as a
+        separate gzip member. The file is locked while appending, such that
+        several processes, e.g., server workers, can record to the same
+        cassette.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            lines = "".join(
+                json.dumps(interaction, separators=(",", ":")) + "\n"
+                for interaction in pending
+            )
+            with open(self.path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        lines = json.dumps(
+                            {"version": CASSETTE_VERSION}
+                        ) + "\n" + lines
+                    f.write(gzip.compress(lines.encode()))
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _cassette_send(
+    adapter: HTTPAdapter,
+    request: requests.PreparedRequest,
+    **kwargs: Any,
+) -> requests.Response:
+    """Routes requests through the active cassette, if any."""
+    cassette = _active
+    if cassette is None:
+        return _send(adapter, request, **kwargs)
+    return cassette.send(adapter, request, **kwargs)
+
+
+def install(cassette: Optional[Cassette]) -> None:
+    """
+    Routes all outbound requests made with `requests` (and, therefore, with
+    the TES and DRS clients) through `cassette`; pass `None` to stop, see
+    `uninstall()`.
+    """
+    global _active
+    if cassette is None:
+        uninstall()
+        return
+    if _active is not None and _active is not cassette:
+        _active.flush()
+    _active = cassette
+    HTTPAdapter.send = _cassette_send  # type: ignore
+
+
+def uninstall() -> None:
+    """
+    Stops routing outbound requests through a cassette and restores the
+    original `HTTPAdapter.send()`; responses recorded by the active cassette
+    are written to its file.
+    """
+    global _active
+    if _active is not None:
+        _active.flush()
+    _active = None
+    HTTPAdapter.send = _send  # type: ignore
+
+
+def use_cassette(
+    path: str,
+    mode: str = "replay",
+    latency: str = "original",
+) -> Cassette:
+    """
+    Returns shared cassette for the given settings and routes outbound
+    requests through it, also after `uninstall()`. Recorded responses are
+    also written to the file when the interpreter exits.
+    """
+    cassette = _shared_cassette(path=path, mode=mode, latency=latency)
+    install(cassette)
+    return cassette
+
+
+@lru_cache(maxsize=None)
+def _shared_cassette(
+    path: str,
+    mode: str,
+    latency: str,
+) -> Cassette:
+    """Returns shared cassette for the given settings; see `use_cassette()`."""
+    cassette = Cassette(path=path, mode=mode, latency=latency)
+    atexit.register(cassette.flush)
+    return cassette
@@ -0,0 +1,57 @@
+"""
+Per-user directories for files that TEStribute writes and reads back, e.g.,
+cached API specifications and profiles.
+"""
+import logging
+import os
+import stat
+from typing import Optional
+
+logger = logging.getLogger("TEStribute")
+
+
+def user_cache_dir() -> str:
+    """
+    Returns the cache directory of TEStribute for the current user, i.e.,
+    `$XDG_CACHE_HOME/testribute` or, if that variable is not set,
+    `~/.cache/testribute`.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"),
+        ".cache",
+    )
+    return os.path.join(base, "testribute")
+
+
+def private_dir(
+    path: str,
+) -> Optional[str]:
+    """
+    Returns a directory that only the current user can write to. Missing
+    directories are created with mode 0700; existing directories must be
+    owned by the current user and must not be writable by group or others,
+    such that files in them cannot have been placed there by other users.
+
+    :param path: Path to directory; `~` is expanded.
+
+    :return: Expanded path, or `None` if the directory cannot be created or
+            is not private.
+    """
+    path = os.path.expanduser(path)
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        status = os.stat(path)
+    except OSError as e:
+        logger.debug(f"Directory '{path}' not available: {e}")
+        return None
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        logger.warning(
+            f"Directory '{path}' is not owned by the current user; not used."
+        )
+        return None
+    if status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        logger.warning(
+            f"Directory '{path}' is writable by other users; not used."
+        )
+        return None
+    return path
@@ -0,0 +1,262 @@
+"""
+Local cost model for TES instances based on their unit prices, used instead
+of asking each TES instance for a quote.
+"""
+from functools import lru_cache
+import logging
+import os
+from threading import Lock
+from time import monotonic
+from typing import (Dict, Iterable, Mapping, Optional, Tuple)
+
+import requests
+import yaml
+
+from TEStribute.models import (
+    Costs,
+    Currency,
+    ResourceRequirements,
+    TaskInfo,
+)
+
+logger = logging.getLogger("TEStribute")
+
+
+class PriceSheet:
+    """
+    Unit prices of a TES instance, as configured via the `tesTaskInfoConfig`
+    model of the modified TES specification in the `mock-TES` repository.
+    """
+    def __init__(
+        self,
+        currency: Currency,
+        cpu_usage: float,
+        memory_consumption: float,
+        data_storage: float,
+        data_transfer: float,
+        estimated_queue_time_sec: float = 0,
+    ) -> None:
+        """
+        :param currency: Currency of all prices.
+        :param cpu_usage: Price per CPU core and second.
+        :param memory_consumption: Price per GB of RAM and second.
+        :param data_storage: Price per GB of disk space.
+        :param data_transfer: Price per GB of data transferred.
+        :param estimated_queue_time_sec: Estimated queue time, in seconds.
+        """
+        self.currency = currency
+        self.cpu_usage = cpu_usage
+        self.memory_consumption = memory_consumption
+        self.data_storage = data_storage
+        self.data_transfer = data_transfer
+        self.estimated_queue_time_sec = estimated_queue_time_sec
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Mapping,
+    ) -> "PriceSheet":
+        """
+        Creates price sheet from a mapping of the form used in the benchmark
+        component files, i.e., with keys `currency`, `unit_costs` and,
+        optionally, `estimated_queue_time_sec`.
+
+        :raises KeyError: Required field missing.
+        :raises ValueError: Unknown currency or invalid price.
+        """
+        unit_costs = data["unit_costs"]
+        return cls(
+            currency=Currency(data["currency"]),
+            cpu_usage=float(unit_costs["cpu_usage"]),
+            memory_consumption=float(unit_costs["memory_consumption"]),
+            data_storage=float(unit_costs["data_storage"]),
+            data_transfer=float(unit_costs["data_transfer"]),
+            estimated_queue_time_sec=float(
+                data.get("estimated_queue_time_sec", 0)
+            ),
+        )
+
+
+class PriceSheets:
+    """
+    Price sheets of TES instances, loaded from a YAML file or URL that maps
+    TES URIs to price sheets, e.g.:
+
+        tes_uris:
+          https://tes.org/ga4gh/tes/v1/:
+            currency: EUR
+            unit_costs:
+              cpu_usage: 0.0002
+              memory_consumption: 0.0002
+              data_storage: 0.2
+              data_transfer: 0.01
+
+    The top-level `tes_uris` key is optional. Price sheets are loaded on first
+    use and refreshed periodically; if they cannot be refreshed, previously
+    loaded price sheets are kept.
+    """
+    def __init__(
+        self,
+        source: str,
+        refresh_interval: float = 3600,
+        timeout: float = 3,
+    ) -> None:
+        """
+        :param source: Path or HTTP(S) URL of price sheets.
+        :param refresh_interval: Time (in seconds) after which price sheets
+                are refreshed.
+        :param timeout: Time (in seconds) after which requests for price
+                sheets are aborted.
+        """
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._lock = Lock()
+        self._loaded: Optional[float] = None
+        self._mtime: Optional[int] = None
+        self._sheets: Dict[str, PriceSheet] = {}
+
+    def get(
+        self,
+        uri: str,
+    ) -> Optional[PriceSheet]:
+        """Returns price sheet of TES instance, if available."""
+        self._refresh()
+        return self._sheets.get(uri.rstrip("/"))
+
+    def _refresh(self) -> None:
+        """Loads price sheets if not loaded or outdated."""
+        with self._lock:
+            if (
+                self._loaded is not None and
+                monotonic() - self._loaded < self.refresh_interval
+            ):
+                return
+            self._loaded = monotonic()
+            try:
+                self._sheets = self._load()
+            except Exception as e:
+                logger.warning(
+                    f"Could not load price sheets from '{self.source}'; "
+                    f"keeping {len(self._sheets)} previously loaded price "
+                    f"sheet(s). Original error message: {type(e).__name__}: "
+                    f"{e}"
+                )
+
+    def _load(self) -> Dict[str, PriceSheet]:
+        """Loads and parses price sheets."""
+        if self.source.startswith(("http://", "https://")):
+            response = requests.get(self.source, timeout=self.timeout)
+            response.raise_for_status()
+            data = yaml.safe_load(response.text)
+        else:
+            mtime = os.stat(self.source).st_mtime_ns
+            if mtime == self._mtime:
+                return self._sheets
+            with open(self.source) as f:
+                data = yaml.safe_load(f)
+            self._mtime = mtime
+        data = data or {}
+        data = data.get("tes_uris", data)
+        sheets = {
+            uri.rstrip("/"): PriceSheet.from_dict(sheet)
+            for uri, sheet in data.items()
+        }
+        logger.info(
+            f"Loaded {len(sheets)} price sheet(s) from '{self.source}'."
+        )
+        return sheets
+
+
+@lru_cache(maxsize=None)
+def get_price_sheets(
+    source: str,
+    refresh_interval: float = 3600,
+) -> PriceSheets:
+    """
+    Returns shared `PriceSheets` instance for the specified source, so that
+    price sheets are loaded once per process rather than once per request.
+
+    :param source: Path or HTTP(S) URL of price sheets.
+    :param refresh_interval: Time (in seconds) after which price sheets are
+            refreshed.
+    """
+    return PriceSheets(source=source, refresh_interval=refresh_interval)
+
+
+def estimate_task_info(
+    price_sheets: Mapping[str, PriceSheet],
+    resource_requirements: ResourceRequirements,
+) -> Dict[str, TaskInfo]:
+    """
+    Computes cost estimates for a task at any number of TES instances at once
+    from their unit prices:
+
+    - compute costs: (CPU cores x `cpu_usage` + RAM x `memory_consumption`) x
+      execution time
+    - storage costs: disk size x `data_storage`
+    - data transfer costs per GB: `data_transfer`
+
+    :param price_sheets: Mapping of TES URIs and price sheets.
+    :param resource_requirements: Resource requirements of the task.
+
+    :return: Dict of TES URIs and `TaskInfo` objects.
+    """
+    import numpy as np
+
+    uris = list(price_sheets)
+    if not uris:
+        return {}
+    sheets = [price_sheets[uri] for uri in uris]
+    prices = np.array([
+        [
+            sheet.cpu_usage,
+            sheet.memory_consumption,
+            sheet.data_storage,
+        ] for sheet in sheets
+    ], dtype=float)
+
+    # Resource values may be passed as strings, e.g., via the API
+    compute = prices[:, :2] @ np.array([
+        float(resource_requirements.cpu_cores),
+        float(resource_requirements.ram_gb),
+    ], dtype=float) * float(resource_requirements.execution_time_sec)
+    storage = prices[:, 2] * float(resource_requirements.disk_gb)
+    return {
+        uri: TaskInfo(
+            estimated_compute_costs=Costs(
+                amount=float(compute[index]),
+                currency=sheet.currency,
+            ),
+            estimated_storage_costs=Costs(
+                amount=float(storage[index]),
+                currency=sheet.currency,
+            ),
+            unit_costs_data_transfer=Costs(
+                amount=sheet.data_transfer,
+                currency=sheet.currency,
+            ),
+            estimated_queue_time_sec=sheet.estimated_queue_time_sec,
+        ) for index, (uri, sheet) in enumerate(zip(uris, sheets))
+    }
+
+
+def split_by_price_sheet(
+    tes_uris: Iterable[str],
+    price_sheets: Optional[PriceSheets],
+) -> Tuple[Dict[str, PriceSheet], list]:
+    """
+    Splits TES URIs into those with a known price sheet and the others.
+
+    :return: Tuple of a dict of TES URIs and price sheets, and a list of TES
+            URIs without price sheets.
+    """
+    known: Dict[str, PriceSheet] = {}
+    unknown = []
+    for uri in tes_uris:
+        sheet = None if price_sheets is None else price_sheets.get(uri)
+        if sheet is None:
+            unknown.append(uri)
+        else:
+            known[uri] = sheet
+    return known, unknown
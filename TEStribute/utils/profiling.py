@@ -0,0 +1,261 @@
+"""
+Opt-in profiling of individual requests: a sample of requests, and requests
+that carry a privileged header, are run under `cProfile`; call graphs are
+written to a directory together with the timings of ranking stages and calls
+to external services.
+
+The profile of a request is held in a context variable, such that work
+submitted to other threads is annotated as well, provided it runs in a copy
+of the request's context (see `contextvars.copy_context()`).
+"""
+from contextvars import ContextVar
+import cProfile
+from datetime import datetime, timezone
+import glob
+import hmac
+from itertools import count
+import json
+import logging
+import os
+import random
+from time import perf_counter
+from typing import (Any, Dict, List, Mapping, Optional)
+
+from TEStribute.utils.paths import (private_dir, user_cache_dir)
+
+logger = logging.getLogger("TEStribute")
+
+# Environment variable overriding the configured sample rate
+ENV_SAMPLE_RATE = "TESTRIBUTE_PROFILE_SAMPLE_RATE"
+
+# Profile of the request handled in the current context, if any
+_current: ContextVar[Optional["Profile"]] = ContextVar(
+    "profile",
+    default=None,
+)
+_counter = count()
+
+
+class Profile:
+    """
+    Call graph and annotations of a single profiled request.
+    """
+    def __init__(
+        self,
+        forced: bool = False,
+    ) -> None:
+        """
+        :param forced: Whether profiling was requested via header rather than
+                sampled.
+        """
+        self.forced = forced
+        self.profiler = cProfile.Profile()
+        self.annotations: Dict[str, List[Dict]] = {
+            "stages": [],
+            "outbound": [],
+        }
+        self.info: Dict[str, Any] = {}
+        self.start = perf_counter()
+        self.duration: Optional[float] = None
+
+    def enable(self) -> None:
+        """
+        Starts profiling the current thread.
+
+        :raises ValueError: Another profiler is active.
+        """
+        self.profiler.enable()
+        _current.set(self)
+        self.start = perf_counter()
+
+    def disable(self) -> None:
+        """Stops profiling."""
+        if _current.get() is self:
+            self.profiler.disable()
+            _current.set(None)
+            self.duration = perf_counter() - self.start
+
+
+def annotate(
+    kind: str,
+    start: float,
+    duration: float,
+    **labels: Any,
+) -> None:
+    """
+    Adds timing of a ranking stage ('stages') or call to an external service
+    ('outbound') to the profile of the current context, if any.
+
+    :param start: Start time, as returned by `time.perf_counter()`.
+    :param duration: Duration, in seconds.
+    """
+    profile = _current.get()
+    if profile is not None:
+        profile.annotations[kind].append(dict(
+            labels,
+            start_sec=round(start - profile.start, 6),
+            duration_sec=round(duration, 6),
+        ))
+
+
+def add_info(**info: Any) -> None:
+    """
+    Adds details to the profile of the current context, if any; they are
+    written to the annotations of the profile.
+    """
+    profile = _current.get()
+    if profile is not None:
+        profile.info.update(info)
+
+
+class Profiler:
+    """
+    Decides which requests are profiled and writes their profiles.
+    """
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: float = 0,
+        max_files: int = 100,
+        header: str = "X-TEStribute-Profile",
+        header_token: Optional[str] = None,
+    ) -> None:
+        """
+        :param directory: Directory profiles are written to; must be private
+                to the current user, see
+                `TEStribute.utils.paths.private_dir()`.
+        :param sample_rate: Fraction of requests profiled.
+        :param max_files: Maximum number of profiles kept; older profiles are
+                deleted.
+        :param header: Request header that requests profiling of a request,
+                if its value equals `header_token`.
+        :param header_token: Secret token; profiling via header is disabled
+                if not set.
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.header = header
+        self.header_token = header_token
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Mapping,
+    ) -> Optional["Profiler"]:
+        """
+        Returns profiler for section `profiling` of the app config, or `None`
+        if requests are neither sampled nor can be profiled via header. The
+        sample rate can be overridden with environment variable
+        `TESTRIBUTE_PROFILE_SAMPLE_RATE`.
+        """
+        conf = config.get("profiling") or {}
+        sample_rate = conf.get("sample_rate", 0) if conf.get("enabled") else 0
+        if os.environ.get(ENV_SAMPLE_RATE):
+            try:
+                sample_rate = float(os.environ[ENV_SAMPLE_RATE])
+            except ValueError:
+                logger.warning(
+                    "Invalid value of environment variable "
+                    f"{ENV_SAMPLE_RATE}: '{os.environ[ENV_SAMPLE_RATE]}'. "
+                    "Ignored."
+                )
+        if not sample_rate and not conf.get("header_token"):
+            return None
+        return cls(
+            directory=conf.get("directory") or os.path.join(
+                user_cache_dir(),
+                "profiles",
+            ),
+            sample_rate=sample_rate,
+            max_files=conf.get("max_files", 100),
+            header=conf.get("header", "X-TEStribute-Profile"),
+            header_token=conf.get("header_token"),
+        )
+
+    def start(
+        self,
+        token: Optional[str] = None,
+    ) -> Optional[Profile]:
+        """
+        Starts profiling the current request, if it carries the privileged
+        header or is sampled.
+
+        :param token: Value of the privileged request header, if any.
+
+        :return: `Profile` object, or `None` if the request is not profiled.
+        """
+        forced = bool(
+            self.header_token and token and
+            hmac.compare_digest(str(token), str(self.header_token))
+        )
+        if not forced and random.random() >= self.sample_rate:
+            return None
+        profile = Profile(forced=forced)
+        try:
+            profile.enable()
+        except ValueError:
+            logger.debug("Another profiler is active; request not profiled.")
+            return None
+        return profile
+
+    def finish(
+        self,
+        profile: Profile,
+        info: Mapping[str, Any],
+    ) -> Optional[str]:
+        """
+        Stops profiling and writes the call graph (`<name>.prof`, readable
+        with `pstats`) and annotations (`<name>.json`), then deletes the
+        oldest profiles beyond `max_files`.
+
+        :param profile: Profile returned by `start()`.
+        :param info: Request details added to the annotations.
+
+        :return: Name of the profile, or `None` if it could not be written.
+        """
+        profile.disable()
+        now = datetime.now(timezone.utc)
+        name = (
+            f"{now.strftime('%Y%m%dT%H%M%S.%fZ')}-{os.getpid()}-"
+            f"{next(_counter):06d}"
+        )
+        directory = private_dir(self.directory)
+        if directory is None:
+            logger.warning(
+                f"Profile could not be written: directory '{self.directory}' "
+                "is not available or not private."
+            )
+            return None
+        path = os.path.join(directory, name)
+        try:
+            profile.profiler.dump_stats(f"{path}.prof")
+            with open(f"{path}.json", "w") as f:
+                json.dump(
+                    dict(
+                        info,
+                        **profile.info,
+                        created=now.isoformat(),
+                        duration_sec=profile.duration,
+                        forced=profile.forced,
+                        **profile.annotations,
+                    ),
+                    f,
+                    indent=2,
+                    default=str,
+                )
+        except OSError as e:
+            logger.warning(f"Profile could not be written: {e}")
+            return None
+        self._prune(directory)
+        return name
+
+    def _prune(self, directory: str) -> None:
+        """Deletes oldest profiles beyond `max_files` in `directory`."""
+        profiles = sorted(glob.glob(os.path.join(directory, "*.prof")))
+        for path in profiles[:max(0, len(profiles) - self.max_files)]:
+            for file in (path, f"{path[:-len('.prof')]}.json"):
+                try:
+                    os.remove(file)
+                except OSError:
+                    pass
@@ -0,0 +1,264 @@
+"""
+OpenAPI specification loading and JSON schema validators for the models
+defined therein.
+"""
+from copy import deepcopy
+from functools import lru_cache
+from hashlib import sha256
+import json
+import logging
+import os
+from random import random
+from tempfile import NamedTemporaryFile
+from typing import (Dict, Optional, Tuple, Type)
+
+from connexion.decorators.response import ResponseValidator
+from connexion.decorators.validation import ResponseBodyValidator
+from connexion.exceptions import NonConformingResponseBody
+from jsonschema import Draft4Validator
+from jsonschema.exceptions import ValidationError
+import yaml
+
+from TEStribute.utils.paths import (private_dir, user_cache_dir)
+
+logger = logging.getLogger("TEStribute")
+
+# Response validation modes
+VALIDATION_MODES = ("full", "sampled", "off")
+
+SPEC_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        os.pardir,
+        "specs",
+        "schema.TEStribute.openapi.yaml",
+    )
+)
+CACHE_DIR = user_cache_dir()
+
+
+def load_spec(
+    path: str = SPEC_PATH,
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> Dict:
+    """
+    Loads and parses the OpenAPI specification.
+
+    The parsed specification is stored as JSON in `cache_dir`, keyed by a
+    hash of the specification's contents, so that further processes, e.g.,
+    additional server workers, can skip parsing YAML. Mapping keys are
+    converted to strings, as in JSON, whether or not a cached copy is used.
+    Cache files are written atomically; if they cannot be read or written,
+    e.g., on read-only file systems, the specification is parsed instead.
+    Cached files are only used if `cache_dir` is private to the current user
+    (see `TEStribute.utils.paths.private_dir()`).
+
+    Parsed specifications are also kept in memory. As callers may modify the
+    specification, e.g., connexion resolves references in place, every call
+    returns a copy.
+
+    :param path: Path to OpenAPI specification in YAML format.
+    :param cache_dir: Directory for parsed specifications; if `None`, parsed
+            specifications are not cached on disk.
+
+    :return: Specification in dictionary form.
+    """
+    return deepcopy(_load_spec(path=path, cache_dir=cache_dir))
+
+
+@lru_cache(maxsize=None)
+def _load_spec(
+    path: str,
+    cache_dir: Optional[str],
+) -> Dict:
+    """
+    Loads and parses the OpenAPI specification; see `load_spec()`. The
+    returned dictionary is shared and must not be modified.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+
+    # Load cached specification
+    cache_file: Optional[str] = None
+    if cache_dir is not None:
+        cache_dir = private_dir(cache_dir)
+    if cache_dir is not None:
+        cache_file = os.path.join(
+            cache_dir,
+            f"openapi.{sha256(content).hexdigest()}.json",
+        )
+        try:
+            with open(cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    # Parse specification
+    try:
+        data = json.dumps(yaml.safe_load(content))
+    except TypeError:
+        logger.debug(
+            f"Specification '{path}' is not representable as JSON; not "
+            "cached."
+        )
+        return yaml.safe_load(content)
+    if cache_file is not None:
+        _write_atomic(path=cache_file, data=data)
+    return json.loads(data)
+
+
+def _write_atomic(
+    path: str,
+    data: str,
+) -> None:
+    """
+    Writes data to a file such that readers never see partial contents.
+    Errors are logged and otherwise ignored.
+
+    :param path: Path to file.
+    :param data: File contents.
+    """
+    tmp_path: Optional[str] = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with NamedTemporaryFile(
+            mode="w",
+            dir=os.path.dirname(path),
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            tmp_path = f.name
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"Could not write file '{path}': {e}")
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+@lru_cache(maxsize=None)
+def get_validator(
+    name: str,
+    path: str = SPEC_PATH,
+) -> Draft4Validator:
+    """
+    Returns a validator for a schema in the `components` section of the
+    OpenAPI specification. Validators are compiled once and reused.
+
+    :param name: Name of the schema, e.g., 'ServiceCombination'.
+    :param path: Path to OpenAPI specification in YAML format.
+
+    :return: JSON schema validator.
+
+    :raises KeyError: No schema with the specified name available.
+    """
+    components = _load_spec(path=path, cache_dir=CACHE_DIR)["components"]
+    if name not in components["schemas"]:
+        raise KeyError(f"No schema '{name}' in specification '{path}'.")
+    return Draft4Validator({
+        "$ref": f"#/components/schemas/{name}",
+        "components": components,
+    })
+
+
+def should_validate(
+    mode: str = "full",
+    sample_rate: float = 1.0,
+) -> bool:
+    """
+    Decides whether a response is to be validated.
+
+    :param mode: One of 'full' (validate every response), 'sampled' (validate
+            a random subset of responses) or 'off' (do not validate).
+    :param sample_rate: Fraction of responses to validate in mode 'sampled'.
+
+    :raises ValueError: Unknown validation mode.
+    """
+    if mode == "full":
+        return True
+    if mode == "sampled":
+        return random() < sample_rate
+    if mode == "off":
+        return False
+    raise ValueError(
+        f"Unknown validation mode '{mode}'; expected one of: "
+        f"{', '.join(VALIDATION_MODES)}."
+    )
+
+
+class CompiledResponseValidator(ResponseValidator):
+    """
+    Connexion response validator that compiles the schema of each response
+    type once rather than for every response and that validates all, a sample
+    of or none of the responses, depending on class attributes `mode` and
+    `sample_rate`. Use `response_validator()` to obtain a configured class.
+    """
+    mode: str = "full"
+    sample_rate: float = 1.0
+
+    def __init__(self, *args, **kwargs) -> None:
+        super(CompiledResponseValidator, self).__init__(*args, **kwargs)
+        self._body_validators: Dict[
+            Tuple[str, str], ResponseBodyValidator
+        ] = {}
+
+    def validate_response(self, data, status_code, headers, url) -> bool:
+        """
+        Validates response body, if selected for validation, against the
+        schema declared in the specification.
+        """
+        if not should_validate(mode=self.mode, sample_rate=self.sample_rate):
+            return True
+        content_type = headers.get("Content-Type", self.mimetype)
+        content_type = content_type.rsplit(";", 1)[0]
+        key = (str(status_code), content_type)
+        if key not in self._body_validators:
+            response_schema = self.operation.response_schema(*key)
+            if not self.is_json_schema_compatible(response_schema):
+                return super(
+                    CompiledResponseValidator,
+                    self,
+                ).validate_response(data, status_code, headers, url)
+            self._body_validators[key] = ResponseBodyValidator(
+                response_schema,
+                validator=self.validator,
+            )
+        try:
+            self._body_validators[key].validate_schema(
+                self.operation.json_loads(data),
+                url,
+            )
+        except ValidationError as e:
+            raise NonConformingResponseBody(message=str(e))
+        return True
+
+
+def response_validator(
+    mode: str = "full",
+    sample_rate: float = 1.0,
+) -> Type[CompiledResponseValidator]:
+    """
+    Returns response validator class for use in a Connexion validator map.
+
+    :param mode: One of 'full', 'sampled' or 'off'; see `should_validate()`.
+    :param sample_rate: Fraction of responses to validate in mode 'sampled'.
+
+    :raises ValueError: Unknown validation mode or sample rate out of range.
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(
+            f"Unknown validation mode '{mode}'; expected one of: "
+            f"{', '.join(VALIDATION_MODES)}."
+        )
+    if not 0 <= sample_rate <= 1:
+        raise ValueError(
+            f"Sample rate must be between 0 and 1, got {sample_rate}."
+        )
+    return type(
+        "CompiledResponseValidator",
+        (CompiledResponseValidator,),
+        {"mode": mode, "sample_rate": sample_rate},
+    )
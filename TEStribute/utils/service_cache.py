@@ -0,0 +1,570 @@
+"""
+Caches of responses of external services (TES task info, DRS object
+metadata, currency exchange rates, IP geolocation and DNS) with pluggable
+backends: in-process (`memory`), an SQLite database shared by the processes
+on a host (`sqlite`), or a key-value store speaking the Redis protocol that is
+shared by all replicas (`redis`).
+
+Entries are stored in a compact, versioned format: a two-byte header (format
+version and encoding) followed by JSON, zlib-compressed if that makes it
+smaller. Keys include the format version, such that replicas running
+different versions do not read each other's entries.
+"""
+from abc import (ABC, abstractmethod)
+from functools import lru_cache
+from hashlib import blake2b
+from itertools import count
+import json
+import logging
+import os
+import sqlite3
+from threading import local
+from time import (monotonic, time)
+from typing import (Any, Callable, Dict, Mapping, Optional, Tuple)
+import zlib
+
+from TEStribute.metrics import CACHE_REQUESTS
+from TEStribute.models import (DrsObject, TaskInfo)
+from TEStribute.utils.cache import TTLCache
+from TEStribute.utils.paths import (private_dir, user_cache_dir)
+
+logger = logging.getLogger("TEStribute")
+
+# Serialization format
+FORMAT_VERSION = 1
+_PLAIN = 0
+_ZLIB = 1
+_COMPRESS_MIN_BYTES = 256
+
+# Time-to-live (in seconds) of entries of each cache if not configured; TES
+# task info and DRS object metadata may differ between users and over time and
+# are therefore not cached by default
+DEFAULT_TTL = {
+    "tes_task_info": 0,
+    "drs_objects": 0,
+    "exchange_rates": 3600,
+    "geolocation": 86400,
+    "dns": 300,
+}
+
+
+class CacheError(Exception):
+    """Cache backend unavailable or failed."""
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Serializes a JSON-compatible value; other values, e.g., timestamps, are
+    converted to strings.
+    """
+    data = json.dumps(value, separators=(",", ":"), default=str).encode()
+    if len(data) >= _COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data)
+        if len(compressed) < len(data):
+            return bytes((FORMAT_VERSION, _ZLIB)) + compressed
+    return bytes((FORMAT_VERSION, _PLAIN)) + data
+
+
+def loads(data: bytes) -> Any:
+    """
+    Deserializes a value serialized with `dumps()`.
+
+    :raises ValueError: Data is corrupt or of a different format version.
+    """
+    if len(data) < 2 or data[0] != FORMAT_VERSION:
+        raise ValueError("Unsupported format version.")
+    if data[1] == _ZLIB:
+        try:
+            return json.loads(zlib.decompress(data[2:]))
+        except zlib.error as e:
+            raise ValueError(f"Corrupt entry: {e}")
+    if data[1] == _PLAIN:
+        return json.loads(data[2:])
+    raise ValueError(f"Unsupported encoding: {data[1]}")
+
+
+class Backend(ABC):
+    """
+    Stores serialized values by key for a limited time. After an error, a
+    backend is not used for `retry_interval` seconds, such that an unavailable
+    store does not delay every lookup. Subclasses implement `_get()`, `_set()`
+    and `_delete()`.
+    """
+    name = "backend"
+    retry_interval: float = 10
+
+    def __init__(self) -> None:
+        self._retry_at = 0.0
+
+    def get(
+        self,
+        key: str,
+    ) -> Optional[bytes]:
+        """
+        Returns the value stored for `key`, or `None` if there is no such
+        entry or if it has expired.
+
+        :raises CacheError: Backend unavailable.
+        """
+        return self._call(self._get, key)
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: float,
+    ) -> None:
+        """
+        Stores `value` for `key` for `ttl` seconds.
+
+        :raises CacheError: Backend unavailable.
+        """
+        self._call(self._set, key, value, ttl)
+
+    def delete(
+        self,
+        key: str,
+    ) -> None:
+        """
+        Removes the entry for `key`, if present.
+
+        :raises CacheError: Backend unavailable.
+        """
+        self._call(self._delete, key)
+
+    def _call(
+        self,
+        method: Callable,
+        *args: Any,
+    ) -> Any:
+        if self._retry_at > monotonic():
+            raise CacheError(f"Cache backend '{self.name}' unavailable.")
+        try:
+            return method(*args)
+        except (CacheError, OSError, sqlite3.Error) as e:
+            self._retry_at = monotonic() + self.retry_interval
+            logger.warning(
+                f"Cache backend '{self.name}' failed; not used for the next "
+                f"{self.retry_interval} seconds. Original error message: "
+                f"{type(e).__name__}: {e}"
+            )
+            raise CacheError(str(e)) from e
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]:
+        """Returns the unexpired value stored for `key`, if any."""
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        """Stores `value` for `key` for `ttl` seconds."""
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """Removes the entry for `key`, if present."""
+
+
+class MemoryBackend(Backend):
+    """
+    Stores entries in the memory of the current process; when full, the least
+    recently used entry is evicted.
+    """
+    name = "memory"
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+    ) -> None:
+        """
+        :param maxsize: Maximum number of entries.
+        """
+        super().__init__()
+        self._entries = TTLCache(
+            name="service",
+            maxsize=maxsize,
+            record_metrics=False,
+        )
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    def _delete(self, key: str) -> None:
+        self._entries.delete(key)
+
+
+class SQLiteBackend(Backend):
+    """
+    Stores entries in an SQLite database that is shared by all processes
+    using the same file. Expired entries are removed, and entries closest to
+    expiry evicted beyond `maxsize` entries, every `purge_interval` writes.
+    """
+    name = "sqlite"
+    purge_interval = 100
+
+    def __init__(
+        self,
+        path: str,
+        maxsize: int = 4096,
+        timeout: float = 0.5,
+    ) -> None:
+        """
+        :param path: Path to database file; created if it does not exist.
+                The directory holding it must be private to the current user,
+                see `TEStribute.utils.paths.private_dir()`; `~` is expanded.
+        :param maxsize: Maximum number of entries (approximate).
+        :param timeout: Time (in seconds) to wait for a lock on the database.
+        """
+        super().__init__()
+        self.path = os.path.expanduser(path)
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._local = local()
+        self._writes = count(1)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns connection of the current thread; connections are not shared
+        with threads or forked processes.
+        """
+        if getattr(self._local, "pid", None) != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            if private_dir(directory) is None:
+                raise CacheError(
+                    f"Directory '{directory}' of cache database is not "
+                    "available or not private."
+                )
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, expires REAL NOT NULL, "
+                "value BLOB NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_expires "
+                "ON entries (expires)"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires > ?",
+            (key, time()),
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO entries (key, expires, value) "
+            "VALUES (?, ?, ?)",
+            (key, time() + ttl, value),
+        )
+        if next(self._writes) % self.purge_interval == 0:
+            self.purge(connection)
+
+    def _delete(self, key: str) -> None:
+        self._connection().execute(
+            "DELETE FROM entries WHERE key = ?",
+            (key,),
+        )
+
+    def purge(
+        self,
+        connection: Optional[sqlite3.Connection] = None,
+    ) -> None:
+        """
+        Removes expired entries and evicts the entries closest to expiry
+        beyond `maxsize` entries.
+        """
+        if connection is None:
+            connection = self._connection()
+        connection.execute("DELETE FROM entries WHERE expires <= ?", (time(),))
+        connection.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+            "ORDER BY expires "
+            "LIMIT max(0, (SELECT count(*) FROM entries) - ?))",
+            (self.maxsize,),
+        )
+
+
+class RedisBackend(Backend):
+    """
+    Stores entries in a key-value store speaking the Redis protocol, e.g.,
+    Redis or Valkey, that is shared by all replicas. Expiry and eviction are
+    left to the store. Requires the optional package `redis` (install extra
+    `TEStribute[redis]`).
+    """
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        timeout: float = 0.5,
+    ) -> None:
+        """
+        :param url: URL of the store, as accepted by `redis.Redis.from_url()`,
+                e.g., `redis://[[user]:password@]host[:port][/db]` or
+                `rediss://...` for TLS.
+        :param timeout: Time (in seconds) after which connection attempts and
+                commands fail.
+
+        :raises ImportError: Package `redis` is not installed.
+        :raises ValueError: Invalid URL.
+        """
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError(
+                "Cache backend 'redis' requires package 'redis'; install it "
+                "with `pip install TEStribute[redis]`."
+            ) from e
+        self._errors = (redis.exceptions.RedisError,)
+        self.timeout = timeout
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            retry_on_timeout=False,
+            protocol=2,  # RESP2 is spoken by all stores, incl. Redis < 6
+        )
+
+    def _command(self, method: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs client method; errors of the client are raised as `CacheError`.
+        """
+        try:
+            return method(*args, **kwargs)
+        except self._errors as e:
+            raise CacheError(f"{type(e).__name__}: {e}") from e
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._command(self._client.get, key)
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        self._command(
+            self._client.set,
+            key,
+            value,
+            px=max(1, int(ttl * 1000)),
+        )
+
+    def _delete(self, key: str) -> None:
+        self._command(self._client.delete, key)
+
+
+class ServiceCache:
+    """
+    Cache of one kind of service responses, stored in a (shared) backend.
+    """
+    def __init__(
+        self,
+        name: str,
+        backend: Backend,
+        ttl: float,
+        prefix: str = "testribute",
+        encode: Optional[Callable[[Any], Any]] = None,
+        decode: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """
+        :param name: Name of the cache; used in keys and as a label for
+                metrics.
+        :param backend: Backend storing the entries.
+        :param ttl: Time-to-live of entries, in seconds; nothing is cached if
+                zero or less.
+        :param prefix: Prefix of keys, e.g., to separate deployments sharing a
+                store.
+        :param encode: Function converting values into JSON-compatible
+                objects; values are stored as they are if not specified.
+        :param decode: Function converting stored objects back into values.
+        """
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.encode = encode
+        self.decode = decode
+
+    def key(
+        self,
+        *parts: Any,
+    ) -> str:
+        """
+        Returns key for an entry identified by JSON-compatible `parts`. Parts
+        are hashed, such that keys are short and do not reveal, e.g., access
+        tokens.
+        """
+        digest = blake2b(
+            json.dumps(parts, separators=(",", ":"), default=str).encode(),
+            digest_size=16,
+        ).hexdigest()
+        return f"{self.prefix}:{FORMAT_VERSION}:{self.name}:{digest}"
+
+    def get(
+        self,
+        *parts: Any,
+    ) -> Any:
+        """
+        Returns value cached for `parts`, or `None` if there is none or the
+        backend is unavailable.
+        """
+        if self.ttl <= 0:
+            return None
+        key = self.key(*parts)
+        try:
+            data = self.backend.get(key)
+        except CacheError:
+            CACHE_REQUESTS.labels(self.name, "error").inc()
+            return None
+        if data is not None:
+            try:
+                value = loads(data)
+                if self.decode is not None:
+                    value = self.decode(value)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(
+                    f"Unreadable entry in cache '{self.name}' removed. "
+                    f"Original error message: {type(e).__name__}: {e}"
+                )
+                try:
+                    self.backend.delete(key)
+                except CacheError:
+                    pass
+            else:
+                CACHE_REQUESTS.labels(self.name, "hit").inc()
+                return value
+        CACHE_REQUESTS.labels(self.name, "miss").inc()
+        return None
+
+    def set(
+        self,
+        value: Any,
+        *parts: Any,
+    ) -> None:
+        """Caches `value` for `parts`, unless the backend is unavailable."""
+        if self.ttl <= 0:
+            return
+        try:
+            self.backend.set(
+                self.key(*parts),
+                dumps(value if self.encode is None else self.encode(value)),
+                ttl=self.ttl,
+            )
+        except CacheError:
+            pass
+
+    def fetch(
+        self,
+        fetch: Callable[[], Any],
+        *parts: Any,
+    ) -> Any:
+        """
+        Returns value cached for `parts` or, if there is none, calls `fetch`
+        and caches its result. Empty results, e.g., `None` returned for
+        unavailable services, are not cached.
+        """
+        value = self.get(*parts)
+        if value is None:
+            value = fetch()
+            if value:
+                self.set(value, *parts)
+        return value
+
+
+class ServiceCaches:
+    """
+    Caches of all kinds of service responses, sharing one backend.
+    """
+    def __init__(
+        self,
+        backend: Backend,
+        ttl: Mapping[str, float] = {},
+        prefix: str = "testribute",
+    ) -> None:
+        """
+        :param backend: Backend storing the entries of all caches.
+        :param ttl: Time-to-live of entries (in seconds), by cache; see
+                `DEFAULT_TTL` for cache names and defaults.
+        :param prefix: Prefix of keys.
+        """
+        self.backend = backend
+        ttls: Dict[str, float] = dict(DEFAULT_TTL, **ttl)
+
+        def cache(
+            name: str,
+            encode: Optional[Callable[[Any], Any]] = None,
+            decode: Optional[Callable[[Any], Any]] = None,
+        ) -> ServiceCache:
+            return ServiceCache(
+                name=name,
+                backend=backend,
+                ttl=ttls[name],
+                prefix=prefix,
+                encode=encode,
+                decode=decode,
+            )
+
+        self.tes_task_info = cache(
+            "tes_task_info",
+            encode=TaskInfo.to_dict,
+            decode=TaskInfo.from_dict,
+        )
+        self.drs_objects = cache(
+            "drs_objects",
+            encode=DrsObject.to_dict,
+            decode=DrsObject.from_dict,
+        )
+        self.exchange_rates = cache("exchange_rates")
+        self.geolocation = cache("geolocation")
+        self.dns = cache("dns")
+
+
+@lru_cache(maxsize=None)
+def get_service_caches(
+    backend: str = "memory",
+    ttl: Tuple[Tuple[str, float], ...] = (),
+    prefix: str = "testribute",
+    maxsize: int = 4096,
+    path: str = os.path.join(user_cache_dir(), "cache.sqlite"),
+    url: str = "redis://localhost:6379/0",
+    timeout: float = 0.5,
+) -> ServiceCaches:
+    """
+    Returns service caches, shared by all calls with the same arguments.
+
+    :param backend: One of 'memory', 'sqlite' or 'redis'.
+    :param ttl: Pairs of cache names and time-to-live of entries (in
+            seconds); see `DEFAULT_TTL`.
+    :param prefix: Prefix of keys.
+    :param maxsize: Maximum number of entries (backends 'memory' and
+            'sqlite').
+    :param path: Path to database file (backend 'sqlite').
+    :param url: URL of the key-value store (backend 'redis').
+    :param timeout: Time (in seconds) after which operations fail (backends
+            'sqlite' and 'redis').
+
+    :raises ValueError: Unknown backend or invalid URL.
+    """
+    store: Backend
+    if backend == "memory":
+        store = MemoryBackend(maxsize=maxsize)
+    elif backend == "sqlite":
+        store = SQLiteBackend(path=path, maxsize=maxsize, timeout=timeout)
+    elif backend == "redis":
+        store = RedisBackend(url=url, timeout=timeout)
+    else:
+        raise ValueError(
+            f"Unknown cache backend '{backend}'; expected 'memory', 'sqlite' "
+            "or 'redis'."
+        )
+    return ServiceCaches(backend=store, ttl=dict(ttl), prefix=prefix)
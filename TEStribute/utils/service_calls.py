@@ -6,22 +6,16 @@ Functions that interact with external services.
 #       responses against schemata
 # TODO: DRS and TES clients: Add authorization header to service calls
 from collections import defaultdict
+from functools import partial
 from itertools import combinations
 import logging
 from typing import (Dict, Iterable, List, Optional)
 
-from bravado.exception import HTTPNotFound
-import drs_client
-from forex_python.bitcoin import BtcConverter
-from forex_python.converter import CurrencyRates
-from geopy.distance import geodesic
-from ip2geotools.databases.noncommercial import DbIpCity
-from ip2geotools.errors import InvalidRequestError
 from requests.exceptions import ConnectionError, HTTPError, MissingSchema
 from simplejson.errors import JSONDecodeError
-import tes_client
 
 from TEStribute.errors import ResourceUnavailableError
+from TEStribute.metrics import observe_outbound
 from TEStribute.models import (
     AccessMethod,
     AccessMethodType,
@@ -34,9 +28,18 @@ from TEStribute.models import (
     ResourceRequirements,
     TaskInfo,
 )
+from TEStribute.utils.pricing import (
+    estimate_task_info,
+    PriceSheets,
+    split_by_price_sheet,
+)
+from TEStribute.utils.service_cache import ServiceCaches
 
 logger = logging.getLogger("TEStribute")
 
+# NOTE: Clients for external services (and their dependencies, e.g., Bravado)
+# are slow to import; they are therefore imported only on first use
+
 
 def fetch_drs_objects_metadata(
     drs_uris: Iterable[str],
@@ -44,6 +47,7 @@ def fetch_drs_objects_metadata(
     jwt: Optional[str] = None,
     timeout: float = 3,
     check_results: bool = True,
+    caches: Optional[ServiceCaches] = None,
 ) -> Dict[str, Dict[str, DrsObject]]:
     """
     Returns access information for an iterable object of DRS identifiers
@@ -58,6 +62,8 @@ def fetch_drs_objects_metadata(
             have the same size and checksums.
     :param timeout: Time (in seconds) after which an unsuccessful connection
             attempt to the DRS should be terminated.
+    :param caches: Caches of service responses; metadata of objects found in
+            cache `drs_objects` is not fetched again.
 
     :return: Dict of dicts of DRS object identifers in `object_ids` (keys outer
             dictionary) and DRS root URIs in `drs_uris` (keys inner
@@ -77,13 +83,28 @@ def fetch_drs_objects_metadata(
     # Iterate over DRS instances
     for drs_uri in drs_uris:
 
-        # Fetch object metadata at current DRS instance
-        metadata = _fetch_drs_objects_metadata(
-            *object_ids,
-            uri=drs_uri,
-            jwt=jwt,
-            timeout=timeout,
-        )
+        # Look up cached object metadata
+        metadata = {}
+        missing = list(object_ids)
+        if caches is not None:
+            for object_id in object_ids:
+                cached = caches.drs_objects.get(drs_uri, object_id, jwt)
+                if cached is not None:
+                    metadata[object_id] = cached
+            missing = [i for i in object_ids if i not in metadata]
+
+        # Fetch remaining object metadata at current DRS instance
+        if missing:
+            fetched = _fetch_drs_objects_metadata(
+                *missing,
+                uri=drs_uri,
+                jwt=jwt,
+                timeout=timeout,
+            )
+            if caches is not None:
+                for object_id, drs_object in fetched.items():
+                    caches.drs_objects.set(drs_object, drs_uri, object_id, jwt)
+            metadata.update(fetched)
 
         # Add metadata for each object to results container, if available
         if metadata:
@@ -92,64 +113,64 @@ def fetch_drs_objects_metadata(
                     drs_uri: metadata[object_id]
                 })
 
-        # Check whether any object is unavailable
-        if check_results:
+    # Check whether any object is unavailable
+    if check_results:
 
-            # Check availability of objects
-            for object_id in object_ids:
-                if object_id not in result_dict:
+        # Check availability of objects
+        for object_id in object_ids:
+            if object_id not in result_dict:
+                raise ResourceUnavailableError(
+                    f"Services cannot be ranked. Object '{object_id}' is "
+                    "not available at any of the specified DRS instances."
+                )
+
+        # Check for consistency of object sizes
+        for object_id, locations in result_dict.items():
+            obj_sizes: List[float] = []
+            for metadata in locations.values():
+                try:
+                    obj_sizes.append(metadata.size)  # type: ignore
+                except AttributeError:
                     raise ResourceUnavailableError(
-                        f"Services cannot be ranked. Object '{object_id}' is "
-                        "not available at any of the specified DRS instances."
+                        "Services cannot be ranked. No size information "
+                        f"for object '{object_id}' available."
                     )
+            if len(set(obj_sizes)) > 1:
+                raise ResourceUnavailableError(
+                    f"Services cannot be ranked. Object '{object_id}' "
+                    "has different sizes across different DRS "
+                    f"instances: {set(obj_sizes)}"
+                )
 
-            # Check for consistency of object sizes
-            for object_id, locations in result_dict.items():
-                obj_sizes: List[float] = []
-                for metadata in locations.values():
-                    try:
-                        obj_sizes.append(metadata.size)  # type: ignore
-                    except AttributeError:
-                        raise ResourceUnavailableError(
-                            "Services cannot be ranked. No size information "
-                            f"for object '{object_id}' available."
-                        )
-                if len(set(obj_sizes)) > 1:
+        # Check for consistency of object checksums
+        for object_id, locations in result_dict.items():
+            object_checksums: Dict[ChecksumType, List[str]] = {}
+            for metadata in locations.values():
+                try:
+                    for checksum in metadata.checksums:  # type: ignore
+                        if checksum.type in object_checksums:
+                            object_checksums[checksum.type].append(
+                                checksum.checksum
+                            )
+                        else:
+                            object_checksums[checksum.type] = [
+                                checksum.checksum
+                            ]
+                except AttributeError:
                     raise ResourceUnavailableError(
-                        f"Services cannot be ranked. Object '{object_id}' "
-                        "has different sizes across different DRS "
-                        f"instances: {set(obj_sizes)}"
+                        "Services cannot be ranked. No checksum "
+                        f"available for object '{object_id}'."
+                    )
+            for checksum_type, checksums in object_checksums.items():
+                if len(set(checksums)) > 1:
+                    raise ResourceUnavailableError(
+                        "Services cannot be ranked. Object "
+                        f"'{object_id}' has different "
+                        f"{checksum_type.value} checksums across "
+                        f"different DRS instances: {set(checksums)}"
                     )
 
-            # Check for consistency of object checksums
-            for object_id, locations in result_dict.items():
-                object_checksums: Dict[ChecksumType, List[str]] = {}
-                for metadata in locations.values():
-                    try:
-                        for checksum in metadata.checksums:  # type: ignore
-                            if checksum.type in object_checksums:
-                                object_checksums[checksum.type].append(
-                                    checksum.checksum
-                                )
-                            else:
-                                object_checksums[checksum.type] = [
-                                    checksum.checksum
-                                ]
-                    except AttributeError:
-                        raise ResourceUnavailableError(
-                            "Services cannot be ranked. No checksum "
-                            f"available for object '{object_id}'."
-                        )
-                for checksum_type, checksums in object_checksums.items():
-                    if len(set(checksums)) > 1:
-                        raise ResourceUnavailableError(
-                            "Services cannot be ranked. Object "
-                            f"'{object_id}' has different "
-                            f"{checksum_type.value} checksums across "
-                            f"different DRS instances: {set(checksums)}"
-                        )
-
-        # Return results
+    # Return results
     return result_dict
 
 
@@ -175,15 +196,19 @@ def _fetch_drs_objects_metadata(
             instances will be omitted from the dictionary. In case of a
             connection error at any point, an empty dictionary is returned.
     """
+    from bravado.exception import (HTTPError as ServiceError, HTTPNotFound)
+    import drs_client
+
     # Initialize results container
     objects_metadata: Dict[str, DrsObject] = {}
 
     # Establish connection with DRS; handle exceptions
     try:
-        client = drs_client.Client(
-            url=uri,
-            jwt=jwt,
-        )
+        with observe_outbound("drs", uri, "client"):
+            client = drs_client.Client(
+                url=uri,
+                jwt=jwt,
+            )
     except TimeoutError:
         logger.warning(
             f"DRS unavailable: connection attempt to DRS '{uri}' timed out."
@@ -205,10 +230,11 @@ def _fetch_drs_objects_metadata(
     # Fetch metadata for every object; handle exceptions
     for object_id in ids:
         try:
-            metadata = client.getObject(
-                object_id=object_id,
-                timeout=timeout,
-            )._as_dict()
+            with observe_outbound("drs", uri, "getObject"):
+                metadata = client.getObject(
+                    object_id=object_id,
+                    timeout=timeout,
+                )._as_dict()
         except HTTPNotFound:  # type: ignore
             logger.debug(
                 f"File '{object_id}' is not available on DRS '{uri}'."
@@ -220,6 +246,12 @@ def _fetch_drs_objects_metadata(
                 f"out."
             )
             continue
+        except ServiceError as e:
+            logger.warning(
+                f"DRS '{uri}' returned an error for object '{object_id}': "
+                f"{e}"
+            )
+            continue
 
         # Generate list of AccessMethods
         access_methods: List[AccessMethod] = []
@@ -265,11 +297,17 @@ def fetch_tes_task_info(
     jwt: Optional[str] = None,
     timeout: float = 3,
     check_results: bool = True,
+    price_sheets: Optional[PriceSheets] = None,
+    caches: Optional[ServiceCaches] = None,
 ) -> Dict[str, TaskInfo]:
     """
     Given a set of resource requirements, returns queue time, cost estimates
     and related parameters at the specified TES instances.
 
+    If `price_sheets` are specified, estimates for TES instances with a known
+    price sheet are computed locally; only the remaining TES instances are
+    asked for a quote.
+
     :param tes_uris: List (or other iterable object) of root URIs of TES
             instances.
     :param resource_requirements: Dict of compute resource requirements of the
@@ -280,25 +318,61 @@ def fetch_tes_task_info(
             for at least one TES instance.
     :param timeout: Time (in seconds) after which an unsuccessful connection
             attempt to the DRS should be terminated.
+    :param price_sheets: `PriceSheets` object with unit prices of TES
+            instances.
+    :param caches: Caches of service responses; TES instances with task info
+            in cache `tes_task_info` are not asked again.
 
     :return: Dict of TES URIs in `tes_uris` (keys) and a dictionary containing
              queue time and cost estimates/rates (values) as defined in the
             `tesTaskInfo` model of the modified TES specifications in the
             `mock-TES` repository: https://github.com/elixir-europe/mock-TES
     """
+    # Compute estimates locally where unit prices are known
+    tes_uris = list(tes_uris)
+    known, unknown = split_by_price_sheet(
+        tes_uris=tes_uris,
+        price_sheets=price_sheets,
+    )
+    estimates = estimate_task_info(
+        price_sheets=known,
+        resource_requirements=resource_requirements,
+    )
+    if price_sheets is not None:
+        logger.debug(
+            f"Computed task info for {len(estimates)} TES instance(s) from "
+            f"price sheets; requesting quotes from {len(unknown)} TES "
+            f"instance(s)."
+        )
+
     # Initialize results container
     result_dict = {}
 
     # Iterate over TES instances
     for uri in tes_uris:
 
-        # Fetch task info at current TES instance
-        task_info = _fetch_tes_task_info(
+        # Use local estimate, if available
+        if uri in estimates:
+            result_dict[uri] = estimates[uri]
+            continue
+
+        # Fetch task info at current TES instance, unless cached
+        fetch = partial(
+            _fetch_tes_task_info,
             uri=uri,
             resource_requirements=resource_requirements,
             jwt=jwt,
             timeout=timeout,
         )
+        if caches is None:
+            task_info = fetch()
+        else:
+            task_info = caches.tes_task_info.fetch(
+                fetch,
+                uri,
+                resource_requirements.to_dict(),
+                jwt,
+            )
 
         # If available, add task info to results container
         if task_info:
@@ -338,12 +412,16 @@ def _fetch_tes_task_info(
             `mock-TES` repository: https://github.com/elixir-europe/mock-TES
 
     """
+    from bravado.exception import (HTTPError as ServiceError, HTTPNotFound)
+    import tes_client
+
     # Establish connection with TES; handle exceptions
     try:
-        client = tes_client.Client(
-            url=uri,
-            jwt=jwt
-        )
+        with observe_outbound("tes", uri, "client"):
+            client = tes_client.Client(
+                url=uri,
+                jwt=jwt
+            )
     except TimeoutError:
         logger.warning(
             f"TES unavailable: connection attempt to '{uri}' timed out."
@@ -363,16 +441,23 @@ def _fetch_tes_task_info(
 
     # Fetch task info; handle exceptions
     try:
-        task_info = client.getTaskInfo(
-            timeout=timeout,
-            **resource_requirements.to_dict(),
-        )._as_dict()
+        with observe_outbound("tes", uri, "getTaskInfo"):
+            task_info = client.getTaskInfo(
+                timeout=timeout,
+                **resource_requirements.to_dict(),
+            )._as_dict()
     except TimeoutError:
         logger.warning(
             f"Connection attempt to TES {uri} timed out. TES "
             f"unavailable. Skipped."
         )
         return None
+    except ServiceError as e:
+        logger.warning(
+            f"TES unavailable: TES '{uri}' returned an error. Skipped. "
+            f"Original error message: {e}"
+        )
+        return None
 
     # Generate TaskInfo object
     task_info_obj = TaskInfo(
@@ -406,11 +491,34 @@ def fetch_exchange_rates(
     currencies: Iterable[str],
     amount: float = 1.0,
     bitcoin_proxy: str = 'USD',
+    caches: Optional[ServiceCaches] = None,
 ) -> Dict[str, Optional[float]]:
     """
     Given an amount and a base currency, returns the exchange rates for a set
     of currencies.
+
+    :param caches: Caches of service responses; rates are looked up in and
+            added to cache `exchange_rates`.
     """
+    if caches is not None:
+        currencies = list(currencies)
+        return caches.exchange_rates.fetch(
+            partial(
+                fetch_exchange_rates,
+                target_currency=target_currency,
+                currencies=currencies,
+                amount=amount,
+                bitcoin_proxy=bitcoin_proxy,
+            ),
+            target_currency,
+            sorted(currencies),
+            amount,
+            bitcoin_proxy,
+        )
+
+    from forex_python.bitcoin import BtcConverter
+    from forex_python.converter import CurrencyRates
+
     rates: Dict[str, Optional[float]] = {}
     rates_select: Dict[str, Optional[float]] = {}
     is_bitcoin: bool = False
@@ -426,7 +534,8 @@ def fetch_exchange_rates(
 
     # Get rates for base currency
     try:
-        rates = converter.get_rates(target_currency)
+        with observe_outbound("exchange_rates", "forex", "get_rates"):
+            rates = converter.get_rates(target_currency)
     except ConnectionError:
         logger.warning(
             "Could not connect to currency rates service. No exchange rates"
@@ -436,10 +545,11 @@ def fetch_exchange_rates(
 
     # Get Bitcoin rate for base currency
     try:
-        rates['BTC'] = converter_btc.convert_to_btc(
-            amount=amount,
-            currency=bitcoin_proxy
-        )
+        with observe_outbound("exchange_rates", "forex", "convert_to_btc"):
+            rates['BTC'] = converter_btc.convert_to_btc(
+                amount=amount,
+                currency=bitcoin_proxy
+            )
     except ConnectionError:
         logger.warning(
             "Could not connect to currency rates service. No BitCoin "
@@ -467,10 +577,13 @@ def fetch_exchange_rates(
 
 def ip_distance(
     *args: str,
+    caches: Optional[ServiceCaches] = None,
 ) -> Dict[str, Dict]:
     """
     :param *args: IP addresses of the form '8.8.8.8' without schema and
             suffixes.
+    :param caches: Caches of service responses; locations are looked up in and
+            added to cache `geolocation`.
 
     :return: A dictionary with a key for each IP address, pointing to a
             dictionary containing city, region and country information for the
@@ -484,21 +597,40 @@ def ip_distance(
     if not args:
         raise ValueError("Expected at least one URI or IP address.")
 
+    from geopy.distance import geodesic
+    from ip2geotools.databases.noncommercial import DbIpCity
+    from ip2geotools.errors import InvalidRequestError
+
+    def locate(ip: str) -> Optional[Dict]:
+        try:
+            with observe_outbound("geolocation", "db-ip", "get"):
+                location = DbIpCity.get(ip, api_key="free")
+        except InvalidRequestError:
+            return None
+        return {
+            "city": location.city,
+            "region": location.region,
+            "country": location.country,
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+        }
+
     # Locate IPs
     ip_locs = {}
     for ip in args:
-        try:
-            ip_locs[ip] = DbIpCity.get(ip, api_key="free")
-        except InvalidRequestError:
-            pass
-    print(ip_locs)
+        if caches is None:
+            location = locate(ip)
+        else:
+            location = caches.geolocation.fetch(partial(locate, ip), ip)
+        if location is not None:
+            ip_locs[ip] = location
 
     # Compute distances
     dist = {}
     for keys in combinations(ip_locs.keys(), r=2):
         dist[(keys[0], keys[1])] = geodesic(
-            (ip_locs[keys[0]].latitude, ip_locs[keys[0]].longitude),
-            (ip_locs[keys[1]].latitude, ip_locs[keys[1]].longitude),
+            (ip_locs[keys[0]]["latitude"], ip_locs[keys[0]]["longitude"]),
+            (ip_locs[keys[1]]["latitude"], ip_locs[keys[1]]["longitude"]),
         ).km
         dist[(keys[1], keys[0])] = dist[(keys[0], keys[1])]
 
@@ -506,9 +638,9 @@ def ip_distance(
     res = {}
     for key, value in ip_locs.items():
         res[key] = {
-            "city": value.city,
-            "region": value.region,
-            "country": value.country,
+            "city": value["city"],
+            "region": value["region"],
+            "country": value["country"],
         }
     res["distances"] = dist  # type: ignore
 
@@ -0,0 +1,80 @@
+"""
+Coalescing of concurrent, identical function calls.
+"""
+import logging
+from threading import (Event, Lock)
+from typing import (Any, Callable, Dict, Hashable, Optional, Tuple)
+
+logger = logging.getLogger("TEStribute")
+
+
+class _Call:
+    """
+    A call in flight whose result is shared by all callers.
+    """
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.callers = 1
+
+
+class SingleFlight:
+    """
+    Ensures that for any given key only one call of a function is in flight at
+    a time. Callers that arrive while a call for the same key is in flight wait
+    for that call to finish and receive its result (or exception) rather than
+    executing the function themselves.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+    ) -> Tuple[Any, bool]:
+        """
+        Executes `fn` unless a call for `key` is already in flight.
+
+        :param key: Key identifying identical calls.
+        :param fn: Callable without arguments.
+
+        :return: Tuple of the result of `fn` and a boolean indicating whether
+                the result is shared with other callers.
+
+        :raises: Any exception raised by `fn`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.callers += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        # Wait for call in flight
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        # Execute call and share result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        if call.callers > 1:
+            logger.debug(
+                f"Result of call shared with {call.callers - 1} other "
+                "caller(s)."
+            )
+        return call.result, call.callers > 1
@@ -0,0 +1,180 @@
+"""
+Production entry point for the TEStribute API service. Runs the app in a
+multi-worker Gunicorn server.
+"""
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+from typing import (Any, Dict, Mapping, Optional)
+
+from connexion import App
+from gunicorn.app.base import BaseApplication
+
+from TEStribute.config import config_parser
+
+logger = logging.getLogger("TEStribute")
+
+
+def create_app() -> App:
+    """
+    Returns configured app instance; can be used as app factory with any WSGI
+    server, e.g., `gunicorn 'TEStribute.wsgi:create_app()'`.
+    """
+    from TEStribute.server import (app, configure_app)
+    return configure_app(app)
+
+
+class Server(BaseApplication):
+    """
+    Gunicorn application serving the TEStribute app.
+    """
+    def __init__(
+        self,
+        options: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        self.options = options if options is not None else {}
+        super(Server, self).__init__()
+
+    def load_config(self) -> None:
+        """Pass options on to Gunicorn."""
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self) -> App:
+        """Load app; called once in the master process if `preload_app` is
+        set, otherwise once in every worker process."""
+        return create_app()
+
+
+def _child_exit(server, worker) -> None:
+    """Discard metrics of a worker process that has exited."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def clear_metrics_dir() -> None:
+    """
+    Removes metrics left behind in `PROMETHEUS_MULTIPROC_DIR` by earlier
+    server runs, e.g., of a restarted container, which would otherwise be
+    added to those of the current run; creates the directory if it does not
+    exist. Must be called before any worker process is started.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(
+                f"Stale metrics file '{path}' could not be removed. Original "
+                f"error message: {type(e).__name__}: {e}"
+            )
+
+
+def get_options(
+    config: Mapping,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    """
+    Compiles Gunicorn options from the config and command-line arguments;
+    the latter take precedence.
+
+    :param config: App config.
+    :param args: Parsed command-line arguments.
+
+    :return: Dictionary of Gunicorn settings.
+    """
+    options = dict(config.get("wsgi", {}))
+    options["bind"] = f"{config['server']['host']}:{config['server']['port']}"
+    for key, value in vars(args).items():
+        if value is not None:
+            options[key] = value
+    # With multiple threads per worker, one worker per CPU core suffices to
+    # keep the cores busy; more workers only add memory and contention
+    if not options.get("workers"):
+        cpus = multiprocessing.cpu_count()
+        options["workers"] = (
+            cpus if (options.get("threads") or 1) > 1 else cpus * 2 + 1
+        )
+    options["child_exit"] = _child_exit
+    return options
+
+
+def main() -> None:
+    """
+    Parse CLI arguments and serve app.
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve the TEStribute API with a multi-worker server."
+    )
+    parser.add_argument(
+        "-b", "--bind",
+        help="address to bind to; default: host and port from config",
+        type=str,
+        metavar="HOST:PORT",
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        help=(
+            "number of worker processes; default: CPU cores if workers have "
+            "multiple threads, otherwise 2 x CPU cores + 1"
+        ),
+        type=int,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "--threads",
+        help="number of threads per worker process",
+        type=int,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "--keepalive",
+        help="seconds to wait for requests on a keep-alive connection",
+        type=int,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "--timeout",
+        help="seconds after which silent workers are restarted",
+        type=int,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "--no-preload",
+        help="load app in each worker rather than once before forking",
+        action="store_false",
+        dest="preload_app",
+        default=None,
+    )
+    args = parser.parse_args()
+
+    # Compile server options
+    options = get_options(config=config_parser(), args=args)
+    if (
+        options["workers"] > 1 and
+        "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+    ):
+        logger.warning(
+            "Environment variable 'PROMETHEUS_MULTIPROC_DIR' is not set. "
+            "Metrics at endpoint '/metrics' will only cover the worker "
+            "process that happens to serve the request."
+        )
+
+    # Run server
+    clear_metrics_dir()
+    logger.info(
+        f"Serving app at '{options['bind']}' with {options['workers']} "
+        f"workers and {options.get('threads', 1)} threads per worker."
+    )
+    Server(options=options).run()
+
+
+if __name__ == "__main__":
+    main()
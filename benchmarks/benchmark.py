@@ -3,10 +3,15 @@
 """
 Module to setup TES and DRS instances as mentioned in config yaml file
 """
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from hashlib import sha256
+import json
 import logging
+import math
 import os
-import sys
-from typing import (Dict, List)
+from typing import (Any, Callable, Dict, List, Optional, Tuple)
 import yaml
 
 from bravado.exception import HTTPInternalServerError
@@ -19,36 +24,188 @@ from TEStribute.log import log_yaml
 from TEStribute.log import setup_logger
 from TEStribute import rank_services
 
+from standins import (Behaviours, offline_lookups, StandIns)
+
 logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
 
 
-def setup_drs(uri: str, objects: Dict):
+# File recording the configs of services set up by previous runs
+STATE_FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    ".setup_state.json",
+)
+
+
+class SetupError(Exception):
+    """Raised if a service was not updated as requested."""
+
+
+@lru_cache(maxsize=None)
+def _drs_client(uri: str) -> drs_cli:
+    """Returns shared DRS client for a URI."""
+    return drs_cli(uri)
+
+
+@lru_cache(maxsize=None)
+def _tes_client(uri: str) -> tes_cli:
+    """Returns shared TES client for a URI."""
+    return tes_cli(uri)
+
+
+def _config_hash(kind: str, uri: str, values) -> str:
+    """Returns hash of the config of a service."""
+    return sha256(
+        json.dumps(
+            [kind, uri, values],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
+def setup_drs(uri: str, objects: List[Dict]):
     """
     :param uri: sting uri for the service to be updated
     :param objects: list of objects that the db should be populated with
+    :raises SetupError: not all objects are available after the update
     """
-    drs_client = drs_cli(uri)
-    drs_client.updateDatabaseObjects(
-        objects=objects,
+    available = _drs_client(uri).updateDatabaseObjects(
+        objects=objects or [],
         clear_db=True
     )
+    missing = {obj["id"] for obj in objects or []} - set(available or [])
+    if missing:
+        raise SetupError(
+            "Objects not available after update: "
+            f"{', '.join(sorted(missing))}"
+        )
 
 
 def setup_tes(uri: str, costs: Dict):
     """
     :param uri: sting uri for the service to be updated
     :param costs: values that the config should be populated with
+    :raises SetupError: config returned by the service differs from `costs`
     """
-    tes_client = tes_cli(uri)
-    tes_client.updateTaskInfoConfig(
+    config = _tes_client(uri).updateTaskInfoConfig(
         costs["currency"],
         costs["unit_costs"]
     )
+    unit_costs = getattr(config, "unit_costs", None) or {}
+    if isinstance(unit_costs, dict):
+        returned = unit_costs
+    else:
+        returned = {
+            name: getattr(unit_costs, name, None) for name in unit_costs
+        }
+    mismatches = [
+        name for name, value in costs["unit_costs"].items()
+        if returned.get(name) is None or
+        not math.isclose(returned[name], value, rel_tol=1e-9)
+    ]
+    if getattr(config, "currency", None) != costs["currency"]:
+        mismatches.insert(0, "currency")
+    if mismatches:
+        raise SetupError(
+            f"Config not updated as requested: {', '.join(mismatches)}"
+        )
+
+
+def setup_services(
+    services: List[Tuple[str, str, Any]],
+    jobs: int = 16,
+    state_file: Optional[str] = STATE_FILE,
+    force: bool = False,
+) -> Dict[str, List[str]]:
+    """
+    Sets up services concurrently; services whose config has not changed
+    since they were last set up successfully are skipped.
+
+    :param services: tuples of kind ('drs' or 'tes'), URI and config
+    :param jobs: number of services to set up concurrently
+    :param state_file: file recording the configs of services set up by
+        previous runs; no services are skipped if `None`
+    :param force: set up all services, regardless of `state_file`
+    :return: URIs of services by outcome ('updated', 'unchanged', 'failed')
+    """
+    state: Dict[str, str] = {}
+    if state_file is not None and os.path.exists(state_file):
+        try:
+            with open(state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"Could not read setup state file '{state_file}'.")
+
+    setups: Dict[str, Callable] = {"drs": setup_drs, "tes": setup_tes}
+    outcomes: Dict[str, List[str]] = {
+        "updated": [],
+        "unchanged": [],
+        "failed": [],
+    }
+    pending = {}
+    for kind, uri, values in services:
+        config_hash = _config_hash(kind, uri, values)
+        if not force and state_file is not None and \
+                state.get(uri) == config_hash:
+            outcomes["unchanged"].append(uri)
+        else:
+            pending[uri] = (kind, values, config_hash)
+
+    def setup(uri: str) -> None:
+        kind, values, _ = pending[uri]
+        logger.debug(f"Configuring {kind.upper()} instance '{uri}'...")
+        setups[kind](uri, values)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {uri: executor.submit(setup, uri) for uri in pending}
+        for uri, future in futures.items():
+            try:
+                future.result()
+            except HTTPInternalServerError:
+                logger.warning(
+                    f"Update endpoint at service '{uri}' could not be "
+                    "accessed."
+                )
+            except SetupError as e:
+                logger.warning(f"Service '{uri}' not set up correctly: {e}")
+            except Exception:
+                logger.warning(
+                    f"No changes made to default config for service '{uri}'."
+                )
+            else:
+                outcomes["updated"].append(uri)
+                state[uri] = pending[uri][2]
+                continue
+            outcomes["failed"].append(uri)
+            state.pop(uri, None)
+
+    if state_file is not None:
+        with open(state_file, "w") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+    logger.info(
+        f"Services set up: {len(outcomes['updated'])} updated, "
+        f"{len(outcomes['unchanged'])} unchanged, "
+        f"{len(outcomes['failed'])} failed"
+    )
+    return outcomes
 
 
-def setup_env(benchmarks: List[str]):
+def setup_env(
+    benchmarks: List[str],
+    standins: Optional[StandIns] = None,
+    jobs: int = 16,
+    state_file: Optional[str] = STATE_FILE,
+    force: bool = False,
+):
     """
     :param config_id: id of file in the benchmarks folder according to which the config's of services should be setup
+    :param standins: if specified, services are replaced by local stand-ins
+    :param jobs: number of services to set up concurrently
+    :param state_file: file recording the configs of services set up by
+        previous runs, which are skipped if unchanged; not used with
+        `standins`
+    :param force: set up all services, even if unchanged
     :return: Dict that can be passed as input to the TEStribute.rank_server() directly
     """
 
@@ -73,46 +230,31 @@ def setup_env(benchmarks: List[str]):
         failonmissingfiles=True,
     )
     logger.debug(f"Benchmark config loaded.")
+    if standins is not None:
+        setup_dict = standins.add_scenario(setup_dict)
+        logger.debug(f"Services replaced by stand-ins at {standins.base_url}")
 
-    # Setup DRS instances
-    # TODO: Validate successful update
-    try:
-        for uri, values in setup_dict["drs_uris"].items():
-            try:
-                logger.debug(f"Configuring DRS instance '{uri}'...")
-                setup_drs(uri, values)
-            except HTTPInternalServerError:
-                logger.warning(
-                    f"Update endpoint at service '{uri}' could not be accessed."
-                )
-            except Exception:
-                logger.warning(
-                    f"No changes made to default config for service '{uri}'."
-                )
-    except KeyError:
-        logger.warning(
-            "No DRS URIs provided. No changed made to default configs."
-        )
+        # Stand-ins start out empty, so previous setups do not apply
+        state_file = None
 
-    # Setup TES instances
-    # TODO: Validate successful update
-    try:
-        for uri, values in setup_dict["tes_uris"].items():
-            try:
-                logger.debug(f"Configuring TES instance '{uri}'...")
-                setup_tes(uri, values)
-            except HTTPInternalServerError:
-                logger.warning(
-                    f"Update endpoint at service '{uri}' could not be accessed."
-                )
-            except Exception:
-                logger.warning(
-                    f"No changes made to default config for service '{uri}'."
-                )
-    except KeyError:
-        logger.warning(
-            "No DRS URIs provided. No changed made to default configs."
+    # Setup DRS and TES instances
+    services: List[Tuple[str, str, Any]] = []
+    for kind, key in (("drs", "drs_uris"), ("tes", "tes_uris")):
+        if not setup_dict.get(key):
+            logger.warning(
+                f"No {kind.upper()} URIs provided. No changes made to default "
+                "configs."
+            )
+            continue
+        services.extend(
+            (kind, uri, values) for uri, values in setup_dict[key].items()
         )
+    setup_services(
+        services=services,
+        jobs=jobs,
+        state_file=state_file,
+        force=force,
+    )
 
     return {
         "object_ids": setup_dict["object_ids"],
@@ -125,7 +267,60 @@ def setup_env(benchmarks: List[str]):
 
 
 if __name__ == "__main__":
-    benchmarks = sys.argv[1:]
-    params = setup_env(benchmarks=benchmarks)
-    # TODO: alternatively use HTTP service
-    rank_services(**params)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "benchmarks",
+        nargs="+",
+        help="benchmark files in the 'benchmarks' folder; merged in order",
+    )
+    parser.add_argument(
+        "--standins",
+        action="store_true",
+        help="replace TES and DRS instances by local stand-ins",
+    )
+    parser.add_argument(
+        "-b", "--behaviour",
+        type=str,
+        default=None,
+        help=(
+            "YAML file with latencies, error and timeout rates of stand-ins; "
+            "implies '--standins'"
+        ),
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=16,
+        help="number of services to set up concurrently",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="set up all services, even if unchanged since the last run",
+    )
+    args = parser.parse_args()
+    standins = None
+    if args.standins or args.behaviour is not None:
+        behaviours = {}
+        if args.behaviour is not None:
+            with open(args.behaviour) as f:
+                behaviours = yaml.safe_load(f)
+        standins = StandIns(behaviours=Behaviours.from_dict(behaviours))
+        standins.start()
+    try:
+        params = setup_env(
+            benchmarks=args.benchmarks,
+            standins=standins,
+            jobs=args.jobs,
+            force=args.force,
+        )
+        # TODO: alternatively use HTTP service
+        if standins is None:
+            rank_services(**params)
+        else:
+            # Stand-ins are used offline, so external lookups are replaced too
+            with offline_lookups():
+                rank_services(**params)
+    finally:
+        if standins is not None:
+            standins.stop()
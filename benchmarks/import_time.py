@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark for the time it takes to import TEStribute and to start the CLI
+"""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+from timeit import default_timer
+from typing import (Dict, List)
+
+from TEStribute.log import setup_logger
+
+logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
+
+# Modules to import
+MODULES = ["TEStribute", "TEStribute.cli"]
+
+# Dependencies that must only be imported when first used
+DEFERRED = [
+    "bravado",
+    "connexion",
+    "drs_client",
+    "forex_python",
+    "geopy",
+    "ip2geotools",
+    "numpy",
+    "tes_client",
+]
+
+
+def import_time(module: str) -> Dict:
+    """
+    Imports a module in a fresh interpreter.
+
+    :param module: name of the module to import
+    :return: dict with the cumulative import time of the module in seconds
+        and the names of all top-level packages that were imported
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    cumulative = 0
+    packages = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [field.strip() for field in line[12:].split("|")]
+        if not fields[1].isdigit():
+            continue
+        packages.add(fields[2].split(".")[0])
+        if fields[2] == module:
+            cumulative = int(fields[1])
+    return {
+        "seconds": cumulative / 1e6,
+        "packages": sorted(packages),
+    }
+
+
+def cli_time() -> float:
+    """
+    :return: wall time, in seconds, of running `testribute --version`
+    """
+    start = default_timer()
+    subprocess.run(
+        [sys.executable, "-m", "TEStribute", "--version"],
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return default_timer() - start
+
+
+def run(
+    repeats: int = 5,
+) -> Dict:
+    """
+    :param repeats: number of times each measurement is taken
+    :return: dict of best times in seconds and of deferred dependencies that
+        were imported nonetheless
+    """
+    results: Dict = {"seconds": {}, "deferred_imported": {}}
+    for module in MODULES:
+        runs = [import_time(module) for _ in range(repeats)]
+        results["seconds"][f"import {module}"] = min(
+            run["seconds"] for run in runs
+        )
+        imported: List[str] = [
+            package for package in DEFERRED if package in runs[0]["packages"]
+        ]
+        if imported:
+            results["deferred_imported"][module] = imported
+    results["seconds"]["testribute --version"] = min(
+        cli_time() for _ in range(repeats)
+    )
+    for name, seconds in results["seconds"].items():
+        logger.info(f"{name}: best {seconds:.3f} s ({repeats} runs)")
+    for module, imported in results["deferred_imported"].items():
+        logger.warning(
+            f"Importing '{module}' also imports: {', '.join(imported)}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-r", "--repeats",
+        type=int,
+        default=5,
+        help="number of runs per measurement",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="write results to this JSON file",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help=(
+            "exit with a non-zero status if dependencies that should be "
+            "deferred are imported"
+        ),
+    )
+    args = parser.parse_args()
+    results = run(repeats=args.repeats)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.check and results["deferred_imported"]:
+        sys.exit(1)
@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+
+"""
+Load test for endpoint `POST /rank-services`: serves the API against local
+stand-in services and drives it with concurrent clients, either closed-loop
+(a fixed number of clients sending requests back to back) or open-loop
+(requests sent at a fixed rate, regardless of responses)
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+from threading import (local, Lock, Thread)
+from time import (monotonic, sleep)
+from typing import (Dict, List, Optional, Tuple)
+
+import requests
+
+from TEStribute.config import ENV_CONFIG
+from TEStribute.log import setup_logger
+
+logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
+
+# Settings of servers started by the load test
+HOST = "127.0.0.1"
+ENDPOINT = "/rank-services"
+PRODUCTION_CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "TEStribute",
+    "config",
+    "production.yaml",
+)
+
+# Sample of a single request: send time, latency (in seconds) and outcome,
+# i.e., the HTTP status code or the name of a client-side error
+Sample = Tuple[float, float, str]
+
+
+def _free_port() -> int:
+    """Returns a currently unused TCP port."""
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _serve_gunicorn(
+    options: Dict,
+    response_cache: bool,
+) -> None:
+    """Serves the API with Gunicorn; runs in a forked child process."""
+    import TEStribute.server as server
+    from TEStribute.wsgi import Server
+
+    server.config["response_cache"]["enabled"] = response_cache
+    Server(options=options).run()
+
+
+def start_server(
+    kind: str = "gunicorn",
+    workers: int = 2,
+    threads: int = 8,
+    worker_class: str = "gthread",
+    response_cache: bool = True,
+    config: Optional[str] = PRODUCTION_CONFIG,
+    ready_timeout: float = 60,
+):
+    """
+    Starts the API service on a free local port, with the settings of config
+    file `config` overriding the defaults; by default, those used in
+    production.
+
+    With `kind` 'gunicorn', the service runs in a forked process, so that
+    the stand-ins and lookup substitutes set up before are inherited by all
+    workers. With `kind` 'werkzeug', it runs in a thread of this process.
+
+    :return: tuple of the base URL of the service and a function that stops
+        it
+    """
+    if config:
+        os.environ[ENV_CONFIG] = config
+    port = _free_port()
+    if kind == "gunicorn":
+        options = {
+            "bind": f"{HOST}:{port}",
+            "workers": workers,
+            "threads": threads,
+            "worker_class": worker_class,
+            "preload_app": True,
+            "graceful_timeout": 5,
+            "loglevel": "warning",
+        }
+        process = multiprocessing.get_context("fork").Process(
+            target=_serve_gunicorn,
+            args=(options, response_cache),
+            daemon=False,
+        )
+        process.start()
+
+        def stop() -> None:
+            process.terminate()
+            process.join()
+    else:
+        from werkzeug.serving import make_server
+
+        from standins.server import _QuietRequestHandler
+        import TEStribute.server as server
+        from TEStribute.wsgi import create_app
+
+        server.config["response_cache"]["enabled"] = response_cache
+        wsgi_server = make_server(
+            host=HOST,
+            port=port,
+            app=create_app().app,
+            threaded=True,
+            request_handler=_QuietRequestHandler,
+        )
+        thread = Thread(target=wsgi_server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop() -> None:
+            wsgi_server.shutdown()
+            thread.join()
+
+    # Wait until service accepts connections
+    deadline = monotonic() + ready_timeout
+    while True:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            break
+        except OSError:
+            if monotonic() > deadline:
+                stop()
+                raise RuntimeError("API service did not start in time.")
+            sleep(0.1)
+    return f"http://{HOST}:{port}", stop
+
+
+def request_bodies(
+    scenario: Dict,
+    distinct: int = 0,
+    seed: int = 1,
+) -> List[Dict]:
+    """
+    Returns request bodies that differ in mode only, so that responses are
+    not shared via the response cache or request coalescing unless intended.
+
+    :param scenario: scenario with stand-in URIs
+    :param distinct: number of distinct request bodies; every request is
+        distinct if 0
+    :param seed: seed for random number generator
+    """
+    rng = random.Random(seed)
+    body = {
+        "object_ids": scenario["object_ids"],
+        "drs_uris": list(scenario["drs_uris"]),
+        "tes_uris": list(scenario["tes_uris"]),
+        "resource_requirements": scenario["resource_requirements"],
+    }
+    if distinct:
+        return [
+            dict(body, mode=(index + 1) / (distinct + 1))
+            for index in range(distinct)
+        ]
+    return [
+        dict(body, mode=round(rng.uniform(0.001, 0.999), 9))
+        for _ in range(10000)
+    ]
+
+
+class LoadGenerator:
+    """
+    Sends requests to the API service and records their latencies and
+    outcomes.
+    """
+    def __init__(
+        self,
+        url: str,
+        bodies: List[Dict],
+        timeout: float = 60,
+        headers: Optional[Dict] = None,
+    ) -> None:
+        """
+        :param url: base URL of the API service
+        :param bodies: request bodies, sent in turn
+        :param timeout: client-side timeout (in seconds)
+        :param headers: additional request headers, e.g., `Authorization`
+        """
+        self.url = f"{url.rstrip('/')}{ENDPOINT}"
+        self.bodies = bodies
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.samples: List[Sample] = []
+        self._lock = Lock()
+        self._local = local()
+        self._count = 0
+
+    def _body(self) -> Dict:
+        """Returns next request body."""
+        with self._lock:
+            self._count += 1
+            return self.bodies[self._count % len(self.bodies)]
+
+    def send(self, scheduled: Optional[float] = None) -> None:
+        """
+        Sends request and records sample; latencies are measured from the
+        scheduled send time, if specified, to account for client-side
+        queueing.
+        """
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        body = self._body()
+        start = monotonic() if scheduled is None else scheduled
+        try:
+            response = self._local.session.post(
+                self.url,
+                json=body,
+                headers=self.headers,
+                timeout=self.timeout,
+            )
+            outcome = str(response.status_code)
+        except requests.RequestException as e:
+            outcome = type(e).__name__
+        with self._lock:
+            self.samples.append((start, monotonic() - start, outcome))
+
+    def closed_loop(
+        self,
+        concurrency: int,
+        duration: float,
+    ) -> None:
+        """
+        Runs `concurrency` clients that send requests back to back for
+        `duration` seconds.
+        """
+        end = monotonic() + duration
+
+        def client() -> None:
+            while monotonic() < end:
+                self.send()
+
+        clients = [Thread(target=client) for _ in range(concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+
+    def open_loop(
+        self,
+        rate: float,
+        duration: float,
+        max_inflight: int = 256,
+        arrivals: str = "poisson",
+        seed: int = 1,
+    ) -> None:
+        """
+        Sends requests at `rate` requests per second for `duration` seconds,
+        with exponentially distributed ('poisson') or constant ('uniform')
+        inter-arrival times. Requests that would exceed `max_inflight`
+        concurrent requests are recorded as 'dropped'.
+        """
+        rng = random.Random(seed)
+        inflight = [0]
+        lock = Lock()
+
+        def send(scheduled: float) -> None:
+            try:
+                self.send(scheduled=scheduled)
+            finally:
+                with lock:
+                    inflight[0] -= 1
+
+        with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+            start = monotonic()
+            scheduled = start
+            while scheduled < start + duration:
+                if arrivals == "poisson":
+                    scheduled += rng.expovariate(rate)
+                else:
+                    scheduled += 1 / rate
+                delay = scheduled - monotonic()
+                if delay > 0:
+                    sleep(delay)
+                with lock:
+                    if inflight[0] >= max_inflight:
+                        self.samples.append((scheduled, 0.0, "dropped"))
+                        continue
+                    inflight[0] += 1
+                executor.submit(send, scheduled)
+
+
+def summarize(
+    samples: List[Sample],
+    start: float,
+    warmup: float = 0,
+) -> Dict:
+    """
+    Summarizes samples of requests sent after the warm-up period.
+
+    :param samples: samples recorded by `LoadGenerator`
+    :param start: time the load test started
+    :param warmup: duration (in seconds) of the warm-up period
+    :return: numbers of requests by outcome, throughput (successful requests
+        per second), error rate and latency percentiles (in seconds) of
+        successful requests
+    """
+    import numpy as np
+
+    measured = [sample for sample in samples if sample[0] >= start + warmup]
+    outcomes: Dict[str, int] = {}
+    for _, _, outcome in measured:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    latencies = [
+        latency for _, latency, outcome in measured if outcome == "200"
+    ]
+    elapsed = (
+        max(sent + latency for sent, latency, _ in measured) -
+        (start + warmup)
+    ) if measured else 0
+    percentiles = (
+        [float(p) for p in np.percentile(latencies, [50, 90, 95, 99])]
+        if latencies else [None] * 4
+    )
+    return {
+        "requests": len(measured),
+        "outcomes": outcomes,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0,
+        "error_rate": (
+            1 - len(latencies) / len(measured) if measured else 0
+        ),
+        "latency_sec": {
+            "p50": percentiles[0],
+            "p90": percentiles[1],
+            "p95": percentiles[2],
+            "p99": percentiles[3],
+            "max": max(latencies, default=None),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    group = parser.add_argument_group("API service")
+    group.add_argument(
+        "--server", choices=("gunicorn", "werkzeug"), default="gunicorn",
+        help="server to run the API service with",
+    )
+    group.add_argument(
+        "--url", type=str, default=None,
+        help=(
+            "test a running API service instead; it must be able to reach "
+            "the stand-ins, and exchange rates, DNS and geolocation are then "
+            "looked up online"
+        ),
+    )
+    group.add_argument("-w", "--workers", type=int, default=2,
+                       help="number of Gunicorn worker processes")
+    group.add_argument("--threads", type=int, default=8,
+                       help="number of threads per Gunicorn worker")
+    group.add_argument("--worker-class", type=str, default="gthread",
+                       help="Gunicorn worker class")
+    group.add_argument(
+        "--config", type=str, default=PRODUCTION_CONFIG,
+        help=(
+            "config file overriding the API service's default settings; "
+            "default: production settings"
+        ),
+    )
+    group.add_argument("--no-response-cache", action="store_false",
+                       dest="response_cache",
+                       help="disable the API service's response cache")
+
+    group = parser.add_argument_group("scenario")
+    group.add_argument(
+        "--scenario", nargs="+", default=None,
+        help="scenario files, merged in order; default: generated scenario",
+    )
+    group.add_argument("--tes", type=int, default=8,
+                       help="number of TES instances of generated scenario")
+    group.add_argument("--drs", type=int, default=4,
+                       help="number of DRS instances of generated scenario")
+    group.add_argument("--objects", type=int, default=2,
+                       help="number of objects of generated scenario")
+    group.add_argument("--replicas", type=str, default="1-2",
+                       help="replicas per object of generated scenario")
+    group.add_argument("-s", "--seed", type=int, default=1,
+                       help="seed for random number generators")
+    group.add_argument(
+        "-b", "--behaviour", type=str, default=None,
+        help="YAML file with latencies, error and timeout rates of stand-ins",
+    )
+    group.add_argument(
+        "--distinct", type=int, default=0,
+        help=(
+            "number of distinct request bodies (differing in mode); every "
+            "request is distinct if 0"
+        ),
+    )
+
+    group = parser.add_argument_group("load")
+    group.add_argument(
+        "-c", "--concurrency", type=int, default=8,
+        help="number of clients for closed-loop load",
+    )
+    group.add_argument(
+        "-r", "--rate", type=float, default=None,
+        help="requests per second for open-loop load; closed-loop if unset",
+    )
+    group.add_argument("--arrivals", choices=("poisson", "uniform"),
+                       default="poisson",
+                       help="inter-arrival times for open-loop load")
+    group.add_argument("--max-inflight", type=int, default=256,
+                       help="maximum concurrent requests for open-loop load")
+    group.add_argument("-d", "--duration", type=float, default=30,
+                       help="duration of load in seconds")
+    group.add_argument("--warmup", type=float, default=5,
+                       help="initial seconds excluded from results")
+    group.add_argument("--timeout", type=float, default=60,
+                       help="client-side request timeout in seconds")
+    group.add_argument("-o", "--output", type=str, default=None,
+                       help="write settings and results to this JSON file")
+    args = parser.parse_args()
+
+    import yaml
+
+    from scenarios import generate_scenario
+    from standins import (Behaviours, offline_lookups, StandIns)
+
+    logging.getLogger("TEStribute").setLevel(logging.ERROR)
+
+    # Set up stand-ins
+    behaviours = None
+    if args.behaviour is not None:
+        with open(args.behaviour) as f:
+            behaviours = yaml.safe_load(f)
+    if args.scenario:
+        import hiyapyco
+        scenario = hiyapyco.load(
+            args.scenario,
+            method=hiyapyco.METHOD_MERGE,
+            usedefaultyamlloader=True,
+            failonmissingfiles=True,
+        )
+    else:
+        scenario = generate_scenario(
+            n_tes=args.tes,
+            n_drs=args.drs,
+            n_objects=args.objects,
+            n_replicas=args.replicas,
+            seed=args.seed,
+        )
+    standins = StandIns(behaviours=Behaviours.from_dict(behaviours))
+    scenario = standins.add_scenario(scenario)
+
+    # Start API service; fork before stand-ins start serving from a thread
+    with offline_lookups():
+        if args.url is None:
+            url, stop = start_server(
+                kind=args.server,
+                workers=args.workers,
+                threads=args.threads,
+                worker_class=args.worker_class,
+                response_cache=args.response_cache,
+                config=args.config,
+            )
+        else:
+            url, stop = args.url, lambda: None
+        standins.start()
+        logger.info(f"Load testing API service at '{url}'")
+
+        # Generate load
+        generator = LoadGenerator(
+            url=url,
+            bodies=request_bodies(
+                scenario=scenario,
+                distinct=args.distinct,
+                seed=args.seed,
+            ),
+            timeout=args.timeout,
+        )
+        start = monotonic()
+        try:
+            if args.rate is None:
+                generator.closed_loop(
+                    concurrency=args.concurrency,
+                    duration=args.warmup + args.duration,
+                )
+            else:
+                generator.open_loop(
+                    rate=args.rate,
+                    duration=args.warmup + args.duration,
+                    max_inflight=args.max_inflight,
+                    arrivals=args.arrivals,
+                    seed=args.seed,
+                )
+        finally:
+            stop()
+            standins.stop()
+
+    # Report results
+    results = summarize(
+        samples=generator.samples,
+        start=start,
+        warmup=args.warmup,
+    )
+    latency = results["latency_sec"]
+    logger.info(
+        f"{results['requests']} requests, "
+        f"{results['throughput_rps']:.1f} requests/s, error rate "
+        f"{results['error_rate']:.1%}, outcomes {results['outcomes']}"
+    )
+    if latency["p50"] is not None:
+        logger.info(
+            f"Latency: p50 {latency['p50']:.3f} s, p90 {latency['p90']:.3f} "
+            f"s, p95 {latency['p95']:.3f} s, p99 {latency['p99']:.3f} s, max "
+            f"{latency['max']:.3f} s"
+        )
+    if args.output is not None:
+        settings = {
+            key: value for key, value in vars(args).items()
+            if key != "output"
+        }
+        settings["cpus"] = os.cpu_count()
+        with open(args.output, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+        logger.info(f"Results written to '{args.output}'")
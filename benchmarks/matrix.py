@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+
+"""
+Scaling benchmark: ranks synthetic scenarios against local stand-in services
+for every combination of numbers of TES instances, DRS instances, objects,
+replicas per object and modes, and compares results with a baseline
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import product
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+from time import perf_counter
+import tracemalloc
+from typing import (Dict, Iterable, List, Optional, Union)
+
+from TEStribute.log import setup_logger
+
+from scenarios import generate_scenario
+
+logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
+
+# Version of the results file format
+RESULTS_VERSION = 1
+
+# Metrics compared by `compare` and how to get them from a point
+METRICS = {
+    "p50": lambda point: point["latency_sec"]["p50"],
+    "p95": lambda point: point["latency_sec"]["p95"],
+    "p99": lambda point: point["latency_sec"]["p99"],
+    "rss": lambda point: point["rss_mb"]["peak"],
+    "traced": lambda point: (point.get("tracemalloc") or {}).get("peak_mb"),
+}
+
+
+def _mode(value: str) -> Union[float, str]:
+    """Parses mode from command line."""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _rss_mb() -> float:
+    """Returns peak resident set size of the current process, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _stage_seconds() -> Dict[str, float]:
+    """Returns total time spent in each ranking stage so far."""
+    from TEStribute.metrics import STAGE_DURATION
+
+    return {
+        sample.labels["stage"]: sample.value
+        for metric in STAGE_DURATION.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_sum")
+    }
+
+
+def _memory_report(
+    kwargs: Dict,
+    top: int = 10,
+) -> Dict:
+    """
+    Ranks services once with `tracemalloc` enabled.
+
+    :param kwargs: keyword arguments to `TEStribute.rank_services()`
+    :param top: number of source lines to report
+    :return: peak traced memory and memory still allocated while the
+        response is held (in MB), and the source lines that allocated most of
+        the latter
+    """
+    from TEStribute import rank_services
+
+    tracemalloc.start()
+    try:
+        response = rank_services(**kwargs)  # noqa: F841
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ))
+    return {
+        "peak_mb": peak / 2 ** 20,
+        "retained_mb": current / 2 ** 20,
+        "top": [
+            {
+                "site": f"{stat.traceback[0].filename}:"
+                        f"{stat.traceback[0].lineno}",
+                "size_mb": stat.size / 2 ** 20,
+                "blocks": stat.count,
+            } for stat in snapshot.statistics("lineno")[:top]
+        ],
+    }
+
+
+def point_id(params: Dict) -> str:
+    """Returns identifier of a benchmark point."""
+    return ",".join(f"{key}={value}" for key, value in params.items())
+
+
+def run_point(
+    params: Dict,
+    repeats: int = 10,
+    warmup: int = 1,
+    behaviours: Optional[Dict] = None,
+    memory_report: bool = False,
+) -> Dict:
+    """
+    Ranks a synthetic scenario repeatedly against local stand-ins.
+
+    :param params: keyword arguments to `scenarios.generate_scenario()`
+    :param repeats: number of measured runs
+    :param warmup: number of unmeasured runs before the measured ones
+    :param behaviours: latencies, errors and timeouts of stand-ins, as
+        accepted by `standins.Behaviours.from_dict()`
+    :param memory_report: add a `tracemalloc` report of an additional,
+        unmeasured run
+    :return: latency percentiles (in seconds), mean time per ranking stage,
+        peak RSS (in MB), numbers of service combinations and errors
+    """
+    import numpy as np
+
+    from standins import (Behaviours, offline_lookups, StandIns)
+    from TEStribute import rank_services
+
+    logging.getLogger("TEStribute").setLevel(logging.ERROR)
+    scenario = generate_scenario(**params)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    combinations = {"generated": 0, "ranked": 0}
+    with StandIns(behaviours=Behaviours.from_dict(behaviours)) as standins, \
+            offline_lookups():
+        scenario = standins.add_scenario(scenario)
+        kwargs = {
+            "jwt": scenario["jwt"] or None,
+            "object_ids": scenario["object_ids"],
+            "drs_uris": list(scenario["drs_uris"]),
+            "mode": scenario["mode"],
+            "resource_requirements": scenario["resource_requirements"],
+            "tes_uris": list(scenario["tes_uris"]),
+        }
+        rss_setup = _rss_mb()
+        for run in range(warmup + repeats):
+            if run == warmup:
+                stages_start = _stage_seconds()
+            start = perf_counter()
+            try:
+                response = rank_services(**kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if run >= warmup:
+                    errors[error] = errors.get(error, 0) + 1
+                continue
+            if run >= warmup:
+                latencies.append(perf_counter() - start)
+                combinations = {
+                    "generated": len(response.access_uri_combinations),
+                    "ranked": len(response.service_combinations_sorted),
+                }
+        stages_end = _stage_seconds()
+        rss_peak = _rss_mb()
+        report = None
+        if memory_report:
+            try:
+                report = _memory_report(kwargs)
+            except Exception as e:
+                logger.warning(f"Memory report failed: {e}")
+    percentiles = (
+        [float(p) for p in np.percentile(latencies, [50, 95, 99])]
+        if latencies else [None] * 3
+    )
+    return {
+        "id": point_id(params),
+        "params": params,
+        "runs": len(latencies),
+        "errors": errors,
+        "latency_sec": {
+            "p50": percentiles[0],
+            "p95": percentiles[1],
+            "p99": percentiles[2],
+            "mean": float(np.mean(latencies)) if latencies else None,
+            "min": min(latencies, default=None),
+            "max": max(latencies, default=None),
+        },
+        "stages_sec": {
+            stage: (seconds - stages_start.get(stage, 0)) / repeats
+            for stage, seconds in sorted(stages_end.items())
+        },
+        "combinations": combinations,
+        "rss_mb": {
+            "setup": rss_setup,
+            "peak": rss_peak,
+        },
+        "tracemalloc": report,
+    }
+
+
+def run(
+    tes: Iterable[int],
+    drs: Iterable[int],
+    objects: Iterable[int],
+    replicas: Iterable[int],
+    modes: Iterable[Union[float, str]],
+    repeats: int = 10,
+    warmup: int = 1,
+    behaviours: Optional[Dict] = None,
+    isolate: bool = True,
+    seed: int = 1,
+    memory_report: bool = False,
+) -> Dict:
+    """
+    Runs every combination of the specified parameters.
+
+    :param isolate: run every point in a fresh process, so that the peak RSS
+        of each point is measured independently
+    :param seed: seed for generating scenarios
+    :param memory_report: add a `tracemalloc` report to every point
+    :return: results, in the format written by the `run` command
+    """
+    points = []
+    context = multiprocessing.get_context("spawn")
+    for n_tes, n_drs, n_objects, n_replicas, mode in product(
+        tes, drs, objects, replicas, modes,
+    ):
+        params = {
+            "n_tes": n_tes,
+            "n_drs": n_drs,
+            "n_objects": n_objects,
+            "n_replicas": n_replicas,
+            "mode": mode,
+        }
+        kwargs: Dict = {
+            "params": dict(params, seed=seed),
+            "repeats": repeats,
+            "warmup": warmup,
+            "behaviours": behaviours,
+            "memory_report": memory_report,
+        }
+        if isolate:
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                point = executor.submit(run_point, **kwargs).result()
+        else:
+            point = run_point(**kwargs)
+        _log_point(point)
+        points.append(point)
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": {
+            "repeats": repeats,
+            "warmup": warmup,
+            "behaviours": behaviours,
+            "isolate": isolate,
+            "seed": seed,
+            "memory_report": memory_report,
+        },
+        "points": points,
+    }
+
+
+def _log_point(point: Dict) -> None:
+    """Logs summary of a benchmark point."""
+    latency = point["latency_sec"]
+    if not point["runs"]:
+        logger.error(f"{point['id']}: all runs failed: {point['errors']}")
+        return
+    logger.info(
+        f"{point['id']}: p50 {latency['p50']:.3f} s, p95 "
+        f"{latency['p95']:.3f} s, p99 {latency['p99']:.3f} s, peak RSS "
+        f"{point['rss_mb']['peak']:.0f} MB, "
+        f"{point['combinations']['ranked']} combinations, "
+        f"{sum(point['errors'].values())} errors"
+    )
+    report = point.get("tracemalloc")
+    if report:
+        logger.info(
+            f"{point['id']}: traced peak {report['peak_mb']:.1f} MB, "
+            f"{report['retained_mb']:.1f} MB retained by response; top sites:"
+        )
+        for stat in report["top"]:
+            logger.info(
+                f"    {stat['size_mb']:8.2f} MB {stat['blocks']:8d} blocks "
+                f"{stat['site']}"
+            )
+
+
+def compare(
+    baseline: Dict,
+    results: Dict,
+    metrics: Iterable[str] = ("p50", "p95", "p99", "rss", "traced"),
+    threshold: float = 0.1,
+    min_delta: float = 0.005,
+) -> List[str]:
+    """
+    Compares results with a baseline.
+
+    :param baseline: baseline results
+    :param results: results to check
+    :param metrics: keys of `METRICS` to compare
+    :param threshold: maximum tolerated relative increase of a metric
+    :param min_delta: minimum absolute increase of a metric (in seconds or
+        MB) to be considered a regression; avoids flagging noise
+    :return: descriptions of regressions; empty if there are none
+    """
+    for data in (baseline, results):
+        if data.get("version") != RESULTS_VERSION:
+            raise ValueError(
+                f"Unsupported results file version: {data.get('version')}"
+            )
+    regressions = []
+    baseline_points = {point["id"]: point for point in baseline["points"]}
+    for point in results["points"]:
+        base = baseline_points.get(point["id"])
+        if base is None:
+            logger.info(f"{point['id']}: not in baseline; skipped")
+            continue
+        if point["runs"] < base["runs"]:
+            regressions.append(
+                f"{point['id']}: {base['runs'] - point['runs']} more runs "
+                "failed than in baseline"
+            )
+        if point["combinations"] != base["combinations"]:
+            logger.warning(
+                f"{point['id']}: combinations changed from "
+                f"{base['combinations']} to {point['combinations']}"
+            )
+        for metric in metrics:
+            old = METRICS[metric](base)
+            new = METRICS[metric](point)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0
+            message = (
+                f"{point['id']}: {metric} {old:.3f} -> {new:.3f} "
+                f"({change:+.1%})"
+            )
+            if new - old > min_delta and change > threshold:
+                regressions.append(message)
+            else:
+                logger.info(message)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_run = commands.add_parser("run", help="run benchmark matrix")
+    parser_run.add_argument(
+        "--tes", type=int, nargs="+", default=[2, 8],
+        help="numbers of TES instances",
+    )
+    parser_run.add_argument(
+        "--drs", type=int, nargs="+", default=[2],
+        help="numbers of DRS instances",
+    )
+    parser_run.add_argument(
+        "--objects", type=int, nargs="+", default=[1, 2],
+        help="numbers of input objects",
+    )
+    parser_run.add_argument(
+        "--replicas", type=int, nargs="+", default=[1, 2],
+        help="numbers of DRS instances holding each object",
+    )
+    parser_run.add_argument(
+        "--modes", type=_mode, nargs="+", default=[0.5],
+        help="ranking modes, e.g., 0.5, cost, time or random",
+    )
+    parser_run.add_argument(
+        "-r", "--repeats", type=int, default=10,
+        help="number of measured runs per point",
+    )
+    parser_run.add_argument(
+        "-w", "--warmup", type=int, default=1,
+        help="number of unmeasured runs per point",
+    )
+    parser_run.add_argument(
+        "-b", "--behaviour", type=str, default=None,
+        help="YAML file with latencies, error and timeout rates of stand-ins",
+    )
+    parser_run.add_argument(
+        "-s", "--seed", type=int, default=1,
+        help="seed for generating scenarios",
+    )
+    parser_run.add_argument(
+        "--no-isolate", action="store_true",
+        help="run all points in this process; peak RSS is then cumulative",
+    )
+    parser_run.add_argument(
+        "--memory-report", action="store_true",
+        help="add tracemalloc report of an extra run to every point",
+    )
+    parser_run.add_argument(
+        "-o", "--output", type=str, default="matrix.json",
+        help="write results to this JSON file",
+    )
+
+    parser_compare = commands.add_parser(
+        "compare",
+        help="compare results with baseline; exit status 1 on regressions",
+    )
+    parser_compare.add_argument("baseline", help="baseline results file")
+    parser_compare.add_argument("results", help="results file to check")
+    parser_compare.add_argument(
+        "-m", "--metrics", nargs="+", choices=list(METRICS),
+        default=list(METRICS), help="metrics to compare",
+    )
+    parser_compare.add_argument(
+        "-t", "--threshold", type=float, default=0.1,
+        help="maximum tolerated relative increase of a metric",
+    )
+    parser_compare.add_argument(
+        "--min-delta", type=float, default=0.005,
+        help="minimum absolute increase (s or MB) flagged as regression",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        behaviours = None
+        if args.behaviour is not None:
+            import yaml
+            with open(args.behaviour) as f:
+                behaviours = yaml.safe_load(f)
+        results = run(
+            tes=args.tes,
+            drs=args.drs,
+            objects=args.objects,
+            replicas=args.replicas,
+            modes=args.modes,
+            repeats=args.repeats,
+            warmup=args.warmup,
+            behaviours=behaviours,
+            isolate=not args.no_isolate,
+            seed=args.seed,
+            memory_report=args.memory_report,
+        )
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to '{args.output}'")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.results) as f:
+            results = json.load(f)
+        regressions = compare(
+            baseline=baseline,
+            results=results,
+            metrics=args.metrics,
+            threshold=args.threshold,
+            min_delta=args.min_delta,
+        )
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        sys.exit(1 if regressions else 0)
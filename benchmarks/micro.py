@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmarks of the ranking core: times and traces memory allocations of
+the CPU-bound steps of `TEStribute.models.response.Response` on synthetic
+TES task info and DRS object metadata, without any network access
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import gc
+from itertools import product
+import json
+import logging
+import os
+import platform
+import random
+from statistics import median
+import timeit
+import tracemalloc
+from typing import (Callable, Dict, Iterator, List, Optional, Tuple)
+
+from TEStribute.log import setup_logger
+from TEStribute.models import (
+    AccessMethod,
+    AccessMethodType,
+    AccessUrl,
+    Checksum,
+    ChecksumType,
+    Costs,
+    Currency,
+    DrsObject,
+    ResourceRequirements,
+    ServiceCombination,
+    TaskInfo,
+)
+import TEStribute.models.request as rq
+import TEStribute.models.response as rs
+
+from standins import offline
+
+logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
+
+# Version of the results file format
+RESULTS_VERSION = 1
+
+
+def synthetic_inputs(
+    n_tes: int,
+    n_objects: int,
+    n_urls: int,
+    seed: int = 1,
+) -> Tuple[Dict[str, TaskInfo], Dict[str, Dict[str, DrsObject]]]:
+    """
+    Generates TES task info and DRS object metadata, as returned by
+    `fetch_tes_task_info()` and `fetch_drs_objects_metadata()`, for
+    `n_tes * n_urls ** n_objects` service combinations.
+
+    :param n_tes: number of TES instances
+    :param n_objects: number of input objects
+    :param n_urls: number of access URLs per object, each at a different DRS
+        instance
+    :param seed: seed for random number generator
+    :return: tuple of task info by TES URI and object metadata by object ID
+        and DRS URI
+    """
+    rng = random.Random(seed)
+    task_info = {
+        f"https://tes-{index:05d}.example.org/ga4gh/tes/v1/": TaskInfo(
+            estimated_compute_costs=Costs(
+                amount=rng.uniform(1, 100),
+                currency=Currency.EUR,
+            ),
+            estimated_storage_costs=Costs(
+                amount=rng.uniform(0.1, 10),
+                currency=Currency.EUR,
+            ),
+            unit_costs_data_transfer=Costs(
+                amount=rng.uniform(0.001, 0.1),
+                currency=Currency.EUR,
+            ),
+            estimated_queue_time_sec=rng.uniform(0, 3600),
+        ) for index in range(n_tes)
+    }
+    object_info: Dict[str, Dict[str, DrsObject]] = {}
+    for obj in range(n_objects):
+        object_id = f"obj-{obj:05d}"
+        size = rng.randint(2 ** 20, 2 ** 34)
+        object_info[object_id] = {
+            f"https://drs-{index:05d}.example.org/ga4gh/drs/v1/": DrsObject(
+                id=object_id,
+                size=size,
+                created="2020-01-01T00:00:00Z",
+                checksums=[
+                    Checksum(checksum=object_id, type=ChecksumType.md5),
+                ],
+                access_methods=[AccessMethod(
+                    type=AccessMethodType.https,
+                    access_url=AccessUrl(
+                        url=f"https://data-{index:05d}.example.org/{object_id}"
+                    ),
+                )],
+            ) for index in range(n_urls)
+        }
+    return task_info, object_info
+
+
+def make_response(
+    task_info: Dict[str, TaskInfo],
+    object_info: Dict[str, Dict[str, DrsObject]],
+    mode: float = 0.5,
+) -> rs.Response:
+    """
+    Returns a `Response` for synthetic inputs in the state reached after
+    fetching task info and object metadata, i.e., with access URI and
+    service combinations compiled, but without calling any services.
+    """
+    response = rs.Response.__new__(rs.Response)
+    response.warnings = []
+    response.request = rq.Request(
+        resource_requirements=ResourceRequirements(
+            cpu_cores=4,
+            disk_gb=10,
+            execution_time_sec=3600,
+            ram_gb=8,
+        ),
+        tes_uris=list(task_info),
+        object_ids=list(object_info),
+        drs_uris=sorted({
+            drs_uri for drs in object_info.values() for drs_uri in drs
+        }),
+        mode=mode,
+    )
+    response.target_currency = Currency.EUR
+    response.task_info = task_info
+    response.object_info = object_info
+    response.object_sizes = {
+        object_id: next(iter(drs.values())).size
+        for object_id, drs in object_info.items()
+    }
+    response.uris_per_object = None
+    response.caches = None
+    response.access_uri_combinations = response.get_access_uri_combinations(
+        task_info=task_info,
+        object_info=object_info,
+    )
+    response.service_combinations = [
+        ServiceCombination(
+            access_uris=access_uris,
+            cost_estimate=Costs(amount=-1, currency=Currency.EUR),
+            rank=-1,
+            time_estimate=-1,
+        ) for access_uris in response.access_uri_combinations
+    ]
+    response.service_combinations_sorted = response.service_combinations
+    return response
+
+
+@contextmanager
+def precomputed_lookups(response: rs.Response) -> Iterator[None]:
+    """
+    Replaces DNS and IP geolocation lookups of `get_distances()` with
+    precomputed results for all hosts of `response`, so that only the
+    processing of the lookup results is measured.
+    """
+    hosts = {
+        host: offline.gethostbyname(host)
+        for combination in response.access_uri_combinations
+        for host in (
+            rs.urlparse(uri).netloc for _, uri in combination.items()
+        )
+    }
+    distances = offline.ip_distance(*set(hosts.values()))
+    originals = (rs.gethostbyname, rs.ip_distance)
+    rs.gethostbyname = hosts.__getitem__  # type: ignore
+    rs.ip_distance = lambda *args, **kwargs: dict(distances)  # type: ignore
+    try:
+        yield
+    finally:
+        rs.gethostbyname, rs.ip_distance = originals  # type: ignore
+
+
+def benchmarks(
+    response: rs.Response,
+) -> Dict[str, Callable[[], object]]:
+    """
+    Returns the benchmarked steps, in the order in which they run when
+    ranking; `response` is expected to be prepared as by `make_response()`.
+    All steps can be repeated on the same instance.
+    """
+    return {
+        "get_access_uri_combinations": lambda: (
+            response.get_access_uri_combinations(
+                task_info=response.task_info,
+                object_info=response.object_info,
+            )
+        ),
+        "get_distances": response.get_distances,
+        "estimate_costs": response.estimate_costs,
+        "estimate_times": response.estimate_times,
+        "rank_combinations": response.rank_combinations,
+        "to_dict": response.to_dict,
+    }
+
+
+def measure(
+    function: Callable[[], object],
+    repeats: int = 5,
+    min_time: float = 0.2,
+) -> Dict:
+    """
+    Times a function and traces its memory allocations.
+
+    :param function: function to benchmark
+    :param repeats: number of timed repetitions, each running the function
+        as often as needed to take at least `min_time` seconds
+    :param min_time: minimum duration (in seconds) of a repetition
+    :return: best and median time per call (in seconds), and peak and
+        retained traced memory of a single call (in KiB)
+    """
+    timer = timeit.Timer(function)
+    number, duration = timer.autorange()
+    number = max(1, int(number * min_time / duration)) if duration else 1
+    times = [t / number for t in timer.repeat(repeat=repeats, number=number)]
+
+    # Trace allocations of a separate call, as tracing slows down execution
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        "calls": number * repeats,
+        "time_sec": {
+            "best": min(times),
+            "median": median(times),
+        },
+        "memory_kib": {
+            "peak": (peak - before) / 2 ** 10,
+            "retained": (current - before) / 2 ** 10,
+        },
+    }
+
+
+def run(
+    tes: List[int],
+    objects: List[int],
+    urls: List[int],
+    functions: Optional[List[str]] = None,
+    mode: float = 0.5,
+    repeats: int = 5,
+    min_time: float = 0.2,
+    seed: int = 1,
+) -> Dict:
+    """
+    Runs the benchmarks for every combination of the specified numbers of TES
+    instances, objects and access URLs per object.
+
+    :param functions: names of benchmarks to run; all if not specified
+    :return: results, in the format written by the command line interface
+    """
+    logging.getLogger("TEStribute").setLevel(logging.ERROR)
+    points = []
+    for n_tes, n_objects, n_urls in product(tes, objects, urls):
+        task_info, object_info = synthetic_inputs(
+            n_tes=n_tes,
+            n_objects=n_objects,
+            n_urls=n_urls,
+            seed=seed,
+        )
+        response = make_response(task_info, object_info, mode=mode)
+        with precomputed_lookups(response):
+            for name, function in benchmarks(response).items():
+                if functions and name not in functions:
+                    # Steps after `get_distances` depend on its results
+                    if name == "get_distances":
+                        function()
+                    continue
+                params = {
+                    "function": name,
+                    "n_tes": n_tes,
+                    "n_objects": n_objects,
+                    "n_urls": n_urls,
+                }
+                point = dict(
+                    id=",".join(f"{k}={v}" for k, v in params.items()),
+                    params=params,
+                    combinations=len(response.service_combinations),
+                    **measure(function, repeats=repeats, min_time=min_time),
+                )
+                logger.info(
+                    f"{name:<28} {point['combinations']:>9} combinations: "
+                    f"{point['time_sec']['best'] * 1e3:10.3f} ms, peak "
+                    f"{point['memory_kib']['peak']:10.1f} KiB, retained "
+                    f"{point['memory_kib']['retained']:10.1f} KiB"
+                )
+                points.append(point)
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": {
+            "mode": mode,
+            "repeats": repeats,
+            "min_time": min_time,
+            "seed": seed,
+        },
+        "points": points,
+    }
+
+
+def compare(
+    baseline: Dict,
+    results: Dict,
+) -> None:
+    """Logs speedups and memory changes of results relative to a baseline."""
+    for data in (baseline, results):
+        if data.get("version") != RESULTS_VERSION:
+            raise ValueError(
+                f"Unsupported results file version: {data.get('version')}"
+            )
+    baseline_points = {point["id"]: point for point in baseline["points"]}
+    for point in results["points"]:
+        base = baseline_points.get(point["id"])
+        if base is None:
+            continue
+        speedup = base["time_sec"]["best"] / point["time_sec"]["best"]
+        logger.info(
+            f"{point['id']}: {speedup:.2f}x speed, peak memory "
+            f"{base['memory_kib']['peak']:.1f} -> "
+            f"{point['memory_kib']['peak']:.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="numbers of TES instances")
+    parser.add_argument("--objects", type=int, nargs="+", default=[2],
+                        help="numbers of input objects")
+    parser.add_argument("--urls", type=int, nargs="+", default=[4],
+                        help="numbers of access URLs per object")
+    parser.add_argument("-f", "--functions", nargs="+", default=None,
+                        help="benchmarks to run; default: all")
+    parser.add_argument("--mode", type=float, default=0.5,
+                        help="ranking mode between 0 (cost) and 1 (time)")
+    parser.add_argument("-r", "--repeats", type=int, default=5,
+                        help="number of timed repetitions")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum duration of a repetition in seconds")
+    parser.add_argument("-s", "--seed", type=int, default=1,
+                        help="seed for generating inputs")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="write results to this JSON file")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="compare results with this results file")
+    args = parser.parse_args()
+    results = run(
+        tes=args.tes,
+        objects=args.objects,
+        urls=args.urls,
+        functions=args.functions,
+        mode=args.mode,
+        repeats=args.repeats,
+        min_time=args.min_time,
+        seed=args.seed,
+    )
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to '{args.output}'")
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            compare(baseline=json.load(f), results=results)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+
+"""
+Generator of synthetic benchmark scenarios with any number of TES and DRS
+instances, written as merged or component YAML files that can be loaded with
+`hiyapyco` like the files in the `benchmarks` folder
+"""
+import argparse
+import logging
+import math
+import os
+import random
+from typing import (Dict, List, Mapping, Optional, Tuple, Union)
+
+import yaml
+
+from TEStribute.log import setup_logger
+
+from standins.offline import UNITS_PER_EUR
+
+logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
+
+# Default shares of TES instances by currency
+CURRENCIES: Dict[str, float] = {
+    "EUR": 0.5,
+    "USD": 0.3,
+    "CHF": 0.1,
+    "GBP": 0.1,
+}
+
+# Typical unit costs (in EUR) of TES instances; varied per instance
+UNIT_COSTS_EUR: Dict[str, float] = {
+    "cpu_usage": 0.0002,
+    "memory_consumption": 0.0002,
+    "data_storage": 0.2,
+    "data_transfer": 0.01,
+}
+
+# Resource requirements presets
+RESOURCE_REQUIREMENTS: Dict[str, Dict] = {
+    "small": {"cpu_cores": 1, "ram_gb": 2, "disk_gb": 5,
+              "execution_time_sec": 600},
+    "medium": {"cpu_cores": 4, "ram_gb": 8, "disk_gb": 10,
+               "execution_time_sec": 3600},
+    "large": {"cpu_cores": 32, "ram_gb": 128, "disk_gb": 500,
+              "execution_time_sec": 86400},
+}
+
+# Access method types and URL schemes of object replicas
+ACCESS_METHODS = (("https", "https"), ("s3", "s3"), ("ftp", "ftp"))
+
+# Bounds of object sizes (in bytes)
+SIZE_MIN = 2 ** 10
+SIZE_MAX = 2 ** 40
+
+
+def _range(value: Union[int, str, Tuple[int, int]]) -> Tuple[int, int]:
+    """Parses an integer or an inclusive range like '1-3'."""
+    if isinstance(value, tuple):
+        return value
+    if isinstance(value, str) and "-" in value:
+        low, high = value.split("-", 1)
+        return int(low), int(high)
+    return int(value), int(value)
+
+
+def generate_scenario(
+    n_tes: int = 2,
+    n_drs: int = 2,
+    n_objects: int = 2,
+    n_replicas: Union[int, str, Tuple[int, int]] = 1,
+    n_access_methods: Union[int, str, Tuple[int, int]] = 1,
+    mode: Union[float, str] = 0.5,
+    currencies: Optional[Mapping[str, float]] = None,
+    size_median: float = 5e8,
+    size_sigma: float = 2.0,
+    price_spread: float = 0.5,
+    queue_time_mean_sec: float = 0,
+    resource_requirements: str = "medium",
+    seed: Optional[int] = 1,
+) -> Dict:
+    """
+    :param n_tes: number of TES instances
+    :param n_drs: number of DRS instances
+    :param n_objects: number of input objects
+    :param n_replicas: number of DRS instances holding each object, or a
+        range like '1-3' from which it is drawn per object; at most `n_drs`
+    :param n_access_methods: number of access methods of each replica, or a
+        range like '1-3' from which it is drawn per replica
+    :param mode: ranking mode
+    :param currencies: dict of currencies and their shares of TES instances;
+        `CURRENCIES` if not specified
+    :param size_median: median object size (in bytes); object sizes are
+        log-normally distributed, like file sizes in most repositories
+    :param size_sigma: shape of the log-normal object size distribution
+    :param price_spread: maximum relative deviation of unit costs from
+        `UNIT_COSTS_EUR`
+    :param queue_time_mean_sec: mean of exponentially distributed queue
+        times of TES instances; none are specified if 0
+    :param resource_requirements: key of `RESOURCE_REQUIREMENTS`
+    :param seed: seed for random number generator
+    :return: merged benchmark scenario, of the same form as the files in the
+        `benchmarks` folder
+    """
+    rng = random.Random(seed)
+    currencies = currencies or CURRENCIES
+    replicas_min, replicas_max = _range(n_replicas)
+    methods_min, methods_max = _range(n_access_methods)
+
+    # TES instances
+    tes_uris: Dict[str, Dict] = {}
+    currency_choices = rng.choices(
+        list(currencies),
+        weights=list(currencies.values()),
+        k=n_tes,
+    )
+    for index, currency in enumerate(currency_choices):
+        config: Dict = {
+            "currency": currency,
+            "unit_costs": {
+                name: round(
+                    cost * UNITS_PER_EUR[currency] *
+                    rng.uniform(1 - price_spread, 1 + price_spread),
+                    8,
+                ) for name, cost in UNIT_COSTS_EUR.items()
+            },
+        }
+        if queue_time_mean_sec:
+            config["estimated_queue_time_sec"] = round(
+                rng.expovariate(1 / queue_time_mean_sec)
+            )
+        tes_uris[f"http://tes-{index:05d}.example.org/ga4gh/tes/v1/"] = config
+
+    # Objects and their replicas at DRS instances
+    object_ids = [f"obj-{index:05d}" for index in range(n_objects)]
+    drs_uris: Dict[str, List[Dict]] = {
+        f"http://drs-{index:05d}.example.org/ga4gh/drs/v1/": []
+        for index in range(n_drs)
+    }
+    drs_list = list(drs_uris)
+    for object_id in object_ids:
+        size = int(min(SIZE_MAX, max(SIZE_MIN, rng.lognormvariate(
+            math.log(size_median),
+            size_sigma,
+        ))))
+        n = min(n_drs, rng.randint(replicas_min, replicas_max))
+        for drs_index in rng.sample(range(n_drs), n):
+            access_methods = []
+            for method in range(rng.randint(methods_min, methods_max)):
+                access_type, scheme = ACCESS_METHODS[
+                    method % len(ACCESS_METHODS)
+                ]
+                access_methods.append({
+                    "type": access_type,
+                    "access_url": {
+                        "url": (
+                            f"{scheme}://data-{drs_index:05d}-{method}"
+                            f".example.org/{object_id}"
+                        ),
+                        "headers": [],
+                    },
+                })
+            drs_uris[drs_list[drs_index]].append({
+                "id": object_id,
+                "name": object_id,
+                "size": size,
+                "created": "2020-01-01T00:00:00Z",
+                "checksums": [{"checksum": object_id, "type": "md5"}],
+                "access_methods": access_methods,
+            })
+
+    return {
+        "object_ids": object_ids,
+        "tes_uris": tes_uris,
+        "drs_uris": drs_uris,
+        "resource_requirements": dict(
+            RESOURCE_REQUIREMENTS[resource_requirements],
+            preemptible=True,
+            zones=[],
+        ),
+        "mode": mode,
+        "jwt": "",
+    }
+
+
+def count_combinations(scenario: Mapping) -> int:
+    """
+    Returns the number of service combinations of a scenario, i.e., the
+    number of TES instances times the number of access URLs of every object.
+    """
+    urls: Dict[str, int] = {}
+    for objects in scenario["drs_uris"].values():
+        for obj in objects or []:
+            urls[obj["id"]] = urls.get(obj["id"], 0) + len(
+                obj["access_methods"]
+            )
+    count = len(scenario["tes_uris"])
+    for object_id in scenario["object_ids"]:
+        count *= urls.get(object_id, 0)
+    return count
+
+
+def write_scenario(
+    scenario: Mapping,
+    path: str,
+    components: bool = False,
+) -> List[str]:
+    """
+    Writes scenario as YAML.
+
+    :param scenario: scenario as returned by `generate_scenario()`
+    :param path: path of the scenario file or, if `components` is set, of the
+        directory to write component files to
+    :param components: write one file per component (TES instances, DRS
+        instances, objects, resource requirements, mode and JWT), to be
+        merged with `hiyapyco` in any order
+    :return: paths of files written
+    """
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    parts: Dict[str, Dict] = {path: dict(scenario)}
+    if components:
+        os.makedirs(path, exist_ok=True)
+        parts = {
+            os.path.join(path, f"{name}.yaml"): {
+                key: scenario[key] for key in keys
+            } for name, keys in (
+                ("tes", ("tes_uris",)),
+                ("drs", ("drs_uris",)),
+                ("objects", ("object_ids",)),
+                ("res_req", ("resource_requirements",)),
+                ("mode", ("mode",)),
+                ("jwt", ("jwt",)),
+            )
+        }
+    for file_path, data in parts.items():
+        with open(file_path, "w") as f:
+            yaml.dump(data, f, Dumper=dumper, sort_keys=False)
+    return list(parts)
+
+
+def _mode(value: str) -> Union[float, str]:
+    """Parses mode from command line."""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _currencies(value: str) -> Dict[str, float]:
+    """Parses currency shares like 'EUR=0.6,USD=0.4'."""
+    shares = {}
+    for item in value.split(","):
+        currency, _, share = item.partition("=")
+        if currency not in UNITS_PER_EUR:
+            raise argparse.ArgumentTypeError(
+                f"Unsupported currency: {currency}"
+            )
+        shares[currency] = float(share or 1)
+    return shares
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tes", type=int, default=100,
+                        help="number of TES instances")
+    parser.add_argument("--drs", type=int, default=100,
+                        help="number of DRS instances")
+    parser.add_argument("--objects", type=int, default=3,
+                        help="number of input objects")
+    parser.add_argument("--replicas", type=str, default="1-3",
+                        help="replicas per object, e.g., 2 or 1-3")
+    parser.add_argument("--access-methods", type=str, default="1",
+                        help="access methods per replica, e.g., 1 or 1-2")
+    parser.add_argument("--mode", type=_mode, default=0.5,
+                        help="ranking mode, e.g., 0.5, cost, time or random")
+    parser.add_argument("--currencies", type=_currencies, default=None,
+                        help="currency shares, e.g., EUR=0.6,USD=0.3,CHF=0.1")
+    parser.add_argument("--size-median", type=float, default=5e8,
+                        help="median object size in bytes")
+    parser.add_argument("--size-sigma", type=float, default=2.0,
+                        help="shape of log-normal object size distribution")
+    parser.add_argument("--queue-time-mean", type=float, default=0,
+                        help="mean queue time of TES instances in seconds")
+    parser.add_argument("--resources", choices=list(RESOURCE_REQUIREMENTS),
+                        default="medium", help="resource requirements")
+    parser.add_argument("-s", "--seed", type=int, default=1,
+                        help="seed for random number generator")
+    parser.add_argument("--components", action="store_true",
+                        help="write component files to directory OUTPUT")
+    parser.add_argument("-o", "--output", type=str, required=True,
+                        help="scenario file or, with --components, directory")
+    args = parser.parse_args()
+    scenario = generate_scenario(
+        n_tes=args.tes,
+        n_drs=args.drs,
+        n_objects=args.objects,
+        n_replicas=args.replicas,
+        n_access_methods=args.access_methods,
+        mode=args.mode,
+        currencies=args.currencies,
+        size_median=args.size_median,
+        size_sigma=args.size_sigma,
+        queue_time_mean_sec=args.queue_time_mean,
+        resource_requirements=args.resources,
+        seed=args.seed,
+    )
+    paths = write_scenario(
+        scenario=scenario,
+        path=args.output,
+        components=args.components,
+    )
+    logger.info(
+        f"Scenario with {len(scenario['tes_uris'])} TES instances, "
+        f"{len(scenario['drs_uris'])} DRS instances and "
+        f"{count_combinations(scenario)} service combinations written to: "
+        f"{', '.join(paths)}"
+    )
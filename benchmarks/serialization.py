@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark for serializing `Response` objects with many service combinations
+to JSON
+"""
+import argparse
+import json
+import logging
+import random
+from time import perf_counter
+from timeit import repeat
+from typing import Iterable
+from unittest import mock
+
+from TEStribute.log import setup_logger
+from TEStribute.models import (
+    AccessUris,
+    Costs,
+    Currency,
+    ServiceCombination,
+)
+from TEStribute.models.encoder import encode_response
+from TEStribute.models.response import Response
+
+logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
+
+
+def create_response(
+    n_combinations: int = 100000,
+    n_tes: int = 50,
+    n_objects: int = 3,
+    n_uris: int = 5,
+    seed: int = 1,
+) -> Response:
+    """
+    :param n_combinations: number of service combinations to generate
+    :param n_tes: number of distinct TES URIs
+    :param n_objects: number of input objects per service combination
+    :param n_uris: number of distinct access URIs per object
+    :param seed: seed for random number generator
+    :return: Response object with ranked service combinations
+    """
+    rng = random.Random(seed)
+    response = Response.__new__(Response)
+    response.warnings = []
+    response.service_combinations_sorted = [
+        ServiceCombination(
+            access_uris=AccessUris(
+                tes_uri=f"https://tes-{rng.randrange(n_tes)}.org/tes/v1/",
+                **{
+                    f"object_{j}": (
+                        f"https://drs-{rng.randrange(n_uris)}.org/object_{j}"
+                    ) for j in range(n_objects)
+                },
+            ),
+            cost_estimate=Costs(
+                amount=rng.uniform(0, 1000),
+                currency=Currency.EUR,
+            ),
+            rank=index + 1,
+            time_estimate=float(rng.randrange(60, 86400)),
+        ) for index in range(n_combinations)
+    ]
+    return response
+
+
+def run(
+    n_combinations: int = 100000,
+    repeats: int = 5,
+) -> None:
+    """
+    :param n_combinations: number of service combinations to serialize
+    :param repeats: number of times each serializer is run
+    """
+    response = create_response(n_combinations=n_combinations)
+    if json.loads(encode_response(response)) != response.to_dict():
+        raise AssertionError("Serializers produce different results.")
+    serializers = {
+        "json.dumps(Response.to_dict())": lambda: json.dumps(
+            response.to_dict()
+        ).encode(),
+        "encode_response(Response)": lambda: encode_response(response),
+    }
+    logger.info(f"Serializing {n_combinations} service combinations...")
+    for name, fn in serializers.items():
+        times = repeat(fn, number=1, repeat=repeats)
+        logger.info(
+            f"{name}: best {min(times):.3f} s, mean "
+            f"{sum(times) / len(times):.3f} s ({repeats} runs)"
+        )
+
+
+def run_endpoint(
+    n_combinations: int = 100000,
+    repeats: int = 5,
+    log_levels: Iterable[str] = ("INFO", "DEBUG"),
+) -> None:
+    """
+    Measures `POST /rank-services` end to end, including request handling,
+    logging, serialization and response validation as configured, for a
+    precomputed ranking, so that no services are contacted.
+
+    :param n_combinations: number of service combinations in the response
+    :param repeats: number of requests per log level
+    :param log_levels: levels of the `TEStribute` logger to measure with
+    """
+    import TEStribute
+    from TEStribute.wsgi import create_app
+
+    response = create_response(n_combinations=n_combinations)
+    response.object_info = {}
+    app = create_app().app
+    app.config["RESPONSE_CACHE"] = None
+    client = app.test_client()
+    body = {
+        "resource_requirements": {
+            "cpu_cores": 1,
+            "ram_gb": 1,
+            "disk_gb": 1,
+            "execution_time_sec": 60,
+        },
+        "tes_uris": ["https://tes.org/ga4gh/tes/v1/"],
+        "mode": 0.5,
+    }
+    app_logger = logging.getLogger("TEStribute")
+    level = app_logger.level
+    logger.info(
+        f"Requesting ranking of {n_combinations} service combinations "
+        f"(response validation: "
+        f"{TEStribute.config_parser()['openapi']['validate_responses']})..."
+    )
+    with mock.patch.object(
+        TEStribute,
+        "_rank_services",
+        lambda **kwargs: response,
+    ):
+        for log_level in log_levels:
+            app_logger.setLevel(log_level)
+            times = []
+            for index in range(repeats):
+                start = perf_counter()
+                result = client.post(
+                    "/rank-services",
+                    json=dict(body, mode=0.5 - index / 100000),
+                )
+                times.append(perf_counter() - start)
+                if result.status_code != 200:
+                    raise AssertionError(
+                        f"Request failed: {result.status_code}"
+                    )
+            logger.info(
+                f"POST /rank-services, log level {log_level}: best "
+                f"{min(times):.3f} s, mean {sum(times) / len(times):.3f} s "
+                f"({repeats} runs)"
+            )
+    app_logger.setLevel(level)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-n", "--combinations",
+        type=int,
+        default=100000,
+        help="number of service combinations",
+    )
+    parser.add_argument(
+        "-r", "--repeats",
+        type=int,
+        default=5,
+        help="number of runs per serializer",
+    )
+    parser.add_argument(
+        "--endpoint",
+        action="store_true",
+        help="measure complete requests to the API endpoint instead",
+    )
+    args = parser.parse_args()
+    if args.endpoint:
+        run_endpoint(n_combinations=args.combinations, repeats=args.repeats)
+    else:
+        run(n_combinations=args.combinations, repeats=args.repeats)
@@ -0,0 +1,15 @@
+"""
+Local stand-ins for mock-TES and mock-DRS instances with configurable
+latencies, errors and timeouts, for running benchmarks offline
+"""
+from .behaviour import (Behaviour, Behaviours, Latency)
+from .offline import offline_lookups
+from .server import StandIns
+
+__all__ = [
+    "Behaviour",
+    "Behaviours",
+    "Latency",
+    "offline_lookups",
+    "StandIns",
+]
@@ -0,0 +1,80 @@
+"""
+Serves stand-ins for the TES and DRS instances of a benchmark scenario until
+interrupted, e.g.:
+
+    python -m standins benchmarks/cost.yaml --behaviour behaviour.yaml
+
+The scenario, with the URIs of the stand-ins, is written to `--output`.
+"""
+import argparse
+import logging
+from time import sleep
+from typing import Dict
+
+import hiyapyco
+import yaml
+
+from TEStribute.log import setup_logger
+
+from . import (Behaviours, StandIns)
+
+logger = setup_logger("TEStribute_benchmarks", logging.DEBUG)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "scenario",
+        nargs="+",
+        help="benchmark YAML files; merged in the order given",
+    )
+    parser.add_argument(
+        "-b", "--behaviour",
+        type=str,
+        default=None,
+        help="YAML file with latencies, error and timeout rates of services",
+    )
+    parser.add_argument(
+        "-s", "--seed",
+        type=int,
+        default=None,
+        help="seed for random number generators; overrides '--behaviour'",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8000)
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="write scenario with stand-in URIs to this YAML file",
+    )
+    args = parser.parse_args()
+    behaviours: Dict = {}
+    if args.behaviour is not None:
+        with open(args.behaviour) as f:
+            behaviours = yaml.safe_load(f) or {}
+    if args.seed is not None:
+        behaviours["seed"] = args.seed
+    scenario = hiyapyco.load(
+        args.scenario,
+        method=hiyapyco.METHOD_MERGE,
+        usedefaultyamlloader=True,
+        failonmissingfiles=True,
+    )
+    standins = StandIns(
+        behaviours=Behaviours.from_dict(behaviours),
+        host=args.host,
+        port=args.port,
+    )
+    scenario = standins.add_scenario(scenario)
+    for uri in list(scenario["tes_uris"]) + list(scenario["drs_uris"]):
+        logger.info(f"Serving stand-in at '{uri}'")
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            yaml.safe_dump(dict(scenario), f)
+    standins.start()
+    try:
+        while True:
+            sleep(1)
+    except KeyboardInterrupt:
+        standins.stop()
@@ -0,0 +1,186 @@
+"""
+Latency distributions and failure injection for stand-in services
+"""
+import math
+import random
+from typing import (Dict, Mapping, Optional)
+
+# Supported latency distributions and their parameters
+DISTRIBUTIONS: Dict[str, tuple] = {
+    "constant": ("value",),
+    "uniform": ("low", "high"),
+    "normal": ("mean", "sd"),
+    "lognormal": ("median", "sigma"),
+    "exponential": ("mean",),
+}
+
+
+class Latency:
+    """
+    Distribution of response latencies (in seconds); negative samples are
+    clipped to zero.
+    """
+    def __init__(
+        self,
+        distribution: str = "constant",
+        **params: float,
+    ) -> None:
+        """
+        :param distribution: one of the keys of `DISTRIBUTIONS`
+        :param params: parameters of the distribution, as listed in
+            `DISTRIBUTIONS`; missing parameters default to zero
+        :raises ValueError: unknown distribution or parameter
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{distribution}'. Available: "
+                f"{', '.join(DISTRIBUTIONS)}"
+            )
+        unknown = set(params) - set(DISTRIBUTIONS[distribution])
+        if unknown:
+            raise ValueError(
+                f"Unknown parameters for latency distribution "
+                f"'{distribution}': {', '.join(sorted(unknown))}"
+            )
+        self.distribution = distribution
+        self.params = {
+            name: float(params.get(name, 0))
+            for name in DISTRIBUTIONS[distribution]
+        }
+
+    def sample(self, rng: random.Random) -> float:
+        """Returns random latency (in seconds)."""
+        p = self.params
+        if self.distribution == "constant":
+            value = p["value"]
+        elif self.distribution == "uniform":
+            value = rng.uniform(p["low"], p["high"])
+        elif self.distribution == "normal":
+            value = rng.gauss(p["mean"], p["sd"])
+        elif self.distribution == "lognormal":
+            if p["median"] <= 0:
+                return 0.0
+            value = rng.lognormvariate(math.log(p["median"]), p["sigma"])
+        else:
+            value = rng.expovariate(1 / p["mean"]) if p["mean"] > 0 else 0
+        return max(0.0, value)
+
+
+class Behaviour:
+    """
+    Behaviour of a stand-in service: latency of every request and rates of
+    injected errors (HTTP 500) and timeouts (no response for `hang_sec`) for
+    API calls. Requests for the service definition are delayed, but never
+    fail, as the clients fetch it without a timeout.
+    """
+    def __init__(
+        self,
+        latency: Optional[Latency] = None,
+        error_rate: float = 0,
+        timeout_rate: float = 0,
+        hang_sec: float = 30,
+    ) -> None:
+        """
+        :param latency: latency distribution; no latency if not specified
+        :param error_rate: fraction of API calls answered with HTTP 500
+        :param timeout_rate: fraction of API calls not answered within
+            `hang_sec` seconds
+        :param hang_sec: time (in seconds) after which calls selected for a
+            timeout are answered with HTTP 504
+        :raises ValueError: rates not between 0 and 1 or summing up to more
+            than 1
+        """
+        if not (0 <= error_rate <= 1 and 0 <= timeout_rate <= 1) or \
+                error_rate + timeout_rate > 1:
+            raise ValueError(
+                "Error and timeout rates must be between 0 and 1 and must not "
+                "sum up to more than 1."
+            )
+        self.latency = latency or Latency()
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_sec = hang_sec
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Behaviour":
+        """
+        Creates behaviour from a mapping, e.g.:
+
+            latency:
+              distribution: lognormal
+              median: 0.05
+              sigma: 0.5
+            error_rate: 0.01
+            timeout_rate: 0.01
+            hang_sec: 30
+        """
+        data = dict(data)
+        latency = data.pop("latency", None)
+        return cls(
+            latency=Latency(**latency) if latency else None,
+            **data,
+        )
+
+    def outcome(self, rng: random.Random) -> str:
+        """Returns random outcome of a call: 'ok', 'error' or 'timeout'."""
+        draw = rng.random()
+        if draw < self.error_rate:
+            return "error"
+        if draw < self.error_rate + self.timeout_rate:
+            return "timeout"
+        return "ok"
+
+
+class Behaviours:
+    """
+    Behaviours of all stand-in services: a default behaviour and overrides
+    for individual services, identified by their root URIs, e.g.:
+
+        seed: 1
+        default:
+          latency: {distribution: uniform, low: 0.01, high: 0.05}
+        services:
+          http://131.152.229.70/ga4gh/tes/v1/:
+            error_rate: 0.2
+    """
+    def __init__(
+        self,
+        default: Optional[Behaviour] = None,
+        services: Optional[Mapping[str, Behaviour]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        :param default: behaviour of services without an override
+        :param services: dict of service root URIs and their behaviours
+        :param seed: seed for random number generators; every service uses
+            its own generator, derived from the seed and its root URI
+        """
+        self.default = default or Behaviour()
+        self.services = {
+            uri.rstrip("/"): behaviour
+            for uri, behaviour in (services or {}).items()
+        }
+        self.seed = seed
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping]) -> "Behaviours":
+        """Creates behaviours from a mapping of the form described above."""
+        data = data or {}
+        return cls(
+            default=Behaviour.from_dict(data.get("default") or {}),
+            services={
+                uri: Behaviour.from_dict(behaviour or {})
+                for uri, behaviour in (data.get("services") or {}).items()
+            },
+            seed=data.get("seed"),
+        )
+
+    def get(self, uri: str) -> Behaviour:
+        """Returns behaviour of the service with the specified root URI."""
+        return self.services.get(uri.rstrip("/"), self.default)
+
+    def rng(self, uri: str) -> random.Random:
+        """Returns random number generator for a service."""
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}:{uri.rstrip('/')}")
@@ -0,0 +1,390 @@
+"""
+In-process HTTP server hosting stand-ins for any number of mock-TES and
+mock-DRS instances
+"""
+from collections import Counter
+from copy import deepcopy
+import json
+import logging
+import random
+from threading import (Event, Lock, Thread)
+from time import sleep
+from typing import (Dict, Iterable, Mapping, Optional, Tuple)
+from urllib.parse import urlparse
+
+from werkzeug.serving import (make_server, WSGIRequestHandler)
+from werkzeug.wrappers import (Request, Response)
+
+from TEStribute.utils.pricing import PriceSheet
+
+from .behaviour import Behaviours
+from .specs import (drs_spec, tes_spec)
+
+logger = logging.getLogger("TEStribute_benchmarks")
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request."""
+    def log_request(self, *args, **kwargs) -> None:
+        pass
+
+
+class _Service:
+    """State of a single stand-in service."""
+    def __init__(
+        self,
+        kind: str,
+        uri: str,
+        local_uri: str,
+        spec: Dict,
+    ) -> None:
+        self.kind = kind
+        self.uri = uri
+        self.local_uri = local_uri
+        self.spec = json.dumps(spec).encode()
+        self.price_sheet: Dict = {}
+        self.objects: Dict[str, Dict] = {}
+
+
+class StandIns:
+    """
+    Stand-ins for mock-TES and mock-DRS instances that implement the
+    endpoints used by `tes_client` and `drs_client` (`GetTaskInfo`,
+    `UpdateTaskInfoConfig`, `GetObject` and `updateDatabaseObjects`), all
+    served by a single local HTTP server.
+
+    Each service is registered under its original root URI and served at a
+    local root URI of the form `http://<host>:<port>/<tes|drs>/<index>/<path
+    of original URI>`. Latencies, errors and timeouts are injected according
+    to `behaviours`.
+
+    Usage:
+
+        with StandIns() as standins:
+            scenario = standins.add_scenario(scenario)
+            rank_services(**params_from(scenario))
+    """
+    def __init__(
+        self,
+        behaviours: Optional[Behaviours] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        :param behaviours: latencies, errors and timeouts of services; none
+            are injected if not specified
+        :param host: host to bind server to
+        :param port: port to bind server to; any free port if 0
+        """
+        self.behaviours = behaviours or Behaviours()
+        self.calls: Counter = Counter()
+        self._lock = Lock()
+        self._stopping = Event()
+        self._services: Dict[Tuple[str, int], _Service] = {}
+        self._local_uris: Dict[str, str] = {}
+        self._counts: Counter = Counter()
+        self._rngs: Dict[str, random.Random] = {}
+        self._server = make_server(
+            host=host,
+            port=port,
+            app=self._app,
+            threaded=True,
+            request_handler=_QuietRequestHandler,
+        )
+        self.base_url = f"http://{host}:{self._server.server_port}"
+        self._thread: Optional[Thread] = None
+
+    def __enter__(self) -> "StandIns":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> "StandIns":
+        """Starts serving requests in a background thread."""
+        self._thread = Thread(
+            target=self._server.serve_forever,
+            name="standins",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"Stand-in services listening at {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        """Stops server; pending requests selected for a timeout return."""
+        self._stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def uri(self, uri: str) -> str:
+        """Returns local root URI of a registered service."""
+        return self._local_uris[uri.rstrip("/")]
+
+    def add_tes(
+        self,
+        uri: str,
+        config: Optional[Mapping] = None,
+    ) -> str:
+        """
+        Registers TES stand-in.
+
+        :param uri: original root URI of the TES instance
+        :param config: price sheet of the form used in the benchmark
+            component files, i.e., with keys `currency`, `unit_costs` and,
+            optionally, `estimated_queue_time_sec`
+        :return: local root URI of the stand-in
+        """
+        service = self._add(kind="tes", uri=uri)
+        if config:
+            PriceSheet.from_dict(config)
+            service.price_sheet = deepcopy(dict(config))
+        return service.local_uri
+
+    def add_drs(
+        self,
+        uri: str,
+        objects: Optional[Iterable[Mapping]] = None,
+    ) -> str:
+        """
+        Registers DRS stand-in.
+
+        :param uri: original root URI of the DRS instance
+        :param objects: DRS objects of the form used in the benchmark
+            component files
+        :return: local root URI of the stand-in
+        """
+        service = self._add(kind="drs", uri=uri)
+        for obj in objects or []:
+            service.objects[obj["id"]] = deepcopy(dict(obj))
+        return service.local_uri
+
+    def add_scenario(
+        self,
+        scenario: Mapping,
+    ) -> Dict:
+        """
+        Registers stand-ins for all TES and DRS instances of a (merged)
+        benchmark scenario.
+
+        :param scenario: benchmark scenario with keys `tes_uris` and
+            `drs_uris`
+        :return: copy of scenario with service URIs replaced by the local
+            URIs of the stand-ins
+        """
+        scenario = dict(scenario)
+        scenario["tes_uris"] = {
+            self.add_tes(uri=uri, config=config): config
+            for uri, config in (scenario.get("tes_uris") or {}).items()
+        }
+        scenario["drs_uris"] = {
+            self.add_drs(uri=uri, objects=objects): objects
+            for uri, objects in (scenario.get("drs_uris") or {}).items()
+        }
+        return scenario
+
+    def _add(
+        self,
+        kind: str,
+        uri: str,
+    ) -> _Service:
+        """Registers service; re-registering a service resets its state."""
+        with self._lock:
+            key = uri.rstrip("/")
+            if key in self._local_uris:
+                index = int(
+                    urlparse(self._local_uris[key]).path.split("/")[2]
+                )
+            else:
+                index = self._counts[kind]
+                self._counts[kind] += 1
+            path = f"/{kind}/{index}{urlparse(uri).path}".rstrip("/")
+            spec = tes_spec(path) if kind == "tes" else drs_spec(path)
+            service = _Service(
+                kind=kind,
+                uri=uri,
+                local_uri=f"{self.base_url}{path}/",
+                spec=spec,
+            )
+            self._services[(kind, index)] = service
+            self._local_uris[key] = service.local_uri
+            self._rngs[key] = self.behaviours.rng(uri)
+            return service
+
+    def _app(self, environ, start_response):
+        """WSGI application dispatching requests to stand-ins."""
+        request = Request(environ)
+        response = self._dispatch(request)
+        return response(environ, start_response)
+
+    def _dispatch(self, request: Request) -> Response:
+        """Returns response of the addressed stand-in."""
+        parts = request.path.split("/", 3)
+        try:
+            service = self._services[(parts[1], int(parts[2]))]
+        except (IndexError, KeyError, ValueError):
+            return _json({"msg": "Unknown service"}, status=404)
+        prefix = urlparse(service.local_uri).path.rstrip("/")
+        if not request.path.startswith(f"{prefix}/"):
+            return _json({"msg": "Not found"}, status=404)
+        path = request.path[len(prefix):]
+        behaviour = self.behaviours.get(service.uri)
+        rng = self._rngs[service.uri.rstrip("/")]
+        sleep(behaviour.latency.sample(rng))
+
+        # Service definition
+        if path == "/swagger.json":
+            self._count(service, "swagger.json", "ok")
+            return Response(service.spec, mimetype="application/json")
+
+        # Identify operation
+        operation = _operation(service.kind, request.method, path)
+        if operation is None:
+            return _json({"msg": "Not found"}, status=404)
+
+        # Inject failures
+        outcome = behaviour.outcome(rng)
+        self._count(service, operation, outcome)
+        if outcome == "error":
+            return _json({"msg": "Injected error"}, status=500)
+        if outcome == "timeout":
+            self._stopping.wait(behaviour.hang_sec)
+            return _json({"msg": "Injected timeout"}, status=504)
+
+        # Process operation
+        try:
+            return getattr(self, f"_{operation}")(service, request, path)
+        except (KeyError, TypeError, ValueError) as e:
+            return _json(
+                {"msg": f"Invalid request: {type(e).__name__}: {e}"},
+                status=400,
+            )
+
+    def _count(
+        self,
+        service: _Service,
+        operation: str,
+        outcome: str,
+    ) -> None:
+        """Counts call of an operation by outcome."""
+        with self._lock:
+            self.calls[(service.uri, operation, outcome)] += 1
+
+    def _GetTaskInfo(
+        self,
+        service: _Service,
+        request: Request,
+        path: str,
+    ) -> Response:
+        if not service.price_sheet:
+            return _json({"msg": "No price sheet configured"}, status=500)
+        return _json(_quote(
+            price_sheet=service.price_sheet,
+            resources=request.get_json(force=True),
+        ))
+
+    def _UpdateTaskInfoConfig(
+        self,
+        service: _Service,
+        request: Request,
+        path: str,
+    ) -> Response:
+        config = request.get_json(force=True)
+        PriceSheet.from_dict(config)
+        service.price_sheet = config
+        return _json(config)
+
+    def _GetObject(
+        self,
+        service: _Service,
+        request: Request,
+        path: str,
+    ) -> Response:
+        obj = service.objects.get(path[len("/objects/"):])
+        if obj is None:
+            return _json({"msg": "Object not found"}, status=404)
+        return _json(obj)
+
+    def _updateDatabaseObjects(
+        self,
+        service: _Service,
+        request: Request,
+        path: str,
+    ) -> Response:
+        body = request.get_json(force=True)
+        objects = {obj["id"]: obj for obj in body.get("data_objects") or []}
+        with self._lock:
+            if body.get("clear_db"):
+                service.objects = objects
+            else:
+                service.objects.update(objects)
+        return _json({"objects": list(service.objects)})
+
+
+def _operation(
+    kind: str,
+    method: str,
+    path: str,
+) -> Optional[str]:
+    """Returns ID of the operation addressed by a request, if any."""
+    if kind == "tes":
+        return {
+            ("POST", "/tasks/task-info"): "GetTaskInfo",
+            ("PUT", "/tasks/task-info/config"): "UpdateTaskInfoConfig",
+        }.get((method, path))
+    if method == "GET" and path.startswith("/objects/"):
+        return "GetObject"
+    if method == "POST" and path == "/update-db":
+        return "updateDatabaseObjects"
+    return None
+
+
+def _quote(
+    price_sheet: Mapping,
+    resources: Mapping,
+) -> Dict:
+    """
+    Returns task info (`tesTaskInfo`) for a task with the given resource
+    requirements (`tesResources`), computed from the unit prices in a price
+    sheet the way mock-TES does. Deliberately independent of
+    `TEStribute.utils.pricing`, so that benchmarks with stand-ins do not
+    quote with the cost model they test.
+    """
+    unit_costs = price_sheet["unit_costs"]
+    currency = price_sheet["currency"]
+    compute = (
+        float(resources["cpu_cores"]) * float(unit_costs["cpu_usage"]) +
+        float(resources["ram_gb"]) * float(unit_costs["memory_consumption"])
+    ) * float(resources["execution_time_sec"])
+    storage = float(resources["disk_gb"]) * float(unit_costs["data_storage"])
+    return {
+        "estimated_compute_costs": {
+            "amount": compute,
+            "currency": currency,
+        },
+        "estimated_storage_costs": {
+            "amount": storage,
+            "currency": currency,
+        },
+        "estimated_queue_time_sec": float(
+            price_sheet.get("estimated_queue_time_sec", 0)
+        ),
+        "unit_costs_data_transfer": {
+            "amount": float(unit_costs["data_transfer"]),
+            "currency": currency,
+        },
+    }
+
+
+def _json(
+    data: Mapping,
+    status: int = 200,
+) -> Response:
+    """Returns JSON response."""
+    return Response(
+        json.dumps(data),
+        status=status,
+        mimetype="application/json",
+    )
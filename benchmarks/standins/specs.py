@@ -0,0 +1,242 @@
+"""
+Swagger 2.0 definitions of the endpoints of mock-TES and mock-DRS that are
+used by `tes_client` and `drs_client`
+"""
+from typing import (Dict, Optional)
+
+COSTS = {
+    "type": "object",
+    "properties": {
+        "amount": {"type": "number", "format": "double"},
+        "currency": {"type": "string"},
+    },
+}
+
+
+def _spec(
+    title: str,
+    base_path: str,
+    paths: Dict,
+    definitions: Dict,
+) -> Dict:
+    """Returns Swagger 2.0 definition with common fields."""
+    return {
+        "swagger": "2.0",
+        "info": {"title": title, "version": "stand-in"},
+        "basePath": base_path.rstrip("/") or "/",
+        "schemes": ["http"],
+        "consumes": ["application/json"],
+        "produces": ["application/json"],
+        "paths": paths,
+        "definitions": definitions,
+    }
+
+
+def _operation(
+    tag: str,
+    operation_id: str,
+    response: str,
+    body: Optional[str] = None,
+) -> Dict:
+    """Returns operation with a JSON body (if any) and a JSON response."""
+    operation: Dict = {
+        "tags": [tag],
+        "operationId": operation_id,
+        "parameters": [],
+        "responses": {
+            "200": {
+                "description": "OK",
+                "schema": {"$ref": f"#/definitions/{response}"},
+            },
+        },
+    }
+    if body is not None:
+        operation["parameters"].append({
+            "in": "body",
+            "name": "body",
+            "required": True,
+            "schema": {"$ref": f"#/definitions/{body}"},
+        })
+    return operation
+
+
+def tes_spec(base_path: str) -> Dict:
+    """
+    :param base_path: path of the TES root URI
+    :return: Swagger 2.0 definition of the stand-in TES
+    """
+    return _spec(
+        title="Task Execution Service stand-in",
+        base_path=base_path,
+        paths={
+            "/tasks/task-info": {
+                "post": _operation(
+                    tag="TaskService",
+                    operation_id="GetTaskInfo",
+                    body="tesResources",
+                    response="tesTaskInfo",
+                ),
+            },
+            "/tasks/task-info/config": {
+                "put": _operation(
+                    tag="TaskService",
+                    operation_id="UpdateTaskInfoConfig",
+                    body="tesTaskInfoConfig",
+                    response="tesTaskInfoConfig",
+                ),
+            },
+        },
+        definitions={
+            "tesCosts": COSTS,
+            "tesResources": {
+                "type": "object",
+                "properties": {
+                    "cpu_cores": {"type": "integer", "format": "int64"},
+                    "ram_gb": {"type": "number", "format": "double"},
+                    "disk_gb": {"type": "number", "format": "double"},
+                    "preemptible": {"type": "boolean"},
+                    "zones": {"type": "array", "items": {"type": "string"}},
+                    "execution_time_sec": {
+                        "type": "integer",
+                        "format": "int64",
+                    },
+                },
+            },
+            "tesTaskInfo": {
+                "type": "object",
+                "properties": {
+                    "estimated_compute_costs": {
+                        "$ref": "#/definitions/tesCosts",
+                    },
+                    "estimated_storage_costs": {
+                        "$ref": "#/definitions/tesCosts",
+                    },
+                    "estimated_queue_time_sec": {
+                        "type": "number",
+                        "format": "double",
+                    },
+                    "unit_costs_data_transfer": {
+                        "$ref": "#/definitions/tesCosts",
+                    },
+                },
+            },
+            "tesTaskInfoConfig": {
+                "type": "object",
+                "properties": {
+                    "currency": {"type": "string"},
+                    "unit_costs": {
+                        "type": "object",
+                        "properties": {
+                            name: {"type": "number", "format": "double"}
+                            for name in (
+                                "cpu_usage",
+                                "memory_consumption",
+                                "data_storage",
+                                "data_transfer",
+                            )
+                        },
+                    },
+                },
+            },
+        },
+    )
+
+
+def drs_spec(base_path: str) -> Dict:
+    """
+    :param base_path: path of the DRS root URI
+    :return: Swagger 2.0 definition of the stand-in DRS
+    """
+    get_object = _operation(
+        tag="DataRepositoryService",
+        operation_id="GetObject",
+        response="Object",
+    )
+    get_object["parameters"].append({
+        "in": "path",
+        "name": "object_id",
+        "required": True,
+        "type": "string",
+    })
+    get_object["responses"]["404"] = {"description": "Not found"}
+    return _spec(
+        title="Data Repository Service stand-in",
+        base_path=base_path,
+        paths={
+            "/objects/{object_id}": {"get": get_object},
+            "/update-db": {
+                "post": _operation(
+                    tag="DataRepositoryService",
+                    operation_id="updateDatabaseObjects",
+                    body="UpdateObjects",
+                    response="UpdateObjectsResponse",
+                ),
+            },
+        },
+        definitions={
+            "AccessURL": {
+                "type": "object",
+                "properties": {
+                    "url": {"type": "string"},
+                    "headers": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+            "AccessMethod": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string"},
+                    "access_url": {"$ref": "#/definitions/AccessURL"},
+                    "access_id": {"type": "string"},
+                    "region": {"type": "string"},
+                },
+            },
+            "Checksum": {
+                "type": "object",
+                "properties": {
+                    "checksum": {"type": "string"},
+                    "type": {"type": "string"},
+                },
+            },
+            "Object": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "name": {"type": "string"},
+                    "size": {"type": "integer", "format": "int64"},
+                    "created": {"type": "string"},
+                    "updated": {"type": "string"},
+                    "version": {"type": "string"},
+                    "mime_type": {"type": "string"},
+                    "checksums": {
+                        "type": "array",
+                        "items": {"$ref": "#/definitions/Checksum"},
+                    },
+                    "access_methods": {
+                        "type": "array",
+                        "items": {"$ref": "#/definitions/AccessMethod"},
+                    },
+                    "description": {"type": "string"},
+                    "aliases": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+            "UpdateObjects": {
+                "type": "object",
+                "properties": {
+                    "clear_db": {"type": "boolean"},
+                    "data_objects": {
+                        "type": "array",
+                        "items": {"$ref": "#/definitions/Object"},
+                    },
+                },
+            },
+            "UpdateObjectsResponse": {
+                "type": "object",
+                "properties": {
+                    "objects": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                    },
+                },
+            },
+        },
+    )
@@ -48,6 +48,7 @@ setup(
     entry_points={
         'console_scripts': [
             'testribute = TEStribute.cli:main',
+            'testribute-server = TEStribute.wsgi:main',
         ],
     },
     keywords=(
@@ -60,6 +61,9 @@ setup(
     },
     packages=find_packages(),
     install_requires=install_requires,
+    extras_require={
+        "redis": ["redis>=5.0"],
+    },
     python_requires='~=3.6',
     include_package_data=True,
     setup_requires=[
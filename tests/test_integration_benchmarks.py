@@ -0,0 +1,133 @@
+"""
+Integration tests for the benchmarks in `benchmarks/`.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+import requests
+
+from TEStribute.models import ResourceRequirements
+from TEStribute.utils.pricing import (estimate_task_info, PriceSheet)
+
+# Test parameters
+BENCHMARKS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "benchmarks",
+)
+TES_URI = "http://193.166.24.111/ga4gh/tes/v1/"
+PRICE_SHEET = {
+    "currency": "EUR",
+    "unit_costs": {
+        "cpu_usage": 0.0002,
+        "memory_consumption": 0.0002,
+        "data_storage": 0.2,
+        "data_transfer": 0.01,
+    },
+    "estimated_queue_time_sec": 60,
+}
+RESOURCES = {
+    "cpu_cores": 4,
+    "ram_gb": 8,
+    "disk_gb": 10,
+    "execution_time_sec": 3600,
+    "preemptible": True,
+    "zones": [],
+}
+
+# Task info quoted by mock-TES (GetTaskInfo) for the price sheet and resources
+# above; compute costs (4 x 0.0002 + 8 x 0.0002) x 3600, storage costs 10 x 0.2
+TASK_INFO = {
+    "estimated_compute_costs": {"amount": 8.64, "currency": "EUR"},
+    "estimated_storage_costs": {"amount": 2.0, "currency": "EUR"},
+    "estimated_queue_time_sec": 60,
+    "unit_costs_data_transfer": {"amount": 0.01, "currency": "EUR"},
+}
+
+# Runs a benchmark script with connections to hosts other than the loopback
+# interface failing, as on a machine without network access
+OFFLINE_RUNNER = """
+import runpy
+import socket
+import sys
+
+LOCAL = (None, "localhost", "127.0.0.1", "::1")
+
+def _offline(function):
+    def wrapper(*args, **kwargs):
+        raise OSError("network access disabled")
+    return wrapper
+
+_connect = socket.socket.connect
+_getaddrinfo = socket.getaddrinfo
+
+def connect(self, address):
+    if self.family in (socket.AF_INET, socket.AF_INET6) and \\
+            address[0] not in LOCAL:
+        raise OSError("network access disabled")
+    return _connect(self, address)
+
+def getaddrinfo(host, *args, **kwargs):
+    if host not in LOCAL:
+        raise socket.gaierror("network access disabled")
+    return _getaddrinfo(host, *args, **kwargs)
+
+socket.socket.connect = connect
+socket.getaddrinfo = getaddrinfo
+socket.gethostbyname = _offline(socket.gethostbyname)
+sys.path.insert(0, "")
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+@pytest.fixture
+def standins(monkeypatch):
+    """Stand-ins imported from the benchmarks folder."""
+    monkeypatch.syspath_prepend(BENCHMARKS_DIR)
+    from standins import StandIns
+    with StandIns() as standins:
+        yield standins
+
+
+def _amounts_approx(task_info):
+    """Flattens task info, comparing amounts approximately."""
+    flat = {}
+    for key, value in task_info.items():
+        for field, item in (
+            value.items() if isinstance(value, dict) else [(None, value)]
+        ):
+            flat[(key, field)] = \
+                pytest.approx(item) if field == "amount" else item
+    return flat
+
+
+def test_standins_task_info(standins):
+    uri = standins.add_tes(uri=TES_URI, config=PRICE_SHEET)
+    response = requests.post(f"{uri}tasks/task-info", json=RESOURCES)
+    assert response.status_code == 200
+    assert _amounts_approx(response.json()) == _amounts_approx(TASK_INFO)
+
+    # Local cost model yields the same estimates as mock-TES
+    task_info = estimate_task_info(
+        price_sheets={TES_URI: PriceSheet.from_dict(PRICE_SHEET)},
+        resource_requirements=ResourceRequirements(**RESOURCES),
+    )[TES_URI]
+    assert _amounts_approx(task_info.to_dict()) == _amounts_approx(TASK_INFO)
+
+
+def test_benchmark_standins_offline():
+    result = subprocess.run(
+        [
+            sys.executable, "-c", OFFLINE_RUNNER,
+            "benchmark.py", "--standins", "cost.yaml",
+        ],
+        cwd=BENCHMARKS_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stdout
+    assert "Ranked 4 service combinations" in result.stdout
@@ -0,0 +1,48 @@
+"""Unit tests for `TEStribute.config`"""
+import os
+
+import pytest
+
+from TEStribute.config import (ENV_CONFIG, config_parser)
+
+PRODUCTION_CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "TEStribute",
+    "config",
+    "production.yaml",
+)
+
+
+def test_config_parser_defaults(monkeypatch):
+    monkeypatch.delenv(ENV_CONFIG, raising=False)
+    config = config_parser()
+    assert config["response_cache"]["enabled"] is False
+    assert config["response_cache"]["ttl"] == 30
+    assert config["coalesce_requests"] is False
+
+
+def test_config_parser_overrides(monkeypatch, tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("response_cache:\n    ttl: 5\ntimeout: 10\n")
+    monkeypatch.setenv(ENV_CONFIG, str(path))
+    config = config_parser()
+    assert config["response_cache"] == {
+        "enabled": False,
+        "ttl": 5,
+        "maxsize": 256,
+    }
+    assert config["timeout"] == 10
+    assert config["target_currency"] == "EUR"
+
+
+def test_config_parser_overrides_missing(monkeypatch, tmp_path):
+    monkeypatch.setenv(ENV_CONFIG, str(tmp_path / "missing.yaml"))
+    with pytest.raises(FileNotFoundError):
+        config_parser()
+
+
+def test_config_parser_production(monkeypatch):
+    monkeypatch.setenv(ENV_CONFIG, PRODUCTION_CONFIG)
+    config = config_parser()
+    assert config["response_cache"]["enabled"] is True
+    assert config["coalesce_requests"] is True
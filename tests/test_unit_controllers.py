@@ -0,0 +1,93 @@
+"""Unit tests for `TEStribute.controllers`"""
+import json
+
+from TEStribute.controllers import (_fingerprint, _generate_records)
+from TEStribute.models import (
+    AccessUris,
+    Costs,
+    Currency,
+    ServiceCombination,
+)
+from TEStribute.models.response import Response
+
+# Test parameters
+BODY = {
+    "resource_requirements": {
+        "cpu_cores": 1,
+        "ram_gb": 1,
+        "disk_gb": 1,
+        "execution_time_sec": 60,
+    },
+    "tes_uris": ["https://tes.org/ga4gh/tes/v1/"],
+    "mode": "cost",
+}
+
+# Test mock objects
+response = Response.__new__(Response)
+response.service_combinations_sorted = [
+    ServiceCombination(
+        access_uris=AccessUris(
+            tes_uri="https://tes.org/",
+            a001=f"https://object-store.org/a001-{rank}",
+        ),
+        cost_estimate=Costs(amount=1.5 * rank, currency=Currency.EUR),
+        rank=rank,
+        time_estimate=300,
+    ) for rank in (1, 2)
+]
+response.warnings = ["Some warning."]
+
+
+def test_fingerprint_canonical():
+    key = _fingerprint(body=BODY)
+    assert key is not None
+    assert _fingerprint(body=dict(
+        BODY,
+        mode=0,
+        object_ids=[],
+        resource_requirements=dict(
+            BODY["resource_requirements"],
+            preemptible=True,
+        ),
+    )) == key
+    assert _fingerprint(body=dict(BODY, mode="time")) != key
+    assert _fingerprint(body=BODY, jwt="token") != key
+
+
+def test_fingerprint_not_cacheable():
+    assert _fingerprint(body=dict(BODY, mode="random")) is None
+    assert _fingerprint(body=dict(BODY, mode=-1)) is None
+    assert _fingerprint(body=dict(BODY, tes_uris=[])) is None
+
+
+def test_generate_records():
+    expected = [
+        combination.to_dict()
+        for combination in response.service_combinations_sorted
+    ] + [{"warnings": response.warnings}]
+    for validate in (True, False):
+        records = list(_generate_records(response=response, validate=validate))
+        assert all(record.endswith(b"\n") for record in records)
+        assert [json.loads(record) for record in records] == expected
+
+
+def test_generate_records_invalid():
+    invalid = Response.__new__(Response)
+    invalid.service_combinations_sorted = list(
+        response.service_combinations_sorted
+    )
+    invalid.service_combinations_sorted[1] = ServiceCombination(
+        access_uris=AccessUris(tes_uri="https://tes.org/"),
+        cost_estimate=Costs(amount=1.0, currency=Currency.EUR),
+        rank=1.5,  # type: ignore
+        time_estimate=300,
+    )
+    invalid.warnings = []
+    records = [
+        json.loads(record)
+        for record in _generate_records(response=invalid, validate=True)
+    ]
+    assert records[0] == response.service_combinations_sorted[0].to_dict()
+    assert len(records) == 2
+    assert records[1]["error"]["reason"] == "ResponseValidationError"
+    assert "warnings" not in records[1]
@@ -0,0 +1,31 @@
+"""Unit tests for `TEStribute.__init__`"""
+import subprocess
+import sys
+
+# Test parameters
+DEFERRED = [
+    "bravado",
+    "connexion",
+    "drs_client",
+    "forex_python",
+    "geopy",
+    "ip2geotools",
+    "numpy",
+    "tes_client",
+]
+
+
+def test_import_defers_heavy_dependencies():
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, TEStribute, TEStribute.cli; "
+            "print(' '.join(sys.modules))",
+        ],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = {module.split(".")[0] for module in process.stdout.split()}
+    assert not modules.intersection(DEFERRED)
@@ -0,0 +1,73 @@
+"""Unit tests for `TEStribute.metrics`"""
+from prometheus_client import REGISTRY
+import pytest
+
+import TEStribute.metrics as metrics
+from TEStribute.metrics import (
+    host_label,
+    observe_outbound,
+    observe_stage,
+)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _outcomes(**labels):
+    return [
+        _sample("testribute_outbound_requests_total", outcome=o, **labels)
+        for o in ("success", "error")
+    ]
+
+
+def test_observe_stage():
+    before = _sample("testribute_stage_duration_seconds_count", stage="test")
+    with observe_stage("test"):
+        pass
+    assert _sample(
+        "testribute_stage_duration_seconds_count", stage="test"
+    ) == before + 1
+
+
+def test_observe_outbound():
+    labels = {"service": "test", "host": "tes.org", "operation": "get"}
+    before = _outcomes(**labels)
+    with observe_outbound("test", "https://TES.org/ga4gh/tes/v1", "get"):
+        pass
+    with pytest.raises(ValueError):
+        with observe_outbound("test", "tes.org", "get"):
+            raise ValueError
+    assert _outcomes(**labels) == [before[0] + 1, before[1] + 1]
+    assert _sample(
+        "testribute_outbound_request_duration_seconds_count", **labels
+    ) == sum(before) + 2
+
+
+def test_host_label_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_HOSTS_PER_SERVICE", 2)
+    labels = [
+        host_label("bounded", f"https://tes-{i}.org/") for i in range(4)
+    ]
+    assert labels == ["tes-0.org", "tes-1.org", "other", "other"]
+    assert host_label("bounded", "https://tes-1.org/other") == "tes-1.org"
+    assert host_label("unbounded", "https://tes-3.org/") == "tes-3.org"
+
+
+def test_metrics_endpoint(monkeypatch):
+    from connexion import App
+    from TEStribute.server import add_metrics
+
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    client = add_metrics(App(__name__)).app.test_client()
+    with observe_outbound("test", "https://drs.org/", "get"):
+        pass
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert "testribute_stage_duration_seconds" in text
+    assert (
+        'testribute_outbound_requests_total{host="drs.org",operation="get",'
+        'outcome="success",service="test"}'
+    ) in text
@@ -0,0 +1,58 @@
+"""Unit tests for `TEStribute.models.encoder`"""
+import json
+
+from TEStribute.models import (
+    AccessUris,
+    Costs,
+    Currency,
+    ServiceCombination,
+)
+from TEStribute.models.encoder import (
+    encode_response,
+    encode_service_combination,
+)
+from TEStribute.models.response import Response
+
+# Test mock objects
+combinations = [
+    ServiceCombination(
+        access_uris=AccessUris(
+            tes_uri="https://tes.org/",
+            a001="https://object-store.org/ä001",
+        ),
+        cost_estimate=Costs(amount=1.5, currency=Currency.EUR),
+        rank=1,
+        time_estimate=300,
+    ),
+    ServiceCombination(
+        access_uris=AccessUris(
+            tes_uri="https://tes.org/",
+            a001="https://object-store.org/\"a001\"",
+        ),
+        cost_estimate=Costs(amount=float("inf"), currency=Currency.EUR),
+        rank=2,
+        time_estimate=300.25,
+    ),
+]
+response = Response.__new__(Response)
+response.service_combinations_sorted = combinations
+response.warnings = ["Some warning."]
+
+
+def test_encode_service_combination():
+    data = encode_service_combination(combinations[0])
+    assert isinstance(data, bytes)
+    assert json.loads(data) == combinations[0].to_dict()
+
+
+def test_encode_response():
+    data = encode_response(response)
+    assert isinstance(data, bytes)
+    assert json.loads(data) == json.loads(json.dumps(response.to_dict()))
+
+
+def test_encode_response_empty():
+    empty = Response.__new__(Response)
+    empty.service_combinations_sorted = []
+    empty.warnings = []
+    assert json.loads(encode_response(empty)) == empty.to_dict()
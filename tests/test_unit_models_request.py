@@ -142,3 +142,44 @@ def test_sanitize_mode_none():
             tes_uris=tes_uris,
             mode=MODE_NONE,  # type: ignore
         )
+
+
+def test_fingerprint():
+    req_1 = Request(
+        resource_requirements=res_req,
+        tes_uris=tes_uris,
+    )
+    req_2 = Request(
+        resource_requirements=res_req,
+        tes_uris=list(tes_uris),
+    )
+    assert req_1.fingerprint() == req_2.fingerprint()
+
+
+def test_fingerprint_different_mode():
+    req_1 = Request(
+        resource_requirements=res_req,
+        tes_uris=tes_uris,
+        mode=MODE_STR_VALID,
+    )
+    req_2 = Request(
+        resource_requirements=res_req,
+        tes_uris=tes_uris,
+        mode=MODE_FLOAT_VALID,
+    )
+    assert req_1.fingerprint() != req_2.fingerprint()
+
+
+def test_fingerprint_equivalent_requests():
+    req_1 = Request(
+        resource_requirements=res_req,
+        tes_uris=tes_uris,
+        mode="cost",
+    )
+    req_2 = Request(
+        resource_requirements=res_req,
+        tes_uris=tes_uris,
+        object_ids=None,  # type: ignore
+        mode=0,
+    )
+    assert req_1.fingerprint() == req_2.fingerprint()
@@ -0,0 +1,159 @@
+"""Unit tests for `TEStribute.models.response`"""
+from itertools import combinations
+
+import pytest
+
+from TEStribute.errors import ValidationError
+from TEStribute.models import (
+    AccessMethod,
+    AccessMethodType,
+    AccessUrl,
+    Checksum,
+    ChecksumType,
+    Costs,
+    Currency,
+    DrsObject,
+    ResourceRequirements,
+    TaskInfo,
+)
+from TEStribute.models.request import Request
+import TEStribute.models.response as rs
+
+# Test parameters
+N_TES = 4
+N_URLS = 3
+OBJECT_IDS = ["a001", "a002"]
+TES_URIS = [f"https://tes-{i}.org/ga4gh/tes/v1/" for i in range(N_TES)]
+DRS_URIS = [f"https://drs-{i}.org/ga4gh/drs/v1/" for i in range(N_URLS)]
+IPS = {f"tes-{i}.org": f"10.0.0.{i}" for i in range(N_TES)}
+IPS.update({f"data-{i}.org": f"10.0.1.{i}" for i in range(N_URLS)})
+
+
+def _task_info(**kwargs):
+    return {
+        uri: TaskInfo(
+            estimated_compute_costs=Costs(10 + i, Currency.EUR),
+            estimated_storage_costs=Costs(1, Currency.EUR),
+            unit_costs_data_transfer=Costs(0.01 * (i + 1), Currency.EUR),
+            estimated_queue_time_sec=60 * i,
+        ) for i, uri in enumerate(TES_URIS)
+    }
+
+
+def _objects_metadata(**kwargs):
+    return {
+        object_id: {
+            drs_uri: DrsObject(
+                id=object_id,
+                size=10 ** 9,
+                created="2020-01-01T00:00:00Z",
+                checksums=[
+                    Checksum(checksum=object_id, type=ChecksumType.md5),
+                ],
+                access_methods=[AccessMethod(
+                    type=AccessMethodType.https,
+                    access_url=AccessUrl(
+                        url=f"https://data-{i}.org/{object_id}",
+                    ),
+                )],
+            ) for i, drs_uri in enumerate(DRS_URIS)
+        } for object_id in OBJECT_IDS
+    }
+
+
+def _ip_distance(*ips, **kwargs):
+    distances = {}
+    for ip_1, ip_2 in combinations(ips, r=2):
+        distance = float(sum(map(ord, ip_1 + ip_2)) % 97 + 1)
+        distances[(ip_1, ip_2)] = distances[(ip_2, ip_1)] = distance
+    return {"distances": distances}
+
+
+@pytest.fixture(autouse=True)
+def services(monkeypatch):
+    monkeypatch.setattr(rs, "fetch_tes_task_info", _task_info)
+    monkeypatch.setattr(rs, "fetch_drs_objects_metadata", _objects_metadata)
+    monkeypatch.setattr(
+        rs, "fetch_exchange_rates", lambda **kwargs: {"EUR": 1.0},
+    )
+    monkeypatch.setattr(rs, "gethostbyname", IPS.__getitem__)
+    monkeypatch.setattr(rs, "ip_distance", _ip_distance)
+
+
+def _rank(**kwargs):
+    response = rs.Response(
+        request=Request(
+            resource_requirements=ResourceRequirements(
+                cpu_cores=1,
+                disk_gb=1,
+                execution_time_sec=60,
+                ram_gb=1,
+            ),
+            tes_uris=TES_URIS,
+            object_ids=OBJECT_IDS,
+            drs_uris=DRS_URIS,
+            mode=0.5,
+        ),
+        target_currency=Currency.EUR,
+        **kwargs,
+    )
+    response.get_distances()
+    response.filter_service_combinations()
+    response.estimate_costs()
+    response.estimate_times()
+    response.rank_combinations()
+    return response
+
+
+def test_count_combinations():
+    assert rs.Response.count_combinations(
+        task_info=_task_info(),
+        object_info=_objects_metadata(),
+    ) == N_TES * N_URLS ** len(OBJECT_IDS)
+
+
+def test_max_combinations_not_exceeded():
+    response = _rank(max_combinations=N_TES * N_URLS ** len(OBJECT_IDS))
+    assert response.uris_per_object is None
+    assert len(response.service_combinations) == 36
+    assert not response.warnings
+
+
+def test_max_combinations_reject():
+    with pytest.raises(ValidationError):
+        _rank(max_combinations=35, on_exceed="reject")
+
+
+def test_max_combinations_too_many_tes():
+    with pytest.raises(ValidationError):
+        _rank(max_combinations=N_TES - 1, on_exceed="bounded")
+
+
+@pytest.mark.parametrize("max_combinations,uris_per_object", [
+    (N_TES, 1),
+    (N_TES * 4, 2),
+    (N_TES * 8, 2),
+])
+def test_max_combinations_bounded(max_combinations, uris_per_object):
+    unbounded = _rank()
+    bounded = _rank(max_combinations=max_combinations, on_exceed="bounded")
+    assert bounded.uris_per_object == uris_per_object
+    assert len(bounded.service_combinations) == \
+        N_TES * uris_per_object ** len(OBJECT_IDS)
+    assert len(bounded.distances) == len(bounded.service_combinations)
+    assert len(bounded.warnings) == 1
+
+    # Best combination of each TES instance is retained
+    best = {}
+    for combination in unbounded.service_combinations_sorted:
+        best.setdefault(combination.access_uris.tes_uri, combination)
+    best_bounded = {}
+    for combination in bounded.service_combinations_sorted:
+        best_bounded.setdefault(combination.access_uris.tes_uri, combination)
+    for tes_uri, combination in best.items():
+        assert best_bounded[tes_uri].cost_estimate.amount == \
+            pytest.approx(combination.cost_estimate.amount)
+    top, top_bounded = (
+        r.service_combinations_sorted[0] for r in (unbounded, bounded)
+    )
+    assert top_bounded.access_uris.to_dict() == top.access_uris.to_dict()
@@ -0,0 +1,89 @@
+"""Unit tests for `TEStribute.security.jwks`"""
+import json
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import algorithms
+import pytest
+
+import TEStribute.security.jwks as jwks
+from TEStribute.security.jwks import KeyCache
+
+# Test parameters
+PUBLIC_KEY = rsa.generate_private_key(
+    public_exponent=65537,
+    key_size=2048,
+).public_key()
+CONFIG_URL = "https://issuer.org/.well-known/openid-configuration"
+JWKS_URL = "https://issuer.org/jwks"
+IDP_CONFIG = {"jwks_uri": JWKS_URL}
+
+
+def _jwks(*kids: str):
+    jwk = json.loads(algorithms.RSAAlgorithm.to_jwk(PUBLIC_KEY))
+    return {"keys": [dict(jwk, kid=kid) for kid in kids]}
+
+
+class MockResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        if self.data is None:
+            raise ValueError("No JSON")
+        return self.data
+
+
+@pytest.fixture
+def idp(monkeypatch):
+    """Serves IdP config and JWK set; records requests."""
+    state = {"calls": [], "documents": {CONFIG_URL: IDP_CONFIG}}
+
+    def get(url, timeout=None):
+        state["calls"].append((url, timeout))
+        return MockResponse(state["documents"].get(url))
+
+    monkeypatch.setattr(jwks.requests, "get", get)
+    return state
+
+
+def test_get_idp_config_cached(idp):
+    cache = KeyCache()
+    assert cache.get_idp_config(url=CONFIG_URL, timeout=1) == IDP_CONFIG
+    assert cache.get_idp_config(url=CONFIG_URL, timeout=1) == IDP_CONFIG
+    assert idp["calls"] == [(CONFIG_URL, 1)]
+
+
+def test_get_idp_config_invalid_json(idp):
+    with pytest.raises(TypeError):
+        KeyCache().get_idp_config(url="https://other.org")
+
+
+def test_get_public_keys(idp):
+    idp["documents"][JWKS_URL] = _jwks("a", "b")
+    keys = KeyCache().get_public_keys(url=JWKS_URL)
+    assert set(keys) == {"a", "b"}
+    assert keys["a"].public_numbers() == PUBLIC_KEY.public_numbers()
+
+
+def test_get_public_keys_invalid(idp):
+    idp["documents"][JWKS_URL] = {"no_keys": []}
+    with pytest.raises(KeyError):
+        KeyCache().get_public_keys(url=JWKS_URL)
+
+
+def test_get_public_keys_refresh_rate_limited(idp, monkeypatch):
+    idp["documents"][JWKS_URL] = _jwks("a")
+    cache = KeyCache()
+    monkeypatch.setattr(jwks, "monotonic", lambda: 100.0)
+    cache.get_public_keys(url=JWKS_URL, refresh_interval=60)
+    idp["documents"][JWKS_URL] = _jwks("a", "b")
+    monkeypatch.setattr(jwks, "monotonic", lambda: 130.0)
+    keys = cache.get_public_keys(url=JWKS_URL, refresh=True)
+    assert set(keys) == {"a"}
+    monkeypatch.setattr(jwks, "monotonic", lambda: 170.0)
+    keys = cache.get_public_keys(url=JWKS_URL, refresh=True)
+    assert set(keys) == {"a", "b"}
+    assert len(idp["calls"]) == 2
@@ -0,0 +1,338 @@
+"""Unit tests for `TEStribute.security.process_jwt`"""
+import json
+from time import (perf_counter, sleep, time)
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+import jwt as pyjwt
+from jwt import algorithms
+import pytest
+import yaml
+
+import TEStribute.security.jwks as jwks
+import TEStribute.security.process_jwt as process_jwt
+from TEStribute.security.process_jwt import (
+    get_jwt_validator,
+    JWT,
+    JwtValidator,
+)
+from TEStribute.utils.profiling import Profile
+
+# Test parameters
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+PUBLIC_KEY = PRIVATE_KEY.public_key()
+ISSUER = "https://issuer.org"
+KID = "key-1"
+
+
+def _token(**claims) -> str:
+    """Returns signed JWT with the specified claims."""
+    token = pyjwt.encode(
+        {"iss": ISSUER, "sub": "user", **claims},
+        PRIVATE_KEY,
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+    return token.decode() if isinstance(token, bytes) else token
+
+
+class MockRequest:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+@pytest.fixture
+def key_lookups(monkeypatch):
+    """Resolves public keys locally and counts key lookups."""
+    lookups = []
+
+    def get_current_key(self, force=False):
+        lookups.append(self.jwt)
+        self.current_key = PUBLIC_KEY
+
+    monkeypatch.setattr(JWT, "get_current_key", get_current_key)
+    return lookups
+
+
+@pytest.fixture
+def validator():
+    return JwtValidator(validation_methods=["public_key"])
+
+
+def test_validator_immutable(validator):
+    with pytest.raises(AttributeError):
+        validator.jwt_prefix = "Token"
+    with pytest.raises(AttributeError):
+        del validator.jwt_prefix
+    assert validator.validation_methods == ("public_key",)
+
+
+def test_validator_unknown_method():
+    with pytest.raises(ValueError):
+        JwtValidator(validation_methods=["unknown"])
+
+
+def test_get_jwt_validator_shared():
+    config = {"jwt_prefix": "Token", "validation_methods": ["public_key"]}
+    validator = get_jwt_validator(config)
+    assert get_jwt_validator(dict(config)) is validator
+    assert validator.jwt_prefix == "Token"
+    assert get_jwt_validator() is not validator
+
+
+def test_get_jwt_from_request(validator):
+    token = _token()
+    request = MockRequest(headers={"Authorization": f"Bearer {token}"})
+    assert validator.get_jwt(request=request).jwt == token
+
+
+def test_get_jwt_from_request_wrong_prefix(validator):
+    request = MockRequest(headers={"Authorization": f"Token {_token()}"})
+    with pytest.raises(ValueError):
+        validator.get_jwt(request=request)
+
+
+def test_validate(key_lookups, validator):
+    token = _token(exp=int(time()) + 60)
+    validator.validate(jwt=token)
+    assert key_lookups == [token]
+
+
+def test_validate_invalid_signature(key_lookups, validator):
+    token = _token(exp=int(time()) + 60)
+    header, payload, signature = token.split(".")
+    with pytest.raises(ValueError):
+        validator.validate(jwt=".".join([header, payload, signature[::-1]]))
+
+
+def test_validate_cached(key_lookups, validator):
+    token = _token(exp=int(time()) + 60)
+    validator.validate(jwt=token)
+    jwt = validator.validate(jwt=token)
+    assert len(key_lookups) == 1
+    assert jwt.claims["sub"] == "user"
+
+
+def test_validate_cached_per_validator(key_lookups, validator):
+    token = _token(exp=int(time()) + 60)
+    validator.validate(jwt=token)
+    JwtValidator(validation_methods=["public_key"]).validate(jwt=token)
+    assert len(key_lookups) == 2
+
+
+def test_validate_cached_force(key_lookups, validator):
+    token = _token(exp=int(time()) + 60)
+    validator.validate(jwt=token)
+    validator.validate(jwt=token, force=True)
+    assert len(key_lookups) == 2
+
+
+def test_validate_not_cached_without_expiry(key_lookups, validator):
+    token = _token()
+    validator.validate(jwt=token)
+    validator.validate(jwt=token)
+    assert len(key_lookups) == 2
+
+
+@pytest.fixture
+def userinfo(monkeypatch):
+    """Mocks userinfo endpoint; configurable delay and outcome."""
+    state = {"calls": 0, "delay": 0, "ok": True, "timeouts": []}
+
+    class MockResponse:
+        def raise_for_status(self):
+            if not state["ok"]:
+                raise Exception("Invalid token")
+
+    def get(url, headers=None, timeout=None):
+        state["calls"] += 1
+        state["timeouts"].append(timeout)
+        if timeout is not None and state["delay"] > timeout:
+            sleep(timeout)
+            raise process_jwt.requests.exceptions.Timeout()
+        sleep(state["delay"])
+        return MockResponse()
+
+    def get_idp_config(self, force=False):
+        self.idp_config = {"userinfo_endpoint": f"{ISSUER}/userinfo"}
+
+    monkeypatch.setattr(process_jwt.requests, "get", get)
+    monkeypatch.setattr(JWT, "get_idp_config", get_idp_config)
+    return state
+
+
+def _policy_validator(policy, timeout=5):
+    return JwtValidator(
+        validation_methods=["userinfo", "public_key"],
+        validation_policy=policy,
+        validation_timeout=timeout,
+    )
+
+
+def test_validator_unknown_policy():
+    with pytest.raises(ValueError):
+        JwtValidator(validation_policy="unknown")
+
+
+def test_validate_policy_any_cached_key(key_lookups, userinfo, monkeypatch):
+    monkeypatch.setattr(JWT, "has_cached_public_key", lambda self: True)
+    _policy_validator("any").validate(jwt=_token())
+    assert len(key_lookups) == 1
+    assert userinfo["calls"] == 0
+
+
+def test_validate_policy_all_cached_key(key_lookups, userinfo, monkeypatch):
+    monkeypatch.setattr(JWT, "has_cached_public_key", lambda self: True)
+    _policy_validator("all").validate(jwt=_token())
+    assert len(key_lookups) == 1
+    assert userinfo["calls"] == 1
+
+
+def test_validate_policy_all_fails(key_lookups, userinfo):
+    userinfo["ok"] = False
+    with pytest.raises(ValueError):
+        _policy_validator("all").validate(jwt=_token())
+
+
+def test_validate_policy_any(key_lookups, userinfo):
+    userinfo["ok"] = False
+    _policy_validator("any").validate(jwt=_token())
+    assert len(key_lookups) == 1
+    assert userinfo["calls"] == 1
+
+
+def test_validate_policy_any_fails(userinfo, monkeypatch):
+    def get_current_key(self, force=False):
+        raise KeyError("Unknown key")
+
+    monkeypatch.setattr(JWT, "get_current_key", get_current_key)
+    userinfo["ok"] = False
+    with pytest.raises(ValueError):
+        _policy_validator("any").validate(jwt=_token())
+
+
+def test_validate_policy_first_success(key_lookups, userinfo):
+    userinfo["delay"] = 1
+    start = perf_counter()
+    _policy_validator("first_success").validate(jwt=_token())
+    assert perf_counter() - start < 0.5
+
+
+def test_validate_concurrent_profiled(key_lookups, userinfo):
+    profile = Profile()
+    profile.enable()
+    try:
+        _policy_validator("all").validate(jwt=_token())
+    finally:
+        profile.disable()
+    assert userinfo["calls"] == 1
+    assert [
+        (call["service"], call["operation"])
+        for call in profile.annotations["outbound"]
+    ] == [("idp", "userinfo")]
+
+
+def test_validate_timeout(key_lookups, userinfo):
+    userinfo["delay"] = 1
+    start = perf_counter()
+    # The call to the IdP is bound by the deadline, too, and may time out first
+    with pytest.raises(ValueError, match="timed out|Timeout"):
+        _policy_validator("all", timeout=0.1).validate(jwt=_token())
+    assert perf_counter() - start < 0.5
+
+
+def test_validate_timeout_not_blocking(key_lookups, userinfo):
+    validator = _policy_validator("all", timeout=0.2)
+    userinfo["delay"] = 5
+    for _ in range(validator.executor._max_workers + 2):
+        with pytest.raises(ValueError, match="timed out|Timeout"):
+            validator.validate(jwt=_token())
+    assert max(userinfo["timeouts"]) <= 0.2
+
+    # Timed-out methods neither occupy the executor nor run late
+    calls = userinfo["calls"]
+    userinfo["delay"] = 0
+    start = perf_counter()
+    validator.validate(jwt=_token())
+    assert perf_counter() - start < 0.2
+    assert userinfo["calls"] == calls + 1
+
+
+def test_get_current_key_refresh_on_unknown_key(monkeypatch):
+    jwk = json.loads(algorithms.RSAAlgorithm.to_jwk(PUBLIC_KEY))
+    documents = {
+        f"{ISSUER}/.well-known/openid-configuration": {
+            "jwks_uri": f"{ISSUER}/jwks",
+        },
+        f"{ISSUER}/jwks": {"keys": [dict(jwk, kid="old-key")]},
+    }
+    calls = []
+
+    class MockResponse:
+        def __init__(self, url):
+            self.url = url
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return documents[self.url]
+
+    def get(url, timeout=None):
+        calls.append(url)
+        return MockResponse(url)
+
+    monkeypatch.setattr(jwks.requests, "get", get)
+    monkeypatch.setattr(jwks, "monotonic", lambda: 1000.0)
+    validator = JwtValidator(
+        idp_config_url_suffix=".well-known/openid-configuration",
+    )
+    validator.get_jwt(jwt=_token()).get_public_keys()
+    assert not validator.get_jwt(jwt=_token()).has_cached_public_key()
+    documents[f"{ISSUER}/jwks"] = {"keys": [dict(jwk, kid=KID)]}
+    monkeypatch.setattr(jwks, "monotonic", lambda: 2000.0)
+    jwt = validator.get_jwt(jwt=_token())
+    jwt.get_current_key()
+    assert jwt.current_key.public_numbers() == PUBLIC_KEY.public_numbers()
+    assert calls.count(f"{ISSUER}/jwks") == 2
+    assert validator.get_jwt(jwt=_token()).has_cached_public_key()
+
+
+@pytest.fixture
+def trust_store(tmp_path, monkeypatch):
+    """Writes trust store file; fails on any request to an IdP."""
+    jwk = json.loads(algorithms.RSAAlgorithm.to_jwk(PUBLIC_KEY))
+    path = tmp_path / "trusted.yaml"
+    with open(str(path), "w") as f:
+        yaml.safe_dump({ISSUER: {"keys": [dict(jwk, kid=KID)]}}, f)
+
+    def get(*args, **kwargs):
+        raise AssertionError("Unexpected request")
+
+    monkeypatch.setattr(jwks.requests, "get", get)
+    monkeypatch.setattr(process_jwt.requests, "get", get)
+    return str(path)
+
+
+def test_validate_trust_store(trust_store):
+    validator = JwtValidator(
+        validation_methods=["public_key"],
+        trust_store=trust_store,
+    )
+    jwt = validator.get_jwt(jwt=_token())
+    assert jwt.has_cached_public_key()
+    jwt.validate()
+
+
+def test_validate_trust_store_only(trust_store):
+    validator = JwtValidator(
+        validation_methods=["public_key"],
+        trust_store=trust_store,
+        trust_store_only=True,
+    )
+    with pytest.raises(ValueError, match="trust store"):
+        validator.validate(jwt=_token(iss="https://other-issuer.org"))
+
+
+def test_validator_trust_store_only_missing():
+    with pytest.raises(ValueError):
+        JwtValidator(trust_store_only=True)
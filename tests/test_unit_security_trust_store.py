@@ -0,0 +1,69 @@
+"""Unit tests for `TEStribute.security.trust_store`"""
+import json
+import os
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import algorithms
+import yaml
+
+from TEStribute.security.trust_store import TrustStore
+
+# Test parameters
+PUBLIC_KEY = rsa.generate_private_key(
+    public_exponent=65537,
+    key_size=2048,
+).public_key()
+JWK = json.loads(algorithms.RSAAlgorithm.to_jwk(PUBLIC_KEY))
+ISSUER = "https://issuer.org"
+ISSUER_OTHER = "https://other-issuer.org"
+
+
+def _write(path, issuers):
+    with open(str(path), "w") as f:
+        yaml.safe_dump(issuers, f)
+
+
+def test_get_public_keys_file(tmp_path):
+    path = tmp_path / "trusted.yaml"
+    _write(path, {f"{ISSUER}/": {"keys": [dict(JWK, kid="a")]}})
+    store = TrustStore(path=str(path))
+    keys = store.get_public_keys(ISSUER)
+    assert set(keys) == {"a"}
+    assert keys["a"].public_numbers() == PUBLIC_KEY.public_numbers()
+    assert store.get_public_keys(ISSUER_OTHER) is None
+
+
+def test_get_public_keys_directory(tmp_path):
+    _write(tmp_path / "a.yaml", {ISSUER: {"keys": [dict(JWK, kid="a")]}})
+    with open(str(tmp_path / "b.json"), "w") as f:
+        json.dump({ISSUER_OTHER: {"keys": [dict(JWK, kid="b")]}}, f)
+    _write(tmp_path / "ignored.txt", {"x": {"keys": []}})
+    store = TrustStore(path=str(tmp_path))
+    assert sorted(store.issuers) == [ISSUER, ISSUER_OTHER]
+
+
+def test_reload_on_change(tmp_path):
+    path = tmp_path / "trusted.yaml"
+    _write(path, {ISSUER: {"keys": [dict(JWK, kid="a")]}})
+    store = TrustStore(path=str(path), check_interval=0)
+    assert set(store.get_public_keys(ISSUER)) == {"a"}
+    _write(path, {ISSUER: {"keys": [dict(JWK, kid="a"), dict(JWK, kid="b")]}})
+    stat = os.stat(str(path))
+    os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert set(store.get_public_keys(ISSUER)) == {"a", "b"}
+
+
+def test_reload_invalid_keeps_keys(tmp_path):
+    path = tmp_path / "trusted.yaml"
+    _write(path, {ISSUER: {"keys": [dict(JWK, kid="a")]}})
+    store = TrustStore(path=str(path), check_interval=0)
+    assert store.get_public_keys(ISSUER)
+    _write(path, {ISSUER: {"no_keys": []}})
+    assert set(store.get_public_keys(ISSUER)) == {"a"}
+    os.remove(str(path))
+    assert set(store.get_public_keys(ISSUER)) == {"a"}
+
+
+def test_missing(tmp_path):
+    store = TrustStore(path=str(tmp_path / "missing.yaml"))
+    assert store.get_public_keys(ISSUER) is None
@@ -0,0 +1,63 @@
+"""Unit tests for `TEStribute.utils.cache`"""
+import TEStribute.utils.cache as cache_module
+from TEStribute.utils.cache import TTLCache
+
+# Test parameters
+KEY = "key"
+VALUE = {"some": "value"}
+
+
+def test_get_miss():
+    cache = TTLCache(name="test")
+    assert cache.get(KEY) is None
+    assert cache.get(KEY, default=1) == 1
+
+
+def test_set_get():
+    cache = TTLCache(name="test")
+    cache.set(KEY, VALUE)
+    assert cache.get(KEY) == VALUE
+
+
+def test_get_expired(monkeypatch):
+    cache = TTLCache(name="test", ttl=10)
+    monkeypatch.setattr(cache_module, "monotonic", lambda: 100.0)
+    cache.set(KEY, VALUE)
+    monkeypatch.setattr(cache_module, "monotonic", lambda: 111.0)
+    assert cache.get(KEY) is None
+    assert len(cache) == 0
+
+
+def test_set_custom_ttl(monkeypatch):
+    cache = TTLCache(name="test", ttl=10)
+    monkeypatch.setattr(cache_module, "monotonic", lambda: 100.0)
+    cache.set(KEY, VALUE, ttl=100)
+    monkeypatch.setattr(cache_module, "monotonic", lambda: 111.0)
+    assert cache.get(KEY) == VALUE
+
+
+def test_set_no_ttl():
+    cache = TTLCache(name="test")
+    cache.set(KEY, VALUE, ttl=0)
+    assert cache.get(KEY) is None
+
+
+def test_eviction_lru():
+    cache = TTLCache(name="test", maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_delete_clear():
+    cache = TTLCache(name="test")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,172 @@
+"""Unit tests for `TEStribute.utils.cassettes`"""
+import gzip
+import json
+import multiprocessing
+from threading import Thread
+from time import perf_counter
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from werkzeug.serving import make_server
+from werkzeug.wrappers import (Request, Response)
+
+from TEStribute.utils.cassettes import (
+    _cassette_send,
+    Cassette,
+    install,
+    uninstall,
+    use_cassette,
+)
+
+
+@Request.application
+def _app(request):
+    if request.path == "/binary":
+        return Response(b"\xff\x00", content_type="application/octet-stream")
+    return Response(
+        json.dumps({
+            "path": request.path,
+            "body": request.get_data(as_text=True),
+        }),
+        content_type="application/json",
+    )
+
+
+@pytest.fixture
+def url():
+    server = make_server("127.0.0.1", 0, _app, threaded=True)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def restore_send():
+    yield
+    uninstall()
+
+
+def _record(path, url):
+    cassette = Cassette(path=str(path), mode="record")
+    install(cassette)
+    requests.get(f"{url}/a")
+    requests.post(f"{url}/b", data="x")
+    requests.post(f"{url}/b", data="y")
+    requests.get(f"{url}/binary")
+    uninstall()
+
+
+def test_record_replay(tmp_path, url):
+    path = tmp_path / "cassette.jsonl.gz"
+    _record(path, url)
+    install(Cassette(path=str(path), mode="replay", latency="zero"))
+    assert requests.get(f"{url}/a").json() == {"path": "/a", "body": ""}
+    assert requests.post(f"{url}/b", data="y").json()["body"] == "y"
+    assert requests.post(f"{url}/b", data="x").json()["body"] == "x"
+    response = requests.get(f"{url}/binary")
+    assert response.content == b"\xff\x00"
+    assert response.headers["Content-Type"] == "application/octet-stream"
+
+
+def test_replay_unknown_request(tmp_path, url):
+    path = tmp_path / "cassette.jsonl.gz"
+    _record(path, url)
+    install(Cassette(path=str(path), mode="replay", latency="zero"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        requests.get(f"{url}/unknown")
+
+
+def test_record_replay_error(tmp_path):
+    path = tmp_path / "cassette.jsonl.gz"
+    cassette = Cassette(path=str(path), mode="record")
+    install(cassette)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        requests.get("http://127.0.0.1:1/a")
+    cassette.flush()
+    install(Cassette(path=str(path), mode="replay", latency="zero"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        requests.get("http://127.0.0.1:1/a")
+
+
+def test_replay_latency(tmp_path, url):
+    path = tmp_path / "cassette.jsonl.gz"
+    _record(path, url)
+    lines = gzip.open(str(path), "rt").read().replace(
+        '"latency":0.', '"latency":0.2',
+    )
+    with gzip.open(str(path), "wt") as f:
+        f.write(lines)
+    install(Cassette(path=str(path), mode="replay"))
+    start = perf_counter()
+    requests.get(f"{url}/a")
+    assert perf_counter() - start >= 0.2
+
+
+def test_cassette_version(tmp_path):
+    path = tmp_path / "cassette.jsonl.gz"
+    with gzip.open(str(path), "wt") as f:
+        f.write('{"version": 0}\n')
+    with pytest.raises(ValueError):
+        Cassette(path=str(path))
+
+
+def test_cassette_invalid_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(path=str(tmp_path / "cassette.jsonl.gz"), mode="rewind")
+
+
+def test_uninstall(tmp_path, url):
+    send = HTTPAdapter.send
+    path = tmp_path / "cassette.jsonl.gz"
+    cassette = Cassette(path=str(path), mode="record")
+    install(cassette)
+    assert HTTPAdapter.send is _cassette_send
+    requests.get(f"{url}/a")
+    uninstall()
+    assert HTTPAdapter.send is send
+    with gzip.open(str(path), "rt") as f:
+        assert len(f.read().splitlines()) == 2
+    requests.get(f"{url}/a")
+    assert not cassette._pending
+
+
+def test_use_cassette_after_uninstall(tmp_path, url):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    cassette = use_cassette(path=path, mode="record")
+    uninstall()
+    assert use_cassette(path=path, mode="record") is cassette
+    assert HTTPAdapter.send is _cassette_send
+
+
+def _record_errors(path, count):
+    cassette = Cassette(path=path, mode="record")
+    request = requests.Request("GET", "http://127.0.0.1:1/a").prepare()
+    for _ in range(count):
+        cassette.record(
+            request,
+            0,
+            error=requests.exceptions.ConnectionError("refused"),
+        )
+        cassette.flush()
+
+
+def test_flush_processes(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_record_errors, args=(path, 50))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    with gzip.open(path, "rt") as f:
+        lines = f.read().splitlines()
+    assert json.loads(lines[0]) == {"version": 1}
+    assert len(lines) == 201
+    assert all("version" not in json.loads(line) for line in lines[1:])
@@ -0,0 +1,41 @@
+"""Unit tests for `TEStribute.utils.paths`"""
+import os
+import stat
+
+from TEStribute.utils.paths import (private_dir, user_cache_dir)
+
+
+def test_user_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert user_cache_dir() == str(tmp_path / "testribute")
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert user_cache_dir() == str(tmp_path / ".cache" / "testribute")
+
+
+def test_private_dir_created(tmp_path):
+    path = str(tmp_path / "a" / "b")
+    assert private_dir(path) == path
+    assert stat.S_IMODE(os.stat(path).st_mode) & 0o077 == 0
+    assert private_dir(path) == path
+
+
+def test_private_dir_writable_by_others(tmp_path):
+    path = tmp_path / "shared"
+    path.mkdir()
+    path.chmod(0o777)
+    assert private_dir(str(path)) is None
+    path.chmod(0o755)
+    assert private_dir(str(path)) == str(path)
+
+
+def test_private_dir_other_owner(monkeypatch, tmp_path):
+    uid = os.getuid()
+    monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+    assert private_dir(str(tmp_path)) is None
+
+
+def test_private_dir_unavailable(tmp_path):
+    path = tmp_path / "file"
+    path.write_text("")
+    assert private_dir(str(path)) is None
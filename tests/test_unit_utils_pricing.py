@@ -0,0 +1,137 @@
+"""Unit tests for `TEStribute.utils.pricing`"""
+import os
+
+import pytest
+import yaml
+
+from TEStribute.models import (Currency, ResourceRequirements)
+import TEStribute.utils.pricing as pricing
+from TEStribute.utils.pricing import (
+    estimate_task_info,
+    PriceSheet,
+    PriceSheets,
+)
+import TEStribute.utils.service_calls as service_calls
+from TEStribute.utils.service_calls import fetch_tes_task_info
+
+# Test parameters
+TES_URI = "https://tes.org/ga4gh/tes/v1/"
+TES_URI_OTHER = "https://other-tes.org/ga4gh/tes/v1/"
+SHEET = {
+    "currency": "EUR",
+    "unit_costs": {
+        "cpu_usage": 0.001,
+        "memory_consumption": 0.0005,
+        "data_storage": 0.2,
+        "data_transfer": 0.01,
+    },
+}
+RESOURCE_REQUIREMENTS = ResourceRequirements(
+    cpu_cores=2,
+    ram_gb=4,
+    disk_gb=10,
+    execution_time_sec=100,
+)
+
+
+def _write(path, tes_uris):
+    with open(str(path), "w") as f:
+        yaml.safe_dump({"object_ids": [], "tes_uris": tes_uris}, f)
+
+
+def test_estimate_task_info():
+    sheets = {
+        TES_URI: PriceSheet.from_dict(SHEET),
+        TES_URI_OTHER: PriceSheet.from_dict(
+            dict(SHEET, currency="USD", estimated_queue_time_sec=60),
+        ),
+    }
+    task_info = estimate_task_info(
+        price_sheets=sheets,
+        resource_requirements=RESOURCE_REQUIREMENTS,
+    )
+    assert list(task_info) == [TES_URI, TES_URI_OTHER]
+    info = task_info[TES_URI]
+    assert info.estimated_compute_costs.amount == pytest.approx(0.4)
+    assert info.estimated_compute_costs.currency == Currency.EUR
+    assert info.estimated_storage_costs.amount == pytest.approx(2)
+    assert info.unit_costs_data_transfer.amount == 0.01
+    assert info.estimated_queue_time_sec == 0
+    assert task_info[TES_URI_OTHER].estimated_queue_time_sec == 60
+    assert task_info[TES_URI_OTHER].estimated_compute_costs.currency == \
+        Currency.USD
+
+
+def test_estimate_task_info_strings():
+    task_info = estimate_task_info(
+        price_sheets={TES_URI: PriceSheet.from_dict(SHEET)},
+        resource_requirements=ResourceRequirements(
+            cpu_cores="2",
+            ram_gb="4",
+            disk_gb="10",
+            execution_time_sec="100",
+        ),
+    )
+    info = task_info[TES_URI]
+    assert info.estimated_compute_costs.amount == pytest.approx(0.4)
+    assert info.estimated_storage_costs.amount == pytest.approx(2)
+
+
+def test_estimate_task_info_empty():
+    assert estimate_task_info({}, RESOURCE_REQUIREMENTS) == {}
+
+
+def test_price_sheets_file(tmp_path):
+    path = tmp_path / "prices.yaml"
+    _write(path, {TES_URI: SHEET})
+    sheets = PriceSheets(source=str(path))
+    assert sheets.get(TES_URI.rstrip("/")).currency == Currency.EUR
+    assert sheets.get(TES_URI_OTHER) is None
+
+
+def test_price_sheets_refresh(tmp_path, monkeypatch):
+    path = tmp_path / "prices.yaml"
+    _write(path, {TES_URI: SHEET})
+    monkeypatch.setattr(pricing, "monotonic", lambda: 100.0)
+    sheets = PriceSheets(source=str(path), refresh_interval=60)
+    assert sheets.get(TES_URI_OTHER) is None
+    _write(path, {TES_URI: SHEET, TES_URI_OTHER: SHEET})
+    stat = os.stat(str(path))
+    os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert sheets.get(TES_URI_OTHER) is None
+    monkeypatch.setattr(pricing, "monotonic", lambda: 200.0)
+    assert sheets.get(TES_URI_OTHER) is not None
+
+
+def test_price_sheets_invalid_keeps_sheets(tmp_path):
+    path = tmp_path / "prices.yaml"
+    _write(path, {TES_URI: SHEET})
+    sheets = PriceSheets(source=str(path), refresh_interval=0)
+    assert sheets.get(TES_URI) is not None
+    _write(path, {TES_URI: {"currency": "EUR"}})
+    assert sheets.get(TES_URI) is not None
+    os.remove(str(path))
+    assert sheets.get(TES_URI) is not None
+
+
+def test_fetch_tes_task_info_price_sheets(tmp_path, monkeypatch):
+    path = tmp_path / "prices.yaml"
+    _write(path, {TES_URI: SHEET})
+    quoted = []
+
+    def _fetch_tes_task_info(uri, **kwargs):
+        quoted.append(uri)
+        return None
+
+    monkeypatch.setattr(
+        service_calls,
+        "_fetch_tes_task_info",
+        _fetch_tes_task_info,
+    )
+    task_info = fetch_tes_task_info(
+        tes_uris=[TES_URI, TES_URI_OTHER],
+        resource_requirements=RESOURCE_REQUIREMENTS,
+        price_sheets=PriceSheets(source=str(path)),
+    )
+    assert list(task_info) == [TES_URI]
+    assert quoted == [TES_URI_OTHER]
@@ -0,0 +1,167 @@
+"""Unit tests for `TEStribute.utils.profiling`"""
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import json
+import os
+import pstats
+from threading import (Event, Thread)
+from time import (monotonic, sleep)
+
+import pytest
+
+from TEStribute.config import ENV_CONFIG
+from TEStribute.metrics import (observe_outbound, observe_stage)
+import TEStribute
+from TEStribute.utils.profiling import (ENV_SAMPLE_RATE, Profiler)
+
+# Test parameters
+TOKEN = "secret"
+
+
+def _work():
+    with observe_stage("test"):
+        with observe_outbound("tes", "https://tes.org/", "getTaskInfo"):
+            sum(range(1000))
+
+
+def test_profile_sampled(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), sample_rate=1)
+    profile = profiler.start()
+    assert profile is not None
+    _work()
+    name = profiler.finish(profile, info={"path": "/rank-services"})
+    assert not profile.forced
+    pstats.Stats(str(tmp_path / f"{name}.prof"))
+    with open(str(tmp_path / f"{name}.json")) as f:
+        annotations = json.load(f)
+    assert annotations["path"] == "/rank-services"
+    assert [s["stage"] for s in annotations["stages"]] == ["test"]
+    assert annotations["outbound"][0]["operation"] == "getTaskInfo"
+    assert annotations["outbound"][0]["outcome"] == "success"
+
+
+def test_profile_not_sampled(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), sample_rate=0)
+    assert profiler.start() is None
+    _work()
+    assert not os.listdir(str(tmp_path))
+
+
+def test_profile_header(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), header_token=TOKEN)
+    assert profiler.start(token="wrong") is None
+    profile = profiler.start(token=TOKEN)
+    assert profile is not None and profile.forced
+    profiler.finish(profile, info={})
+
+
+def test_profile_retention(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), sample_rate=1, max_files=2)
+    names = []
+    for _ in range(4):
+        names.append(profiler.finish(profiler.start(), info={}))
+    assert sorted(os.listdir(str(tmp_path))) == sorted(
+        f"{name}.{ext}" for name in names[2:] for ext in ("prof", "json")
+    )
+
+
+def test_profile_other_threads(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), sample_rate=1)
+    profile = profiler.start()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(copy_context().run, _work).result()
+        executor.submit(_work).result()
+    name = profiler.finish(profile, info={})
+    with open(str(tmp_path / f"{name}.json")) as f:
+        annotations = json.load(f)
+    assert len(annotations["stages"]) == 1
+    assert len(annotations["outbound"]) == 1
+
+
+@pytest.mark.parametrize("profiled", ["leader", "follower"])
+def test_profile_coalesced(monkeypatch, tmp_path, profiled):
+    started = Event()
+    release = Event()
+
+    class Response:
+        service_combinations_sorted: list = []
+        warnings: list = []
+
+        def to_dict(self):
+            return {}
+
+    def _rank_services(request, config):
+        started.set()
+        release.wait(5)
+        _work()
+        return Response()
+
+    monkeypatch.setattr(TEStribute, "_rank_services", _rank_services)
+    config = tmp_path / "config.yaml"
+    config.write_text("coalesce_requests: True\n")
+    monkeypatch.setenv(ENV_CONFIG, str(config))
+    profiler = Profiler(directory=str(tmp_path), sample_rate=1)
+    names = []
+
+    def _request(role):
+        profile = profiler.start() if role == profiled else None
+        try:
+            TEStribute.rank_services(
+                resource_requirements={
+                    "cpu_cores": 1,
+                    "ram_gb": 1,
+                    "disk_gb": 1,
+                    "execution_time_sec": 1,
+                },
+                tes_uris=["https://tes.org/"],
+                mode=0,
+            )
+        finally:
+            if profile is not None:
+                names.append(profiler.finish(profile, info={}))
+
+    # Follower arrives while the leader's ranking is in flight
+    leader = Thread(target=_request, args=("leader",))
+    leader.start()
+    assert started.wait(5)
+    follower = Thread(target=_request, args=("follower",))
+    follower.start()
+    calls = TEStribute._rankings_in_flight._calls
+    deadline = monotonic() + 5
+    while monotonic() < deadline and \
+            all(call.callers < 2 for call in calls.values()):
+        sleep(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    with open(str(tmp_path / f"{names[0]}.json")) as f:
+        annotations = json.load(f)
+    if profiled == "leader":
+        assert "coalesced" not in annotations
+        assert len(annotations["outbound"]) == 1
+    else:
+        assert annotations["coalesced"] is True
+        assert not annotations["outbound"]
+
+
+def test_profile_directory_shared(tmp_path):
+    tmp_path.chmod(0o777)
+    profiler = Profiler(directory=str(tmp_path), sample_rate=1)
+    assert profiler.finish(profiler.start(), info={}) is None
+    assert not os.listdir(str(tmp_path))
+
+
+def test_from_config(monkeypatch, tmp_path):
+    monkeypatch.delenv(ENV_SAMPLE_RATE, raising=False)
+    config = {"profiling": {"enabled": False, "sample_rate": 0.5}}
+    assert Profiler.from_config(config) is None
+    config["profiling"]["enabled"] = True
+    assert Profiler.from_config(config).sample_rate == 0.5
+    monkeypatch.setenv(ENV_SAMPLE_RATE, "0.1")
+    config["profiling"]["enabled"] = False
+    assert Profiler.from_config(config).sample_rate == 0.1
+    monkeypatch.setenv(ENV_SAMPLE_RATE, "0")
+    assert Profiler.from_config(
+        {"profiling": {"header_token": TOKEN}}
+    ).sample_rate == 0
@@ -0,0 +1,158 @@
+"""Unit tests for `TEStribute.utils.schemas`"""
+import os
+
+from jsonschema.exceptions import ValidationError
+import pytest
+
+from TEStribute.utils.schemas import (
+    _load_spec,
+    CompiledResponseValidator,
+    get_validator,
+    load_spec,
+    response_validator,
+    should_validate,
+)
+
+# Test parameters
+SERVICE_COMBINATION = {
+    "access_uris": {
+        "tes_uri": "https://tes.org/",
+        "a001": "https://object-store.org/a001",
+    },
+    "cost_estimate": {
+        "amount": 1.5,
+        "currency": "EUR",
+    },
+    "rank": 1,
+    "time_estimate": 300.0,
+}
+SERVICE_COMBINATION_INVALID = {
+    "access_uris": {
+        "a001": "https://object-store.org/a001",
+    },
+    "cost_estimate": {
+        "amount": 1.5,
+        "currency": "invalid",
+    },
+    "rank": 1,
+    "time_estimate": 300.0,
+}
+SPEC = """
+openapi: 3.0.0
+paths:
+  /path:
+    get:
+      responses:
+        200:
+          description: OK
+"""
+
+
+def test_load_spec_cached(tmp_path):
+    spec_file = tmp_path / "spec.yaml"
+    spec_file.write_text(SPEC)
+    cache_dir = tmp_path / "cache"
+    spec = load_spec(path=str(spec_file), cache_dir=str(cache_dir))
+    assert spec["paths"]["/path"]["get"]["responses"]["200"]
+    cache_files = os.listdir(str(cache_dir))
+    assert len(cache_files) == 1
+    assert cache_files[0].endswith(".json")
+    _load_spec.cache_clear()
+    assert load_spec(path=str(spec_file), cache_dir=str(cache_dir)) == spec
+
+
+def test_load_spec_copy(tmp_path):
+    spec_file = tmp_path / "spec.yaml"
+    spec_file.write_text(SPEC)
+    spec = load_spec(path=str(spec_file), cache_dir=None)
+    spec["paths"]["/path"]["get"]["responses"].clear()
+    spec["openapi"] = "3.1.0"
+    spec = load_spec(path=str(spec_file), cache_dir=None)
+    assert spec["paths"]["/path"]["get"]["responses"]["200"]
+    assert spec["openapi"] == "3.0.0"
+
+
+def test_load_spec_cache_dir_unwritable(tmp_path):
+    spec_file = tmp_path / "spec.yaml"
+    spec_file.write_text(SPEC)
+    cache_dir = tmp_path / "file"
+    cache_dir.write_text("")
+    spec = load_spec(path=str(spec_file), cache_dir=str(cache_dir))
+    assert spec["paths"]["/path"]["get"]["responses"]["200"]
+
+
+def test_load_spec_cache_dir_shared(tmp_path):
+    spec_file = tmp_path / "spec.yaml"
+    spec_file.write_text(SPEC)
+    cache_dir = tmp_path / "cache"
+    load_spec(path=str(spec_file), cache_dir=str(cache_dir))
+    _load_spec.cache_clear()
+
+    # Cached specs in directories writable by others are ignored
+    cache_dir.chmod(0o777)
+    for cache_file in cache_dir.iterdir():
+        cache_file.write_text('{"paths": {}}')
+    spec = load_spec(path=str(spec_file), cache_dir=str(cache_dir))
+    assert spec["paths"]["/path"]["get"]["responses"]["200"]
+
+
+def test_load_spec_no_cache(tmp_path):
+    spec_file = tmp_path / "spec.yaml"
+    spec_file.write_text(SPEC)
+    load_spec(path=str(spec_file), cache_dir=None)
+    assert os.listdir(str(tmp_path)) == ["spec.yaml"]
+
+
+def test_get_validator_valid():
+    get_validator("ServiceCombination").validate(SERVICE_COMBINATION)
+
+
+def test_get_validator_invalid():
+    with pytest.raises(ValidationError):
+        get_validator("ServiceCombination").validate(
+            SERVICE_COMBINATION_INVALID
+        )
+
+
+def test_get_validator_cached():
+    assert get_validator("Response") is get_validator("Response")
+
+
+def test_get_validator_unknown_schema():
+    with pytest.raises(KeyError):
+        get_validator("Unknown")
+
+
+def test_should_validate_full():
+    assert should_validate(mode="full", sample_rate=0)
+
+
+def test_should_validate_off():
+    assert not should_validate(mode="off", sample_rate=1)
+
+
+def test_should_validate_sampled():
+    assert should_validate(mode="sampled", sample_rate=1)
+    assert not should_validate(mode="sampled", sample_rate=0)
+
+
+def test_should_validate_unknown_mode():
+    with pytest.raises(ValueError):
+        should_validate(mode="unknown")
+
+
+def test_response_validator():
+    validator = response_validator(mode="sampled", sample_rate=0.5)
+    assert issubclass(validator, CompiledResponseValidator)
+    assert validator.mode == "sampled"
+    assert validator.sample_rate == 0.5
+
+
+def test_response_validator_unknown_mode():
+    with pytest.raises(ValueError):
+        response_validator(mode="unknown")
+
+
+def test_response_validator_invalid_sample_rate():
+    with pytest.raises(ValueError):
+        response_validator(mode="sampled", sample_rate=1.5)
@@ -0,0 +1,276 @@
+"""Unit tests for `TEStribute.utils.service_cache`"""
+import socketserver
+import sys
+from threading import Thread
+from time import (monotonic, sleep)
+
+import pytest
+
+from TEStribute.models import (
+    AccessMethod,
+    AccessMethodType,
+    AccessUrl,
+    Checksum,
+    ChecksumType,
+    Costs,
+    Currency,
+    DrsObject,
+    TaskInfo,
+)
+import TEStribute.utils.service_calls as sc
+from TEStribute.utils.service_cache import (
+    Backend,
+    CacheError,
+    dumps,
+    FORMAT_VERSION,
+    get_service_caches,
+    loads,
+    MemoryBackend,
+    RedisBackend,
+    ServiceCache,
+    ServiceCaches,
+    SQLiteBackend,
+)
+
+# Test parameters
+PASSWORD = "secret"
+TASK_INFO = TaskInfo(
+    estimated_compute_costs=Costs(10, Currency.EUR),
+    estimated_storage_costs=Costs(1, Currency.USD),
+    unit_costs_data_transfer=Costs(0.01, Currency.EUR),
+    estimated_queue_time_sec=60,
+)
+DRS_OBJECT = DrsObject(
+    id="a001",
+    size=10 ** 9,
+    created="2020-01-01T00:00:00Z",
+    checksums=[Checksum(checksum="abc", type=ChecksumType.md5)],
+    access_methods=[AccessMethod(
+        type=AccessMethodType.https,
+        access_url=AccessUrl(url="https://data.org/a001"),
+        access_id="a001",
+    )],
+)
+
+
+class _KeyValueHandler(socketserver.StreamRequestHandler):
+    """
+    Handles a subset of Redis commands (RESP2) with an in-memory store;
+    other commands, e.g., `CLIENT SETINFO`, are answered with an error.
+    """
+
+    def _reply(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, bytes):
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        else:
+            self.wfile.write(value.encode() + b"\r\n")
+
+    def handle(self):
+        store = self.server.store  # type: ignore
+        authenticated = self.server.password is None  # type: ignore
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(size + 2)[:-2])
+            command = args[0].decode().upper()
+            self.server.commands.append(command)  # type: ignore
+            if command == "AUTH":
+                authenticated = args[-1].decode() == \
+                    self.server.password  # type: ignore
+                self._reply("+OK" if authenticated else "-WRONGPASS")
+            elif not authenticated:
+                self._reply("-NOAUTH Authentication required.")
+            elif command == "SELECT":
+                self._reply("+OK")
+            elif command == "GET":
+                value, expires = store.get(args[1], (None, 0))
+                self._reply(value if expires > monotonic() else None)
+            elif command == "SET":
+                store[args[1]] = (args[2], monotonic() + int(args[4]) / 1000)
+                self._reply("+OK")
+            elif command == "DEL":
+                self._reply(int(store.pop(args[1], None) is not None))
+            else:
+                self._reply(f"-ERR unknown command '{command}'")
+
+
+@pytest.fixture
+def kv_store():
+    """Local stand-in for a Redis server."""
+    server = socketserver.ThreadingTCPServer(
+        ("127.0.0.1", 0),
+        _KeyValueHandler,
+    )
+    server.daemon_threads = True
+    server.store = {}  # type: ignore
+    server.commands = []  # type: ignore
+    server.password = PASSWORD  # type: ignore
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_serialization():
+    for value in (None, "10.0.0.1", {"EUR": 1.0, "BTC": None}, ["x"] * 1000):
+        data = dumps(value)
+        assert data[0] == FORMAT_VERSION
+        assert loads(data) == value
+    assert len(dumps(["x"] * 1000)) < 100
+    with pytest.raises(ValueError):
+        loads(bytes((FORMAT_VERSION + 1, 0)) + b"null")
+
+
+def test_models():
+    caches = ServiceCaches(
+        backend=MemoryBackend(),
+        ttl={"tes_task_info": 60, "drs_objects": 60},
+    )
+    caches.tes_task_info.set(TASK_INFO, "https://tes.org/")
+    caches.drs_objects.set(DRS_OBJECT, "https://drs.org/", "a001")
+    task_info = caches.tes_task_info.get("https://tes.org/")
+    drs_object = caches.drs_objects.get("https://drs.org/", "a001")
+    assert task_info is not TASK_INFO
+    assert task_info.to_dict() == TASK_INFO.to_dict()
+    assert drs_object.to_dict() == DRS_OBJECT.to_dict()
+
+
+def test_fetch():
+    cache = ServiceCache(name="test", backend=MemoryBackend(), ttl=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return "10.0.0.1" if len(calls) > 1 else None
+
+    assert cache.fetch(fetch, "host") is None
+    assert cache.fetch(fetch, "host") == "10.0.0.1"
+    assert cache.fetch(fetch, "host") == "10.0.0.1"
+    assert len(calls) == 2
+    cache.ttl = 0
+    assert cache.fetch(fetch, "host") == "10.0.0.1"
+    assert len(calls) == 3
+
+
+def test_key():
+    cache = ServiceCache(name="test", backend=MemoryBackend(), ttl=60)
+    key = cache.key("https://tes.org/", "token")
+    assert key.startswith(f"testribute:{FORMAT_VERSION}:test:")
+    assert "token" not in key
+    assert key != cache.key("https://tes.org/", "other")
+
+
+def test_backend_abstract():
+    class IncompleteBackend(Backend):
+        def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Backend()  # type: ignore
+    with pytest.raises(TypeError):
+        IncompleteBackend()  # type: ignore
+
+
+def test_sqlite(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    backend = SQLiteBackend(path=path, maxsize=2)
+    backend.purge_interval = 1000
+    for index in range(4):
+        backend.set(f"key-{index}", b"value", ttl=60 + index)
+    backend.set("expired", b"value", ttl=0.01)
+
+    # Entries are shared with other processes using the same file
+    other = SQLiteBackend(path=path, maxsize=2)
+    assert other.get("key-0") == b"value"
+    sleep(0.02)
+    assert other.get("expired") is None
+    other.purge()
+    assert backend.get("key-0") is None
+    assert backend.get("key-3") == b"value"
+    backend.delete("key-3")
+    assert other.get("key-3") is None
+
+
+def test_sqlite_directory_shared(tmp_path):
+    tmp_path.chmod(0o777)
+    backend = SQLiteBackend(path=str(tmp_path / "cache.sqlite"))
+    with pytest.raises(CacheError):
+        backend.get("key")
+    assert not (tmp_path / "cache.sqlite").exists()
+
+
+def test_redis(kv_store):
+    backend = RedisBackend(
+        url=f"redis://:{PASSWORD}@127.0.0.1:{kv_store.server_address[1]}/1",
+    )
+    backend.set("key", b"\r\nvalue", ttl=60)
+    backend.set("expired", b"value", ttl=0.001)
+    sleep(0.01)
+    assert backend.get("key") == b"\r\nvalue"
+    assert backend.get("expired") is None
+    backend.delete("key")
+    assert backend.get("key") is None
+    assert kv_store.commands[0] == "AUTH"
+    assert "SELECT" in kv_store.commands
+    assert kv_store.commands.count("AUTH") == 1
+
+
+def test_redis_not_installed(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    with pytest.raises(ImportError, match="TEStribute\\[redis\\]"):
+        RedisBackend()
+
+
+def test_redis_unavailable(kv_store):
+    port = kv_store.server_address[1]
+    kv_store.shutdown()
+    kv_store.server_close()
+    cache = ServiceCache(
+        name="test",
+        backend=RedisBackend(url=f"redis://127.0.0.1:{port}/0", timeout=0.1),
+        ttl=60,
+    )
+    with pytest.raises(CacheError):
+        cache.backend.get("key")
+    assert cache.fetch(lambda: "value", "key") == "value"
+
+
+def test_get_service_caches(tmp_path):
+    caches = get_service_caches(
+        backend="sqlite",
+        path=str(tmp_path / "cache.sqlite"),
+        ttl=(("dns", 10),),
+    )
+    assert isinstance(caches.backend, SQLiteBackend)
+    assert caches.dns.ttl == 10
+    assert caches.tes_task_info.ttl == 0
+    with pytest.raises(ValueError):
+        get_service_caches(backend="unknown")
+
+
+def test_fetch_drs_objects_metadata(monkeypatch):
+    calls = []
+
+    def _fetch(*ids, uri, **kwargs):
+        calls.append(ids)
+        return {i: DRS_OBJECT for i in ids if i == "a001"}
+
+    monkeypatch.setattr(sc, "_fetch_drs_objects_metadata", _fetch)
+    caches = ServiceCaches(backend=MemoryBackend(), ttl={"drs_objects": 60})
+    for _ in range(2):
+        result = sc.fetch_drs_objects_metadata(
+            drs_uris=["https://drs.org/"],
+            object_ids=["a001", "a002"],
+            check_results=False,
+            caches=caches,
+        )
+        assert result["a001"]["https://drs.org/"].id == "a001"
+    assert calls == [("a001", "a002"), ("a002",)]
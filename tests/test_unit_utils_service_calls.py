@@ -52,3 +52,92 @@ def test_ip_distance_same_ip():
 def test_ip_distance_mixed():
     ret = ip_distance(IP_1, IP_2, DOMAIN)
     assert ret['distances'][(IP_1, IP_2)] > 0
+
+
+def test_fetch_tes_task_info_service_error(monkeypatch):
+    from bravado.exception import HTTPInternalServerError
+    import tes_client
+
+    from TEStribute.models import ResourceRequirements
+    from TEStribute.utils.service_calls import fetch_tes_task_info
+
+    class MockClient:
+        def __init__(self, url, jwt=None):
+            pass
+
+        def getTaskInfo(self, timeout=3, **kwargs):
+            raise HTTPInternalServerError(response=MockResponse())
+
+    class MockResponse:
+        status_code = 500
+        reason = "INTERNAL SERVER ERROR"
+        text = ""
+
+    monkeypatch.setattr(tes_client, "Client", MockClient)
+    task_info = fetch_tes_task_info(
+        tes_uris=["https://tes.org/"],
+        resource_requirements=ResourceRequirements(
+            cpu_cores=1,
+            disk_gb=1,
+            execution_time_sec=1,
+            ram_gb=1,
+        ),
+        check_results=False,
+    )
+    assert task_info == {}
+
+
+def test_fetch_drs_objects_metadata_service_error(monkeypatch):
+    from bravado.exception import HTTPInternalServerError
+    import drs_client
+
+    from TEStribute.utils.service_calls import _fetch_drs_objects_metadata
+
+    class MockClient:
+        def __init__(self, url, jwt=None):
+            pass
+
+        def getObject(self, object_id, timeout=3):
+            raise HTTPInternalServerError(response=MockResponse())
+
+    class MockResponse:
+        status_code = 500
+        reason = "INTERNAL SERVER ERROR"
+        text = ""
+
+    monkeypatch.setattr(drs_client, "Client", MockClient)
+    assert _fetch_drs_objects_metadata(
+        "a001",
+        "a002",
+        uri="https://drs.org/",
+    ) == {}
+
+
+def test_fetch_drs_objects_metadata_objects_spread(monkeypatch):
+    import TEStribute.utils.service_calls as service_calls
+    from TEStribute.models import (Checksum, DrsObject)
+    from TEStribute.utils.service_calls import fetch_drs_objects_metadata
+
+    objects = {"https://drs-1.org/": "a", "https://drs-2.org/": "b"}
+
+    def _fetch_drs_objects_metadata(*ids, uri, **kwargs):
+        return {
+            objects[uri]: DrsObject(
+                id=objects[uri],
+                size=1,
+                created="",
+                checksums=[Checksum(checksum="x")],
+                access_methods=[],
+            )
+        }
+
+    monkeypatch.setattr(
+        service_calls,
+        "_fetch_drs_objects_metadata",
+        _fetch_drs_objects_metadata,
+    )
+    result = fetch_drs_objects_metadata(
+        drs_uris=list(objects),
+        object_ids=["a", "b"],
+    )
+    assert set(result) == {"a", "b"}
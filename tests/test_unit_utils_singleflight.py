@@ -0,0 +1,65 @@
+"""Unit tests for `TEStribute.utils.singleflight`"""
+from threading import (Barrier, Thread)
+from time import sleep
+
+import pytest
+
+from TEStribute.utils.singleflight import SingleFlight
+
+# Test parameters
+N_CALLERS = 8
+
+
+def test_do_single_caller():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_do_concurrent_callers_share_result():
+    flight = SingleFlight()
+    barrier = Barrier(N_CALLERS)
+    calls = []
+    results = []
+
+    def fn():
+        calls.append(1)
+        sleep(0.2)
+        return "result"
+
+    def caller():
+        barrier.wait()
+        results.append(flight.do("key", fn))
+
+    threads = [Thread(target=caller) for _ in range(N_CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == N_CALLERS
+    assert all(result == ("result", True) for result in results)
+
+
+def test_do_different_keys():
+    flight = SingleFlight()
+    assert flight.do("key_1", lambda: 1) == (1, False)
+    assert flight.do("key_2", lambda: 2) == (2, False)
+
+
+def test_do_sequential_calls_not_shared():
+    flight = SingleFlight()
+    calls = []
+    flight.do("key", lambda: calls.append(1))
+    flight.do("key", lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_do_error():
+    flight = SingleFlight()
+
+    def fn():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fn)
+    assert flight.do("key", lambda: 1) == (1, False)
@@ -0,0 +1,92 @@
+"""Unit tests for `TEStribute.wsgi`"""
+import argparse
+import os
+
+import pytest
+
+from TEStribute import wsgi
+from TEStribute.wsgi import (clear_metrics_dir, get_options, Server)
+
+CONFIG = {
+    "server": {"host": "0.0.0.0", "port": 8080},
+    "wsgi": {"workers": None, "threads": 8, "timeout": 60},
+}
+
+
+@pytest.fixture
+def cpus(monkeypatch):
+    """Fixes the number of CPU cores at 4."""
+    monkeypatch.setattr(wsgi.multiprocessing, "cpu_count", lambda: 4)
+
+
+def test_clear_metrics_dir(monkeypatch, tmp_path):
+    directory = tmp_path / "metrics"
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(directory))
+    clear_metrics_dir()
+    assert os.listdir(str(directory)) == []
+    (directory / "counter_123.db").write_bytes(b"stale")
+    (directory / "README").write_text("kept")
+    clear_metrics_dir()
+    assert os.listdir(str(directory)) == ["README"]
+
+
+def test_server_options():
+    assert Server(options={"workers": 3}).cfg.workers == 3
+    assert Server().options == {}
+
+
+def _args(**kwargs):
+    args = {
+        "bind": None,
+        "workers": None,
+        "threads": None,
+        "keepalive": None,
+        "timeout": None,
+        "preload_app": None,
+    }
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+def test_get_options_defaults(cpus):
+    options = get_options(config=CONFIG, args=_args())
+    assert options["bind"] == "0.0.0.0:8080"
+    assert options["workers"] == 4
+    assert options["threads"] == 8
+    assert options["timeout"] == 60
+    assert options["child_exit"] is wsgi._child_exit
+    assert "preload_app" not in options
+
+
+def test_get_options_single_threaded(cpus):
+    config = dict(CONFIG, wsgi={"threads": 1})
+    assert get_options(config=config, args=_args())["workers"] == 9
+    config = dict(CONFIG, wsgi={})
+    assert get_options(config=config, args=_args())["workers"] == 9
+
+
+def test_get_options_config(cpus):
+    config = dict(CONFIG, wsgi={"workers": 2, "threads": 4, "keepalive": 5})
+    options = get_options(config=config, args=_args())
+    assert options["workers"] == 2
+    assert options["threads"] == 4
+    assert options["keepalive"] == 5
+
+
+def test_get_options_args(cpus):
+    options = get_options(
+        config=CONFIG,
+        args=_args(
+            bind="127.0.0.1:9000",
+            workers=3,
+            timeout=10,
+            preload_app=False,
+        ),
+    )
+    assert options["bind"] == "127.0.0.1:9000"
+    assert options["workers"] == 3
+    assert options["threads"] == 8
+    assert options["timeout"] == 10
+    assert options["preload_app"] is False
+    options = get_options(config=CONFIG, args=_args(threads=1))
+    assert options["workers"] == 9